@@ -1,5 +1,37 @@
-"""Pinterest Login Tool for CrewAI."""
+"""Pinterest Login Tool for CrewAI.
 
-from .pinterest_login_tool import PinterestLoginTool
+导出对象按需加载：导入包本身不会导入CrewAI、browser-use或LLM客户端。
+不使用CrewAI时可以直接使用 PinterestLoginClient。
+"""
 
-__all__ = ["PinterestLoginTool"]
+import importlib
+import os
+import sys
+
+__all__ = ["PinterestLoginTool", "PinterestLoginClient"]
+
+# 导出名称 -> 所在模块
+_LAZY_EXPORTS = {
+    "PinterestLoginTool": "pinterest_login_tool",
+    "PinterestLoginClient": "login_client",
+}
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # 包内模块使用绝对导入（from config import ...），需要包目录在sys.path中
+    if _PACKAGE_DIR not in sys.path:
+        sys.path.append(_PACKAGE_DIR)
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
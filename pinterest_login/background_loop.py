@@ -0,0 +1,87 @@
+"""长期运行的后台事件循环。
+
+同步调用方通过它执行协程，所有登录共享同一个事件循环，
+从而可以复用绑定在事件循环上的浏览器池和HTTP客户端。
+"""
+
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class BackgroundEventLoop:
+    """在守护线程中运行的事件循环。
+
+    Args:
+        name: 线程名称
+    """
+
+    def __init__(self, name: str = "pinterest-login-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """后台事件循环，首次访问时启动线程。"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._start()
+            return self._loop
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """在后台事件循环中执行协程并等待结果。
+
+        Args:
+            coro: 要执行的协程
+            timeout: 等待结果的超时时间（秒）
+
+        Returns:
+            Any: 协程的返回值
+
+        Raises:
+            RuntimeError: 在后台事件循环线程内部调用时
+        """
+        if self._thread is not None and threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("不能在后台事件循环线程中同步等待协程，请直接await")
+
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stop(self) -> None:
+        """停止事件循环并等待线程退出。"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join()
+        loop.close()
+
+    def _start(self) -> None:
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run_forever():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(started.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=run_forever, name=self.name, daemon=True)
+        thread.start()
+        started.wait()
+        self._loop = loop
+        self._thread = thread
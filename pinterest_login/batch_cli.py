@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""从CSV或JSONL文件批量登录Pinterest账号的命令行工具。
+
+凭据逐行读取，结果在每个账号完成时立即追加到JSONL文件，内存占用与输入行数无关。
+检查点文件记录已完成的行，中断后使用相同参数重新运行即可从中断处继续。
+
+用法：
+    python batch_cli.py accounts.csv -o results.jsonl --concurrency 8
+    python batch_cli.py accounts.jsonl -o results.jsonl --agent-mode lean --timeout 60
+
+CSV需要包含 username 和 password 两列；JSONL每行是包含 username 和 password 的对象。
+输出中不包含密码。
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Set, TextIO, Tuple
+
+from batch_login import BatchLoginResult, login_concurrently
+from config import PinterestConfig
+from login_result import LoginResult, LoginStatus
+
+
+LoginFunc = Callable[..., Awaitable[LoginResult]]
+
+
+def iter_credentials(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """逐行读取凭据文件。
+
+    Args:
+        path: CSV或JSONL文件路径
+        fmt: "csv" 或 "jsonl"，默认按扩展名判断
+
+    Yields:
+        Dict[str, Any]: 包含 username 和 password 的字典，无法解析的行两者为空字符串
+    """
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv")
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield {"username": (row.get("username") or "").strip(), "password": row.get("password") or ""}
+            return
+
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = {}
+            if not isinstance(row, dict):
+                row = {}
+            yield {"username": str(row.get("username") or "").strip(), "password": str(row.get("password") or "")}
+
+
+class BatchCheckpoint:
+    """记录批量登录已完成的行。
+
+    结果按完成顺序而不是输入顺序到达，因此保存一个水位线（之前的行全部已完成）
+    和水位线之后已完成的行号；后者只包含仍在进行中的行之后的少量行号。
+
+    Args:
+        path: 检查点文件路径
+        source: 输入文件路径，用于防止用另一个输入文件的检查点继续
+    """
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.watermark = 0
+        self.done: Set[int] = set()
+
+    def load(self) -> bool:
+        """读取已有的检查点。
+
+        Returns:
+            bool: 是否存在检查点
+
+        Raises:
+            ValueError: 检查点属于另一个输入文件
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        if data.get("source") != self.source:
+            raise ValueError(f"检查点属于另一个输入文件：{data.get('source')}")
+        self.watermark = int(data.get("watermark", 0))
+        self.done = set(data.get("done", []))
+        return True
+
+    def is_done(self, index: int) -> bool:
+        return index < self.watermark or index in self.done
+
+    def mark(self, index: int) -> None:
+        """标记一行已完成，并尽可能推进水位线。"""
+        self.done.add(index)
+        while self.watermark in self.done:
+            self.done.remove(self.watermark)
+            self.watermark += 1
+
+    def save(self) -> None:
+        """原子写入检查点文件。"""
+        data = {"source": self.source, "watermark": self.watermark, "done": sorted(self.done)}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+
+async def run_batch(
+    login: LoginFunc,
+    rows: Iterator[Dict[str, Any]],
+    output: TextIO,
+    checkpoint: BatchCheckpoint,
+    concurrency: int = 4,
+    headless: bool = True,
+    timeout: int = 30,
+    per_login_timeout: Optional[float] = None
+) -> Dict[str, int]:
+    """并发登录并把结果逐行写入JSONL。
+
+    每个结果先写入并刷新输出文件，再更新检查点，因此中断后重新运行时
+    最多重复最后一个结果，不会遗漏。
+
+    Args:
+        login: 登录协程函数，如 PinterestLoginClient.alogin
+        rows: iter_credentials() 返回的凭据
+        output: 以追加方式打开的输出文件
+        checkpoint: 检查点，其中已完成的行会被跳过
+        concurrency: 同时进行的登录数量上限
+        headless: 是否无头模式
+        timeout: 单次登录的时间上限（秒）
+        per_login_timeout: 单个账号的总时间上限（秒）
+
+    Returns:
+        Dict[str, int]: 按状态统计的结果数，以及跳过的行数
+    """
+    counts: Dict[str, int] = {"skipped": 0}
+    # login_concurrently 的序号 -> 输入中的行号，只保存尚未返回结果的行
+    line_numbers: Dict[int, int] = {}
+
+    def pending_rows() -> Iterator[Tuple[str, str]]:
+        position = 0
+        for line_number, row in enumerate(rows):
+            if checkpoint.is_done(line_number):
+                counts["skipped"] += 1
+                continue
+            line_numbers[position] = line_number
+            position += 1
+            yield row["username"], row["password"]
+
+    results = login_concurrently(
+        login, pending_rows(), concurrency=concurrency, headless=headless,
+        timeout=timeout, per_login_timeout=per_login_timeout
+    )
+    async for item in results:
+        line_number = line_numbers.pop(item.index)
+        output.write(json.dumps(_result_record(line_number, item), ensure_ascii=False) + "\n")
+        output.flush()
+        checkpoint.mark(line_number)
+        checkpoint.save()
+        status = "rejected" if item.rejected else item.result.status.value
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def _result_record(line_number: int, item: BatchLoginResult) -> Dict[str, Any]:
+    """一行输出：登录结果的字典形式，加上输入行号和批量登录的标记。
+
+    elapsed 使用批量登录测得的耗时，不含在限速器中排队的时间，排队时间单独记在 queued 中。
+    """
+    record = {"line": line_number, "rejected": item.rejected, "timed_out": item.timed_out}
+    record.update(item.result.to_dict())
+    if not item.rejected:
+        record["elapsed"] = item.elapsed
+        record["queued"] = item.queued
+    return record
+
+
+def main() -> int:
+    """主函数。"""
+    parser = argparse.ArgumentParser(description="从CSV或JSONL文件批量登录Pinterest账号")
+    parser.add_argument("input", help="凭据文件，CSV需要包含username和password列")
+    parser.add_argument("-o", "--output", required=True, help="结果JSONL文件，以追加方式写入")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="输入格式，默认按扩展名判断")
+    parser.add_argument("--checkpoint", help="检查点文件，默认为 <output>.checkpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时进行的登录数量")
+    parser.add_argument("--timeout", type=int, default=30, help="单次登录的时间上限（秒）")
+    parser.add_argument("--per-login-timeout", type=float, help="单个账号的总时间上限（秒）")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    parser.add_argument("--agent-mode", choices=sorted(PinterestConfig.AGENT_MODES), help="代理模式")
+    parser.add_argument("--probe-sessions", action="store_true",
+                        help="缓存的会话先通过HTTP检查是否仍然有效，失效的才重新登录")
+    args = parser.parse_args()
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    checkpoint = BatchCheckpoint(args.checkpoint or f"{args.output}.checkpoint", args.input)
+    try:
+        if checkpoint.load():
+            print(f"从检查点继续：前{checkpoint.watermark}行已完成", file=sys.stderr)
+    except ValueError as e:
+        print(f"❌ {str(e)}", file=sys.stderr)
+        return 2
+
+    from login_client import PinterestLoginClient
+    from session_probe import SessionProbe
+    client = PinterestLoginClient(
+        agent_mode=args.agent_mode,
+        session_probe=SessionProbe.from_config() if args.probe_sessions else None
+    )
+
+    async def run() -> Dict[str, int]:
+        try:
+            with open(args.output, "a", encoding="utf-8") as output:
+                return await run_batch(
+                    client.alogin,
+                    iter_credentials(args.input, args.format),
+                    output,
+                    checkpoint,
+                    concurrency=args.concurrency,
+                    headless=not args.headed,
+                    timeout=args.timeout,
+                    per_login_timeout=args.per_login_timeout
+                )
+        finally:
+            await client.close()
+
+    started = time.monotonic()
+    try:
+        counts = asyncio.run(run())
+    except KeyboardInterrupt:
+        print(f"\n已中断，使用相同参数重新运行即可继续（检查点：{checkpoint.path}）", file=sys.stderr)
+        return 130
+
+    summary = "，".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    print(f"完成，用时{time.monotonic() - started:.1f}秒。{summary}", file=sys.stderr)
+    return 0 if not counts.get(LoginStatus.ERROR.value) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""批量并发登录。
+
+按完成顺序以异步迭代器返回结果，同时进行的登录数量受并发上限控制。
+凭据是逐条读取的，输入可以是任意长度的迭代器。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple, Union
+
+from config import PinterestConfig
+from deadline import QueueClock, reset_queue_clock, set_queue_clock
+from login_result import FailureCategory, LoginResult, LoginStatus
+from retry_policy import classify_exception
+
+
+Credential = Union[Dict[str, Any], Tuple[str, str]]
+LoginFunc = Callable[..., Awaitable[LoginResult]]
+
+
+@dataclass
+class BatchLoginResult:
+    """批量登录中单个账号的结果。
+
+    Attributes:
+        index: 凭据在输入中的序号
+        username: 用户名或邮箱
+        result: 登录结果
+        elapsed: 登录耗时（秒），不含在限速器中排队的时间，被拒绝的凭据为0
+        queued: 在限速器中排队等待的时间（秒）
+        rejected: 凭据格式无效，未执行登录
+        timed_out: 超过单个账号的时间上限被取消
+    """
+
+    index: int
+    username: str
+    result: LoginResult
+    elapsed: float = 0.0
+    queued: float = 0.0
+    rejected: bool = False
+    timed_out: bool = False
+
+
+def _normalize(credential: Credential, headless: bool, timeout: int) -> Dict[str, Any]:
+    """把 (username, password) 元组或字典统一为登录参数字典。"""
+    if isinstance(credential, dict):
+        params = {"headless": headless, "timeout": timeout}
+        params.update(credential)
+        return params
+    username, password = credential
+    return {"username": username, "password": password, "headless": headless, "timeout": timeout}
+
+
+async def login_concurrently(
+    login: LoginFunc,
+    credentials: Iterable[Credential],
+    concurrency: int = 4,
+    headless: bool = True,
+    timeout: int = 30,
+    per_login_timeout: Optional[float] = None
+) -> AsyncIterator[BatchLoginResult]:
+    """并发执行多个账号的登录，按完成顺序返回结果。
+
+    Args:
+        login: 登录协程函数，参数为 (username, password, headless=..., timeout=...)
+        credentials: 凭据，每项为 (username, password) 或包含username/password的字典
+        concurrency: 同时进行的登录数量上限
+        headless: 默认是否无头模式
+        timeout: 默认登录超时时间（秒）
+        per_login_timeout: 单个账号的总时间上限（秒），默认是登录超时时间的两倍；
+            在限速器中排队等待的时间不计入
+
+    Yields:
+        BatchLoginResult: 单个账号的登录结果
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency必须大于0")
+
+    pending: Set[asyncio.Task] = set()
+    iterator = enumerate(credentials)
+    exhausted = False
+
+    async def run_one(index: int, params: Dict[str, Any]) -> BatchLoginResult:
+        username = params["username"]
+        limit = per_login_timeout or params["timeout"] * 2
+        started = time.monotonic()
+        # 登录任务创建时复制上下文，限速器把排队时间记在这个计时上
+        clock = QueueClock()
+        token = set_queue_clock(clock)
+        try:
+            task = asyncio.ensure_future(login(
+                username,
+                params["password"],
+                headless=params["headless"],
+                timeout=params["timeout"]
+            ))
+        finally:
+            reset_queue_clock(token)
+
+        try:
+            while not task.done():
+                remaining = limit - (time.monotonic() - started - clock.waited())
+                if remaining <= 0:
+                    break
+                await asyncio.wait({task}, timeout=remaining)
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                result = LoginResult.failed(
+                    username, f"超过{limit}秒未完成", FailureCategory.TIMEOUT, status=LoginStatus.ERROR
+                )
+                return BatchLoginResult(
+                    index, username, result, elapsed=time.monotonic() - started - clock.waited(),
+                    queued=clock.waited(), timed_out=True
+                )
+            result = task.result()
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        except Exception as e:
+            result = LoginResult.failed(
+                username, str(e), classify_exception(e), status=LoginStatus.ERROR
+            )
+        return BatchLoginResult(
+            index, username, result, elapsed=time.monotonic() - started - clock.waited(), queued=clock.waited()
+        )
+
+    try:
+        while True:
+            # 补充任务直到达到并发上限，无效凭据直接返回且不占用并发名额
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    index, credential = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+
+                params = _normalize(credential, headless, timeout)
+                username = params.get("username") or ""
+                is_valid, error_msg = PinterestConfig.validate_credentials(
+                    username, params.get("password") or ""
+                )
+                if not is_valid:
+                    result = LoginResult.failed(
+                        username, error_msg, FailureCategory.INVALID_INPUT, status=LoginStatus.ERROR
+                    )
+                    yield BatchLoginResult(index, username, result, rejected=True)
+                    continue
+                pending.add(asyncio.ensure_future(run_one(index, params)))
+
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""pinterest_login 离线登录基准测试。
+
+在本地模拟的Pinterest登录页面上，按不同并发数测量各登录路径的吞吐量、
+延迟分位数和峰值RSS。代理路径使用按脚本回复的LLM替身，不需要网络和API密钥。
+默认关闭登录限速器，测量的是登录路径本身；--rate-limit 开启时，排队时间单独报告，不计入延迟分位数。
+需要安装 playwright（以及代理路径所需的 browser-use）并执行过 playwright install chromium。
+
+登录路径：
+    cache     会话缓存命中，不启动浏览器
+    scripted  标准页面结构，脚本化登录
+    recipe    自定义页面结构，回放代理录制的登录配方
+    agent     自定义页面结构，browser-use代理 + LLM替身
+
+用法：
+    python benchmarks/bench_login.py
+    python benchmarks/bench_login.py --paths scripted,agent --concurrency 1,4,8 --logins 40
+    python benchmarks/bench_login.py --latency 0.2 --llm-latency 0.5 --json report.json
+    python benchmarks/bench_login.py --paths agent --agent-mode lean
+    python benchmarks/bench_login.py --paths scripted --rate-limit
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Sequence
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCH_DIR)
+
+PATHS = ("cache", "scripted", "recipe", "agent")
+
+# 各登录路径使用的页面结构
+LAYOUTS = {"cache": "standard", "scripted": "standard", "recipe": "custom", "agent": "custom"}
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """最近秩法计算分位数。
+
+    Args:
+        values: 样本
+        q: 分位，0到100
+
+    Returns:
+        float: 分位数，没有样本时为0
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """当前进程和已回收子进程（浏览器）的峰值RSS（MB）。"""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def run_scenario(args: argparse.Namespace) -> Dict[str, Any]:
+    """在当前进程中运行 args.run_one 指定的场景。"""
+    path = args.run_one
+    concurrency = int(args.concurrency)
+    logins = args.logins
+    sys.path.insert(0, PACKAGE_DIR)
+    sys.path.insert(0, BENCH_DIR)
+    os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+    from config import PinterestConfig
+    from fake_llm import FakeChatModel
+    from login_client import PinterestLoginClient
+    from login_recipe import RecipeStore
+    from metrics import LoginMetrics
+    from mock_pinterest import MockPinterestServer
+    from rate_limiter import AdaptiveRateLimiter
+    from session_cache import SessionCache
+
+    class BenchClient(PinterestLoginClient):
+        """使用LLM替身的登录客户端，agent 路径下跳过登录配方。"""
+
+        def _create_llm(self) -> Any:
+            return FakeChatModel(PinterestConfig.PINTEREST_LOGIN_URL, latency=args.llm_latency)
+
+        async def _recipe_login(self, *login_args: Any) -> Any:
+            if path == "agent":
+                return None
+            return await super()._recipe_login(*login_args)
+
+    work_dir = tempfile.mkdtemp(prefix="pinterest-bench-")
+    server = MockPinterestServer(LAYOUTS[path], latency=args.latency).start()
+    PinterestConfig.PINTEREST_URL = server.url
+    PinterestConfig.PINTEREST_LOGIN_URL = server.login_url
+
+    metrics = LoginMetrics(enabled=True)
+    client = BenchClient(
+        session_cache=SessionCache(os.path.join(work_dir, "sessions"), max_entries=logins + 1),
+        browser_pool_config={"size": concurrency},
+        recipe_store=RecipeStore(os.path.join(work_dir, "recipe.json")),
+        metrics=metrics,
+        rate_limiter=AdaptiveRateLimiter.from_config({"enabled": args.rate_limit}, metrics=metrics),
+        agent_mode=args.agent_mode
+    )
+    # 自定义页面结构下脚本化登录必然失败，它等待表单元素的时间会计入 recipe/agent 路径
+    client.scripted_engine.element_timeout = args.element_timeout
+
+    async def bench() -> Dict[str, Any]:
+        # 预热：启动浏览器池，cache 路径写入缓存，recipe 路径由代理录制配方
+        warmup = [(f"user{i}@example.com", "password123") for i in range(logins if path == "cache" else 1)]
+        async for _ in client.login_many(warmup, concurrency=concurrency):
+            pass
+        metrics.reset()
+
+        if path == "cache":
+            credentials = warmup
+        else:
+            credentials = [(f"user{i}@example.com", "password123") for i in range(1, logins + 1)]
+
+        latencies: List[float] = []
+        queued: List[float] = []
+        tokens: List[int] = []
+        statuses: Dict[str, int] = {}
+        methods: Dict[str, int] = {}
+        started = time.perf_counter()
+        async for item in client.login_many(credentials, concurrency=concurrency):
+            latencies.append(item.elapsed)
+            queued.append(item.queued)
+            tokens.append(item.result.llm_tokens)
+            status = item.result.status.value
+            method = item.result.method or "none"
+            statuses[status] = statuses.get(status, 0) + 1
+            methods[method] = methods.get(method, 0) + 1
+        wall = time.perf_counter() - started
+        await client.close()
+
+        phases = {
+            entry["labels"]["phase"]: round(entry["sum"] / entry["count"] * 1000, 1)
+            for entry in metrics.to_dict()["histograms"].get("phase_seconds", [])
+            if entry["count"]
+        }
+        return {
+            "logins": len(latencies),
+            "wall_s": round(wall, 3),
+            "logins_per_s": round(len(latencies) / wall, 2) if wall else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "queued_mean_ms": round(sum(queued) / len(queued) * 1000, 1) if queued else 0.0,
+            "llm_tokens_per_login": round(sum(tokens) / len(tokens), 1) if tokens else 0.0,
+            "status": statuses,
+            "method": methods,
+            "phase_mean_ms": phases,
+        }
+
+    try:
+        report = asyncio.run(bench())
+    finally:
+        client.shutdown()
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def measure(path: str, concurrency: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """在独立子进程中运行一个场景，使每个场景的峰值RSS互不影响。"""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-one", path,
+         "--concurrency", str(concurrency), "--logins", str(args.logins),
+         "--latency", str(args.latency), "--llm-latency", str(args.llm_latency),
+         "--element-timeout", str(args.element_timeout), "--agent-mode", args.agent_mode]
+        + (["--rate-limit"] if args.rate_limit else []),
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        return {"error": (completed.stderr.strip().splitlines() or ["未知错误"])[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    """主函数。"""
+    sys.path.insert(0, PACKAGE_DIR)
+    from config import PinterestConfig
+
+    parser = argparse.ArgumentParser(description="pinterest_login 离线登录基准测试")
+    parser.add_argument("--paths", default=",".join(PATHS), help="逗号分隔的登录路径")
+    parser.add_argument("--concurrency", default="1,4", help="逗号分隔的并发数")
+    parser.add_argument("--logins", type=int, default=20, help="每个场景的登录次数")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟网络延迟（秒/请求）")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="模拟LLM推理耗时（秒/步）")
+    parser.add_argument("--element-timeout", type=float, default=2.0,
+                        help="脚本化登录等待表单元素的时间（秒），影响 recipe/agent 路径")
+    parser.add_argument("--agent-mode", choices=sorted(PinterestConfig.AGENT_MODES), default="default",
+                        help="代理模式，用于比较两种模式的token用量")
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="开启登录限速器（默认关闭），排队时间不计入延迟")
+    parser.add_argument("--json", dest="json_path", help="把报告写入JSON文件")
+    parser.add_argument("--run-one", choices=PATHS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        report = run_scenario(args)
+        print(json.dumps(report, ensure_ascii=False))
+        return 0
+
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        print("❌ 需要安装playwright：pip install playwright && playwright install chromium", file=sys.stderr)
+        return 2
+
+    paths = [path.strip() for path in args.paths.split(",") if path.strip()]
+    unknown = [path for path in paths if path not in PATHS]
+    if unknown:
+        parser.error(f"未知的登录路径：{', '.join(unknown)}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    report: Dict[str, Dict[str, Any]] = {}
+    for path in paths:
+        for level in levels:
+            result = measure(path, level, args)
+            report.setdefault(path, {})[f"c{level}"] = result
+            if "error" in result:
+                print(f"{path:<9} c={level:<3} 失败：{result['error']}")
+            else:
+                print(f"{path:<9} c={level:<3} {result['logins_per_s']:>8} 次/秒  "
+                      f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms  "
+                      f"RSS={result['peak_rss_mb']['self']}+{result['peak_rss_mb']['children']}MB")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
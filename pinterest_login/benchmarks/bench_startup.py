@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""pinterest_login 冷启动基准测试。
+
+在全新的Python进程中测量导入耗时和常驻内存（RSS）增量，多次运行取中位数。
+设置阈值后可用于CI，超出阈值时以非零状态码退出。
+
+用法：
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --max-import-ms 50 --max-rss-mb 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+# 包所在目录的上一级，子进程从这里导入 pinterest_login
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 每个场景在子进程中执行的导入语句
+SCENARIOS = {
+    "import pinterest_login": "import pinterest_login",
+    "PinterestLoginClient": "from pinterest_login import PinterestLoginClient",
+    "PinterestLoginTool": "from pinterest_login import PinterestLoginTool",
+}
+
+_PROBE = """
+import json, resource, sys, time
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # 非Linux系统退化为峰值RSS（macOS单位为字节）
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+before = rss_kb()
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+heavy = [name for name in ("crewai", "browser_use", "playwright", "openai") if name in sys.modules]
+print(json.dumps({{"import_ms": elapsed * 1000, "rss_delta_kb": rss_kb() - before, "heavy_modules": heavy}}))
+"""
+
+
+def measure(statement: str, runs: int) -> dict:
+    """在独立子进程中多次执行导入语句并汇总结果。
+
+    Args:
+        statement: 导入语句
+        runs: 运行次数
+
+    Returns:
+        dict: 导入耗时与RSS增量的中位数和最大值
+    """
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement)],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    import_ms = [sample["import_ms"] for sample in samples]
+    rss_kb = [sample["rss_delta_kb"] for sample in samples]
+    return {
+        "import_ms_p50": round(statistics.median(import_ms), 2),
+        "import_ms_max": round(max(import_ms), 2),
+        "rss_mb_p50": round(statistics.median(rss_kb) / 1024, 2),
+        "heavy_modules": samples[-1]["heavy_modules"],
+    }
+
+
+def main() -> int:
+    """主函数。"""
+    parser = argparse.ArgumentParser(description="pinterest_login 冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每个场景运行次数")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="只运行指定场景，可重复")
+    parser.add_argument("--max-import-ms", type=float,
+                        help="import pinterest_login 的耗时上限（毫秒）")
+    parser.add_argument("--max-rss-mb", type=float,
+                        help="import pinterest_login 的RSS增量上限（MB）")
+    args = parser.parse_args()
+
+    names = args.scenario or list(SCENARIOS)
+    report = {name: measure(SCENARIOS[name], args.runs) for name in names}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    base = report.get("import pinterest_login")
+    if base is None:
+        return 0
+
+    failures = []
+    if base["heavy_modules"]:
+        failures.append(f"导入包时加载了重量级依赖：{', '.join(base['heavy_modules'])}")
+    if args.max_import_ms is not None and base["import_ms_p50"] > args.max_import_ms:
+        failures.append(f"导入耗时 {base['import_ms_p50']}ms 超过上限 {args.max_import_ms}ms")
+    if args.max_rss_mb is not None and base["rss_mb_p50"] > args.max_rss_mb:
+        failures.append(f"RSS增量 {base['rss_mb_p50']}MB 超过上限 {args.max_rss_mb}MB")
+
+    for failure in failures:
+        print(f"❌ {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
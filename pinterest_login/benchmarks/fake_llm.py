@@ -0,0 +1,128 @@
+"""按固定脚本回复的 ChatOpenAI 替身，供离线基准测试使用。
+
+每次登录使用一个新实例，按顺序返回：打开登录页、输入用户名、输入密码、点击登录、完成。
+元素序号从browser-use发送的页面状态文本中查找，页面出现 header-profile 或错误信息时直接完成。
+未指定用户名时从登录任务描述中读取。
+"""
+
+import asyncio
+import re
+from typing import Any, Dict, List, Optional
+
+
+# browser-use 序列化后的可交互元素形如：[12]<input type=email name=id ... />
+_ELEMENT_PATTERN = re.compile(r"\[(\d+)\]<(input|button)([^>]*)>")
+
+# 登录任务描述中的用户名，兼容默认和精简两种模板
+_USERNAME_PATTERN = re.compile(r"用户名(?:/邮箱)?：([^\s，,]+)")
+
+
+def _message_text(message: Any) -> str:
+    content = getattr(message, "content", message)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(getattr(part, "text", "") or "" for part in content)
+    return str(content or "")
+
+
+def _find_index(page_text: str, tag: str, hints: List[str]) -> Optional[int]:
+    for match in _ELEMENT_PATTERN.finditer(page_text):
+        index, element_tag, attributes = match.groups()
+        if element_tag == tag and any(hint in attributes for hint in hints):
+            return int(index)
+    for match in _ELEMENT_PATTERN.finditer(page_text):
+        if match.group(2) == tag:
+            return int(match.group(1))
+    return None
+
+
+class FakeChatModel:
+    """模拟LLM，接口与 browser_use.llm.ChatOpenAI 的 ainvoke 一致。
+
+    Args:
+        login_url: 模拟站点的登录页地址
+        username: 登录用户名，默认从任务描述中读取
+        password: 登录密码
+        latency: 每次调用的模拟推理耗时（秒）
+        tokens_per_call: 每次调用记录的token数
+    """
+
+    model = "fake-llm"
+    provider = "fake"
+
+    def __init__(
+        self,
+        login_url: str,
+        username: Optional[str] = None,
+        password: str = "password123",
+        latency: float = 0.0,
+        tokens_per_call: int = 1500
+    ):
+        self.login_url = login_url
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.tokens_per_call = tokens_per_call
+        self.calls = 0
+
+    @property
+    def name(self) -> str:
+        return self.model
+
+    @property
+    def model_name(self) -> str:
+        return self.model
+
+    async def ainvoke(self, messages: List[Any], output_format: Any = None) -> Any:
+        from browser_use.llm.views import ChatInvokeCompletion, ChatInvokeUsage
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls += 1
+
+        if self.username is None:
+            match = _USERNAME_PATTERN.search("\n".join(_message_text(m) for m in messages))
+            self.username = match.group(1) if match else ""
+        page_text = _message_text(messages[-1]) if messages else ""
+        output = self._next_output(page_text)
+        completion = output_format.model_validate(output) if output_format is not None else str(output)
+        usage = ChatInvokeUsage(
+            prompt_tokens=self.tokens_per_call,
+            prompt_cached_tokens=None,
+            prompt_cache_creation_tokens=None,
+            prompt_image_tokens=None,
+            completion_tokens=0,
+            total_tokens=self.tokens_per_call,
+        )
+        return ChatInvokeCompletion(completion=completion, usage=usage)
+
+    def _next_output(self, page_text: str) -> Dict[str, Any]:
+        if "header-profile" in page_text:
+            return self._output({"done": {"text": "已登录", "success": True}})
+        if "data-test-id=error" in page_text or "密码不正确" in page_text:
+            return self._output({"done": {"text": "您输入的密码不正确。", "success": False}})
+
+        step = self.calls - 1
+        if step == 0:
+            return self._output({"go_to_url": {"url": self.login_url, "new_tab": False}})
+        if step == 1:
+            index = _find_index(page_text, "input", ["username", "email", "identifier"])
+            return self._output({"input_text": {"index": index or 1, "text": self.username}})
+        if step == 2:
+            index = _find_index(page_text, "input", ["password", "secret"])
+            return self._output({"input_text": {"index": index or 2, "text": self.password}})
+        if step == 3:
+            index = _find_index(page_text, "button", ["login", "submit"])
+            return self._output({"click_element_by_index": {"index": index or 3}})
+        return self._output({"done": {"text": "无法确认登录状态", "success": False}})
+
+    @staticmethod
+    def _output(action: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "thinking": "",
+            "evaluation_previous_goal": "",
+            "memory": "",
+            "next_goal": "",
+            "action": [action],
+        }
@@ -0,0 +1,173 @@
+"""本地模拟的Pinterest登录页面，供离线基准测试使用。
+
+提供两种页面结构：
+- standard：与 PinterestConfig.SELECTORS 匹配，脚本化登录可以直接完成
+- custom：表单元素使用不同的属性，脚本化登录无法识别，只能由代理或登录配方完成
+
+密码以 "wrong" 开头时返回带错误信息的登录页，否则跳转到带 header-profile 的主页。
+latency 用于模拟慢速网络，每个响应前等待指定秒数。
+"""
+
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs
+
+
+_STANDARD_FORM = """
+<form method="post" action="/login/">
+  <input id="email" name="id" type="email" placeholder="邮箱">
+  <input id="password" name="password" type="password" placeholder="密码">
+  <button type="submit" data-test-id="registerFormSubmitButton">登录</button>
+</form>
+"""
+
+_CUSTOM_FORM = """
+<form method="post" action="/login/">
+  <input name="identifier" type="text" autocomplete="username" placeholder="邮箱或用户名">
+  <input name="secret" type="password" autocomplete="current-password" placeholder="密码">
+  <button class="login-go">继续</button>
+</form>
+"""
+
+_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+_ERROR = '<div data-test-id="error">您输入的密码不正确。</div>'
+
+_HOME = '<div data-test-id="header-profile">头像</div><h1>首页</h1>'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if path in ("/", "/home/") and "_pinterest_sess=" in (self.headers.get("Cookie") or ""):
+            self._send(_PAGE.format(title="Pinterest", body=_HOME))
+        elif path in ("/", "/login/"):
+            self._send(_PAGE.format(title="登录 Pinterest", body=self.server.form))
+        else:
+            self._send(_PAGE.format(title="404", body="Not Found"), status=404)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        fields = parse_qs(self.rfile.read(length).decode("utf-8"))
+        password = (fields.get("password") or fields.get("secret") or [""])[0]
+
+        if not password or password.startswith("wrong"):
+            self.server.failures += 1
+            self._send(_PAGE.format(title="登录 Pinterest", body=self.server.form + _ERROR))
+            return
+
+        self.server.logins += 1
+        self._send(
+            "",
+            status=303,
+            headers={
+                "Location": "/home/",
+                "Set-Cookie": f"_pinterest_sess={secrets.token_hex(16)}; Path=/; Max-Age=3600",
+            }
+        )
+
+    def _send(self, body: str, status: int = 200, headers: Optional[dict] = None) -> None:
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    form = _STANDARD_FORM
+    latency = 0.0
+    logins = 0
+    failures = 0
+
+
+class MockPinterestServer:
+    """在后台线程中运行的模拟Pinterest站点。
+
+    Args:
+        layout: 页面结构，"standard" 或 "custom"
+        latency: 每个响应前的等待时间（秒）
+        port: 监听端口，默认随机
+    """
+
+    def __init__(self, layout: str = "standard", latency: float = 0.0, port: int = 0):
+        if layout not in ("standard", "custom"):
+            raise ValueError(f"未知的页面结构：{layout}")
+        self._server = _Server(("127.0.0.1", port), _Handler)
+        self._server.form = _STANDARD_FORM if layout == "standard" else _CUSTOM_FORM
+        self._server.latency = latency
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def login_url(self) -> str:
+        return f"{self.url}/login/"
+
+    @property
+    def logins(self) -> int:
+        """成功登录的次数。"""
+        return self._server.logins
+
+    @property
+    def failures(self) -> int:
+        """密码错误的次数。"""
+        return self._server.failures
+
+    def start(self) -> "MockPinterestServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockPinterestServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本地模拟Pinterest登录页面")
+    parser.add_argument("--layout", choices=("standard", "custom"), default="standard")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个响应的延迟（秒）")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with MockPinterestServer(args.layout, args.latency, args.port) as server:
+        print(f"模拟登录页面：{server.login_url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,440 @@
+"""预启动的Chromium浏览器池。
+
+多次登录共享同一批浏览器进程，每次登录分配一个独立的浏览器上下文，
+避免每次调用都启动和关闭一个完整的Chromium。空闲浏览器上预先创建好一个上下文，
+登录借用时直接取用，不必等待创建。
+
+浏览器以 --remote-debugging-port=0 启动，由Chromium自己绑定远程调试端口并写入配置目录下的
+DevToolsActivePort 文件，避免事先探测的空闲端口在启动前被其他进程占用。
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from metrics import LoginMetrics, get_metrics
+
+
+# Chromium写入实际远程调试端口的文件，位于浏览器配置目录下
+DEVTOOLS_PORT_FILE = "DevToolsActivePort"
+
+
+async def _read_devtools_port(user_data_dir: str, timeout: float = 10.0) -> int:
+    """读取Chromium写入配置目录的远程调试端口。
+
+    Args:
+        user_data_dir: 浏览器配置目录
+        timeout: 等待文件写入的时间（秒）
+
+    Returns:
+        int: 远程调试端口
+
+    Raises:
+        RuntimeError: 超时仍未读到端口
+    """
+    path = os.path.join(user_data_dir, DEVTOOLS_PORT_FILE)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            # 第一行是端口，第二行是浏览器的WebSocket路径；两行都在时文件已写完
+            if len(lines) >= 2:
+                return int(lines[0])
+        except (OSError, ValueError):
+            pass
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"浏览器未报告远程调试端口：{path}")
+        await asyncio.sleep(0.05)
+
+
+async def _browser_user_data_dir(browser: Any) -> str:
+    """获取Playwright为浏览器创建的临时配置目录。"""
+    session = await browser.new_browser_cdp_session()
+    try:
+        # 只有带 --enable-automation 启动的浏览器才返回命令行，Playwright默认带有该参数
+        result = await session.send("Browser.getBrowserCommandLine")
+    finally:
+        await session.detach()
+    for argument in result.get("arguments", []):
+        if argument.startswith("--user-data-dir="):
+            return argument.split("=", 1)[1]
+    raise RuntimeError("无法获取浏览器的配置目录")
+
+
+class PooledBrowser:
+    """池中的一个浏览器进程。
+
+    Args:
+        browser: Playwright浏览器对象
+        cdp_url: 远程调试地址，browser-use代理可通过它连接同一个浏览器
+    """
+
+    def __init__(self, browser: Any, cdp_url: str):
+        self.browser = browser
+        self.cdp_url = cdp_url
+        self.uses = 0
+        self.last_used = time.monotonic()
+        # 预先创建的上下文（创建任务），借用时使用默认上下文参数即可直接取用
+        self.spare: Optional[asyncio.Task] = None
+
+    def is_connected(self) -> bool:
+        return self.browser.is_connected()
+
+
+class BrowserLease:
+    """一次登录借出的浏览器上下文。
+
+    独立上下文之间不共享cookie和存储。如果调用方直接通过 cdp_url
+    操作了浏览器的默认上下文，应将 dirty 置为True，归还时浏览器会被关闭而不是复用。
+
+    Args:
+        context: Playwright浏览器上下文
+        cdp_url: 远程调试地址
+        playwright: Playwright对象，用于建立CDP连接
+        browser: 池中的浏览器对象；持久化上下文自己拥有浏览器进程，此时为None
+    """
+
+    def __init__(self, context: Any, cdp_url: str, playwright: Any, browser: Any = None):
+        self.context = context
+        self.cdp_url = cdp_url
+        self.browser = browser
+        self.dirty = False
+        self._playwright = playwright
+        self._cdp_browser: Any = None
+
+    async def default_context(self) -> Any:
+        """通过CDP连接获取浏览器的默认上下文，即browser-use代理操作的上下文。
+
+        Returns:
+            Any: Playwright浏览器上下文
+        """
+        if self._cdp_browser is None:
+            self._cdp_browser = await self._playwright.chromium.connect_over_cdp(self.cdp_url)
+        return self._cdp_browser.contexts[0]
+
+    async def release(self) -> None:
+        """关闭本次借用创建的上下文和CDP连接。"""
+        if self._cdp_browser is not None:
+            await self._cdp_browser.close()
+            self._cdp_browser = None
+        await self.context.close()
+
+
+class BrowserPool:
+    """浏览器池，控制并发浏览器数量并回收空闲或使用次数过多的浏览器。
+
+    Args:
+        size: 同时存在的浏览器数量上限
+        headless: 是否无头模式
+        idle_timeout: 浏览器空闲多久后关闭（秒）
+        max_uses: 每个浏览器最多借出次数，达到后关闭并重新启动
+        warm: 首次使用时预启动的浏览器数量
+        context_options: 预先创建上下文使用的参数，借用时参数相同才直接取用；为None时不预先创建
+        metrics: 记录浏览器启动耗时的指标对象，默认使用 get_metrics()
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        headless: bool = True,
+        idle_timeout: float = 300,
+        max_uses: int = 50,
+        warm: int = 1,
+        context_options: Optional[Dict[str, Any]] = None,
+        metrics: Optional[LoginMetrics] = None
+    ):
+        self.size = size
+        self.headless = headless
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+        self.warm = min(warm, size)
+        self.context_options = context_options
+        self.metrics = metrics or get_metrics()
+        self.logger = logging.getLogger(__name__)
+
+        self._playwright: Any = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._idle: List[PooledBrowser] = []
+        self._in_use = 0
+        self._reaper: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self._launched = 0
+        self._recycled = 0
+        self._idle_closed = 0
+        self._leases = 0
+        self._spare_hits = 0
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """浏览器池绑定的事件循环，Playwright对象不能跨事件循环使用。"""
+        return self._loop
+
+    async def start(self, warm: Optional[int] = None) -> None:
+        """启动Playwright并预先启动浏览器。
+
+        已启动时直接返回，并发调用只启动一次。
+
+        Args:
+            warm: 预启动的浏览器数量，默认等于池大小
+        """
+        if self._closed:
+            raise RuntimeError("浏览器池已关闭")
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._playwright is not None:
+                return
+
+            from playwright.async_api import async_playwright
+
+            self._loop = asyncio.get_running_loop()
+            self._semaphore = asyncio.Semaphore(self.size)
+            self._playwright = await async_playwright().start()
+
+            warm = self.size if warm is None else min(warm, self.size)
+            browsers = await asyncio.gather(*(self._launch() for _ in range(warm)))
+            for pooled in browsers:
+                self._prepare_spare(pooled)
+            self._idle.extend(browsers)
+            # 等待预先创建的上下文就绪，第一次登录不再等待
+            await asyncio.gather(*(p.spare for p in browsers if p.spare is not None), return_exceptions=True)
+
+            if self.idle_timeout:
+                self._reaper = asyncio.create_task(self._reap_loop())
+
+    @asynccontextmanager
+    async def acquire(self, **context_options: Any) -> AsyncIterator[BrowserLease]:
+        """借出一个浏览器上下文。
+
+        Args:
+            **context_options: 传给 browser.new_context 的参数
+
+        Yields:
+            BrowserLease: 浏览器上下文
+        """
+        await self._ensure_started()
+        with self.metrics.phase("browser_wait"):
+            await self._semaphore.acquire()
+        try:
+            pooled = await self._checkout()
+            lease = None
+            cancelled = False
+            try:
+                context = await self._take_spare(pooled, context_options)
+                if context is None:
+                    context = await pooled.browser.new_context(**context_options)
+                lease = BrowserLease(context, pooled.cdp_url, self._playwright, browser=pooled.browser)
+                yield lease
+            except asyncio.CancelledError:
+                # 超时取消的登录可能留下卡住的页面，该浏览器不再复用
+                cancelled = True
+                raise
+            finally:
+                if lease is not None:
+                    try:
+                        await lease.release()
+                    except Exception as e:
+                        self.logger.debug(f"关闭浏览器上下文失败：{str(e)}")
+                await self._checkin(pooled, discard=lease is None or lease.dirty or cancelled)
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def acquire_persistent(self, user_data_dir: str, **context_options: Any) -> AsyncIterator[BrowserLease]:
+        """启动一个使用持久化配置目录的浏览器，归还时关闭。
+
+        同一配置目录同时只能被一个Chromium进程使用，因此这类浏览器不放回池中复用，
+        但同样占用池的并发名额。持久化上下文没有单独的浏览器对象，关闭上下文即关闭浏览器进程。
+
+        Args:
+            user_data_dir: Chromium配置目录
+            **context_options: 传给 launch_persistent_context 的参数
+
+        Yields:
+            BrowserLease: 浏览器默认上下文即持久化上下文
+        """
+        await self._ensure_started()
+        with self.metrics.phase("browser_wait"):
+            await self._semaphore.acquire()
+        try:
+            # 上次运行留下的端口文件会被误读为本次的端口
+            try:
+                os.remove(os.path.join(user_data_dir, DEVTOOLS_PORT_FILE))
+            except FileNotFoundError:
+                pass
+            started = time.perf_counter()
+            with self.metrics.phase("browser_launch"):
+                context = await self._playwright.chromium.launch_persistent_context(
+                    user_data_dir,
+                    headless=self.headless,
+                    args=["--remote-debugging-port=0"],
+                    **context_options
+                )
+                try:
+                    port = await _read_devtools_port(user_data_dir)
+                except BaseException:
+                    await context.close()
+                    raise
+            self.metrics.observe("browser_launch_seconds", time.perf_counter() - started)
+            self._launched += 1
+            self._leases += 1
+            self._in_use += 1
+            lease = BrowserLease(context, f"http://127.0.0.1:{port}", self._playwright)
+            try:
+                yield lease
+            finally:
+                # 关闭CDP连接和持久化上下文，上下文关闭即结束该浏览器进程
+                try:
+                    await lease.release()
+                except Exception as e:
+                    self.logger.debug(f"关闭持久化浏览器失败：{str(e)}")
+                self._in_use -= 1
+                self._recycled += 1
+        finally:
+            self._semaphore.release()
+
+    async def close(self) -> None:
+        """关闭池中全部浏览器并停止Playwright。"""
+        self._closed = True
+
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._close_browser(pooled)
+
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def stats(self) -> Dict[str, int]:
+        """获取浏览器池统计信息。
+
+        Returns:
+            Dict[str, int]: 启动、回收、空闲关闭次数以及当前使用情况
+        """
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "leases": self._leases,
+            "launched": self._launched,
+            "recycled": self._recycled,
+            "idle_closed": self._idle_closed,
+            "spare_hits": self._spare_hits,
+        }
+
+    async def _ensure_started(self) -> None:
+        if self._closed:
+            raise RuntimeError("浏览器池已关闭")
+        if self._playwright is None:
+            await self.start(warm=self.warm)
+
+    async def _checkout(self) -> PooledBrowser:
+        """取出一个可用浏览器，没有空闲浏览器时启动新的。"""
+        while self._idle:
+            pooled = self._idle.pop()
+            if pooled.is_connected():
+                break
+            await self._close_browser(pooled)
+        else:
+            pooled = await self._launch()
+
+        self._in_use += 1
+        self._leases += 1
+        pooled.uses += 1
+        return pooled
+
+    async def _checkin(self, pooled: PooledBrowser, discard: bool = False) -> None:
+        """归还浏览器，超过使用次数或已被污染的浏览器直接关闭。"""
+        self._in_use -= 1
+        pooled.last_used = time.monotonic()
+
+        if self._closed or discard or not pooled.is_connected() or pooled.uses >= self.max_uses:
+            self._recycled += 1
+            await self._close_browser(pooled)
+            return
+
+        self._prepare_spare(pooled)
+        self._idle.append(pooled)
+
+    def _prepare_spare(self, pooled: PooledBrowser) -> None:
+        """在后台为空闲浏览器预先创建一个上下文。"""
+        if self.context_options is None or pooled.spare is not None:
+            return
+        pooled.spare = asyncio.ensure_future(pooled.browser.new_context(**self.context_options))
+
+    async def _take_spare(self, pooled: PooledBrowser, context_options: Dict[str, Any]) -> Any:
+        """取出预先创建的上下文，参数不同或创建失败时返回None。"""
+        if pooled.spare is None or context_options != self.context_options:
+            return None
+        task, pooled.spare = pooled.spare, None
+        try:
+            context = await task
+        except Exception as e:
+            self.logger.debug(f"预先创建浏览器上下文失败：{str(e)}")
+            return None
+        self._spare_hits += 1
+        return context
+
+    async def _launch(self) -> PooledBrowser:
+        started = time.perf_counter()
+        with self.metrics.phase("browser_launch"):
+            browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=["--remote-debugging-port=0"]
+            )
+            try:
+                port = await _read_devtools_port(await _browser_user_data_dir(browser))
+            except BaseException:
+                await browser.close()
+                raise
+        self.metrics.observe("browser_launch_seconds", time.perf_counter() - started)
+        self._launched += 1
+        self.logger.debug(f"浏览器池启动新浏览器，调试端口：{port}")
+        return PooledBrowser(browser, f"http://127.0.0.1:{port}")
+
+    async def _close_browser(self, pooled: PooledBrowser) -> None:
+        # 关闭浏览器时其上下文一并关闭，只需结束尚未完成的创建任务
+        if pooled.spare is not None:
+            pooled.spare.cancel()
+            await asyncio.gather(pooled.spare, return_exceptions=True)
+            pooled.spare = None
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            self.logger.debug(f"关闭浏览器失败：{str(e)}")
+
+    async def _reap_loop(self) -> None:
+        """定期关闭空闲时间超过 idle_timeout 的浏览器。"""
+        interval = max(self.idle_timeout / 2, 1)
+        while True:
+            await asyncio.sleep(interval)
+            await self.reap_idle()
+
+    async def reap_idle(self) -> int:
+        """关闭空闲过久的浏览器。
+
+        Returns:
+            int: 关闭的浏览器数量
+        """
+        now = time.monotonic()
+        expired = [p for p in self._idle if now - p.last_used >= self.idle_timeout]
+        self._idle = [p for p in self._idle if p not in expired]
+        for pooled in expired:
+            await self._close_browser(pooled)
+        self._idle_closed += len(expired)
+        return len(expired)
@@ -1,7 +1,7 @@
 """Pinterest登录工具配置文件。"""
 
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
 class PinterestConfig:
@@ -28,6 +28,66 @@ class PinterestConfig:
         )
     }
     
+    # 浏览器池配置
+    BROWSER_POOL_CONFIG = {
+        "size": 2,              # 同时存在的浏览器数量上限
+        "idle_timeout": 300,    # 空闲多久后关闭浏览器（秒）
+        "max_uses": 50,         # 每个浏览器最多使用次数，之后重新启动
+        "warm": 1               # 首次使用或 warm_up() 时预启动的浏览器数量
+    }
+    
+    # 共享LLM客户端配置
+    LLM_CLIENT_CONFIG = {
+        "model": "gpt-4o-mini",
+        "temperature": 0.1,
+        "max_concurrency": 8,              # 同时进行的LLM请求数上限
+        "max_connections": 16,             # HTTP连接池大小
+        "max_keepalive_connections": 8,
+        "keepalive_expiry": 60,            # 空闲连接保留时间（秒）
+        "timeout": 60                      # 单次请求超时（秒）
+    }
+    
+    # 登录期间拦截的请求：登录只需要HTML表单和页面脚本
+    REQUEST_FILTER_CONFIG = {
+        "enabled": True,
+        "blocked_resource_types": ["image", "media", "font"],
+        "blocked_domains": [
+            "ct.pinterest.com",          # Pinterest转化追踪
+            "google-analytics.com",
+            "googletagmanager.com",
+            "doubleclick.net",
+            "connect.facebook.net",
+            "bat.bing.com",
+            "hotjar.com",
+            "sentry.io",
+        ]
+    }
+    
+    # 登录节奏控制：每个出口（IP或代理）的令牌桶按登录结果自适应调整速率
+    RATE_LIMIT_CONFIG = {
+        "enabled": True,
+        "rate": 1.0,                # 每个出口的初始登录速率（次/秒）
+        "burst": 4,                 # 空闲后允许的突发登录数
+        "min_rate": 0.05,
+        "max_rate": 5.0,
+        "account_interval": 10,     # 同一账号两次登录之间的平均间隔（秒）
+        "account_burst": 2,         # 同一账号允许连续进行的登录数
+        "window": 20,               # 计算限流迹象比例的最近登录数
+        "min_samples": 5,
+        "backoff_threshold": 0.2,   # 超时、无法判定等结果的比例达到该值时降速
+        "decrease_factor": 0.5,
+        "increase_step": 0.05,      # 每次正常结果增加的速率（次/秒）
+        "cooldown": 30              # 两次降速之间的最短间隔（秒）
+    }
+    
+    # 按失败类别的重试策略：只重试短暂性错误，退避上限为 min(max_delay, base_delay * 2^(n-1)) 秒，
+    # 实际等待在0到上限之间随机；未列出的类别（密码错误、验证挑战、超时等）不重试
+    RETRY_POLICIES = {
+        "network": {"max_retries": 3, "base_delay": 1, "max_delay": 30},
+        "llm_provider": {"max_retries": 3, "base_delay": 2, "max_delay": 60},
+        "page_error": {"max_retries": 2, "base_delay": 5, "max_delay": 30}
+    }
+    
     # 登录相关的CSS选择器和XPath
     SELECTORS = {
         "login_button": "button[data-test-id='registerFormSubmitButton'], a[href='/login/']",
@@ -35,9 +95,114 @@ class PinterestConfig:
         "password_input": "input[id='password'], input[name='password'], input[type='password']",
         "submit_button": "button[type='submit'], button[data-test-id='registerFormSubmitButton']",
         "error_message": ".error, .errorMessage, [data-test-id='error']",
-        "success_indicator": "[data-test-id='header-profile'], .profileImage, .headerAvatar"
+        # 表单字段上的错误提示，只在凭据有误时出现
+        "credential_error": (
+            "#email-error, #password-error, [data-test-id='email-error'], [data-test-id='password-error']"
+        ),
+        "success_indicator": "[data-test-id='header-profile'], .profileImage, .headerAvatar",
+        "challenge_indicator": (
+            "iframe[title*='recaptcha challenge'], iframe[src*='hcaptcha.com'][src*='challenge'], "
+            "input[autocomplete='one-time-code'], [data-test-id='two-factor-auth']"
+        )
+    }
+    
+    # 脚本化登录等待表单元素出现的时间（秒）
+    SCRIPTED_ELEMENT_TIMEOUT = 10
+    
+    # 代理结束后在页面上确认登录结果的等待时间（秒）
+    AGENT_VERIFY_TIMEOUT = 5
+    
+    # 代理运行期间监视页面，能判定登录结果时立即停止代理
+    AGENT_EARLY_EXIT = True
+    AGENT_WATCH_INTERVAL = 0.5  # 秒
+    
+    # 会话缓存配置
+    SESSION_CACHE_TTL = 6 * 3600  # 秒
+    SESSION_CACHE_MAX_ENTRIES = 500
+    
+    # 不启动浏览器的会话检查：用缓存的cookies请求需要登录的接口
+    SESSION_PROBE_CONFIG = {
+        "endpoint": "https://www.pinterest.com/resource/UserSettingsResource/get/",
+        "concurrency": 100,             # 同时进行的检查数上限
+        "timeout": 10,                  # 单次请求超时（秒）
+        "max_connections": 100,
+        "max_keepalive_connections": 50,
+        "keepalive_expiry": 60,
+        # 重定向地址或错误信息中包含这些片段时判定为需要验证
+        "challenge_markers": ["challenge", "captcha", "two_factor", "unauth/verify"]
+    }
+    
+    # 会话缓存命中时先检查会话是否仍然有效，未通过的会话重新登录
+    SESSION_PROBE_ON_CACHE_HIT = False
+    
+    # 已确认密码错误的凭据缓存，有效期内同一组凭据直接返回失败
+    NEGATIVE_CACHE_TTL = 24 * 3600  # 秒
+    NEGATIVE_CACHE_MAX_ENTRIES = 10000
+    
+    # 页面错误信息中表示凭据有误的片段（小写）；其他错误信息（如“请稍后再试”）不视为密码错误
+    CREDENTIAL_ERROR_MARKERS = (
+        "password you entered is incorrect", "incorrect password", "wrong password",
+        "isn't connected to an account", "not connected to an account", "no account",
+        "密码不正确", "密码错误", "未关联任何帐户", "未关联任何账户", "账户不存在", "帐户不存在",
+    )
+    
+    # 工具调用结果的短期缓存：多个代理几秒内对同一账号调用工具时共用一次登录
+    RESULT_CACHE_TTL = 60  # 秒
+    RESULT_CACHE_MAX_ENTRIES = 1000
+    
+    # 按账号持久化的Chromium配置目录（user_data_dir），保存设备信任状态以减少验证和重新登录
+    PROFILE_CONFIG = {
+        "max_total_mb": 2048,     # 全部配置目录的磁盘上限，超出后按最近使用时间淘汰
+        "lock_timeout": 60,       # 等待同一账号的配置目录被释放的时间（秒）
+        # 每次使用后删除的缓存目录，cookies、Local Storage和IndexedDB保留
+        "prune_dirs": [
+            "Default/Cache",
+            "Default/Code Cache",
+            "Default/GPUCache",
+            "Default/Service Worker/CacheStorage",
+            "Default/Service Worker/ScriptCache",
+            "GrShaderCache",
+            "GraphiteDawnCache",
+            "ShaderCache",
+            "component_crx_cache",
+        ]
     }
     
+    # 代理模式：default 使用完整任务描述和截图；lean 使用简短任务、关闭截图、缩小视口，
+    # 并限制每步发送的DOM属性和历史条数，以减少每一步的token用量
+    AGENT_MODES = {
+        "default": {
+            "compact_task": False,
+            "max_steps": 25,
+            "viewport": DEFAULT_VIEWPORT,
+            "agent_options": {"use_vision": True}
+        },
+        "lean": {
+            "compact_task": True,
+            "max_steps": 8,
+            "viewport": {"width": 1024, "height": 768},
+            "agent_options": {
+                "use_vision": False,              # 需要截图时改为True，配合 vision_detail_level="low"
+                "vision_detail_level": "low",
+                "max_actions_per_step": 4,
+                "max_history_items": 6,
+                "include_attributes": ["id", "name", "type", "placeholder", "aria-label", "data-test-id"]
+            },
+            "session_options": {
+                "viewport_expansion": 0           # 只发送视口内的元素
+            }
+        }
+    }
+    
+    # 精简模式下密码通过browser-use的sensitive_data传入，LLM只看到这个占位名
+    SENSITIVE_PASSWORD_KEY = "x_password"
+    
+    # 精简模式的登录任务，每一步都会发送给LLM
+    LEAN_LOGIN_TASK_TEMPLATE = (
+        "登录Pinterest：打开 {login_url}，用户名：{username}，密码：{password_key}，提交表单。"
+        "出现用户头像或错误提示后立即done，success表示是否登录成功，失败时附上页面错误信息。"
+    )
+    
     # 登录任务模板
     LOGIN_TASK_TEMPLATE = """
     请帮我登录Pinterest网站，具体步骤如下：
@@ -78,6 +243,22 @@ class PinterestConfig:
             
         return config
     
+    @classmethod
+    def get_lean_login_task(cls, username: str) -> str:
+        """获取精简模式的登录任务描述，密码以 SENSITIVE_PASSWORD_KEY 占位。
+        
+        Args:
+            username: 用户名
+            
+        Returns:
+            str: 格式化的登录任务描述
+        """
+        return cls.LEAN_LOGIN_TASK_TEMPLATE.format(
+            login_url=cls.PINTEREST_LOGIN_URL,
+            username=username,
+            password_key=cls.SENSITIVE_PASSWORD_KEY
+        )
+    
     @classmethod
     def get_login_task(cls, username: str, password: str) -> str:
         """获取登录任务描述。
@@ -143,6 +324,24 @@ def get_openai_api_key() -> str:
     return api_key
 
 
+def get_openai_api_base() -> str:
+    """获取OpenAI兼容API的地址。
+    
+    Returns:
+        str: API地址
+    """
+    return os.getenv('OPENAI_API_BASE', 'https://api.apiyi.com/v1')
+
+
+def get_agent_mode() -> str:
+    """获取代理模式。
+    
+    Returns:
+        str: PinterestConfig.AGENT_MODES 中的模式名称
+    """
+    return os.getenv('PINTEREST_AGENT_MODE', 'default').lower()
+
+
 def get_debug_mode() -> bool:
     """获取调试模式设置。
     
@@ -150,3 +349,96 @@ def get_debug_mode() -> bool:
         bool: 是否启用调试模式
     """
     return os.getenv('PINTEREST_DEBUG', 'false').lower() in ('true', '1', 'yes')
+
+
+def get_session_cache_dir() -> str:
+    """获取会话缓存目录。
+    
+    Returns:
+        str: 缓存目录路径
+    """
+    return os.getenv(
+        'PINTEREST_SESSION_CACHE_DIR',
+        os.path.join(os.path.expanduser('~'), '.pinterest_login', 'sessions')
+    )
+
+
+def get_negative_cache_path() -> str:
+    """获取已确认密码错误的凭据缓存文件路径。
+    
+    Returns:
+        str: 缓存文件路径
+    """
+    return os.getenv(
+        'PINTEREST_NEGATIVE_CACHE_PATH',
+        os.path.join(os.path.expanduser('~'), '.pinterest_login', 'negative_cache.json')
+    )
+
+
+def get_history_path() -> Optional[str]:
+    """获取登录历史记录数据库路径。
+    
+    Returns:
+        Optional[str]: 数据库文件路径，未设置 PINTEREST_HISTORY_DB 时返回None，即不记录登录历史
+    """
+    return os.getenv('PINTEREST_HISTORY_DB') or None
+
+
+def get_profile_dir() -> Optional[str]:
+    """获取按账号持久化的浏览器配置目录的根目录。
+    
+    Returns:
+        Optional[str]: 根目录路径，未设置 PINTEREST_PROFILE_DIR 时返回None，即不使用持久化配置
+    """
+    return os.getenv('PINTEREST_PROFILE_DIR') or None
+
+
+def get_egress_id() -> str:
+    """获取本进程的出口标识，同一出口（IP或代理）的登录共享速率限制。
+    
+    Returns:
+        str: 出口标识
+    """
+    return os.getenv('PINTEREST_EGRESS_ID', 'default')
+
+
+def get_rate_limit_state_path() -> Optional[str]:
+    """获取出口限速的共享状态文件路径，同一台机器上使用同一文件的进程共用出口速率。
+    
+    Returns:
+        Optional[str]: 状态文件路径，PINTEREST_RATE_LIMIT_STATE 设为空字符串时返回None，即只在进程内限速
+    """
+    return os.getenv(
+        'PINTEREST_RATE_LIMIT_STATE',
+        os.path.join(os.path.expanduser('~'), '.pinterest_login', 'rate_limit.json')
+    ) or None
+
+
+def get_recipe_path() -> str:
+    """获取登录配方文件路径。
+    
+    Returns:
+        str: 配方文件路径
+    """
+    return os.getenv(
+        'PINTEREST_RECIPE_PATH',
+        os.path.join(os.path.expanduser('~'), '.pinterest_login', 'login_recipe.json')
+    )
+
+
+def get_metrics_enabled() -> bool:
+    """获取是否记录登录指标。
+    
+    Returns:
+        bool: 是否启用指标
+    """
+    return os.getenv('PINTEREST_METRICS', 'false').lower() in ('true', '1', 'yes')
+
+
+def get_tracing_enabled() -> bool:
+    """获取是否为登录阶段创建OpenTelemetry span。
+    
+    Returns:
+        bool: 是否启用追踪
+    """
+    return os.getenv('PINTEREST_TRACING', 'false').lower() in ('true', '1', 'yes')
@@ -0,0 +1,140 @@
+"""单次登录的进度跟踪，用于在超过时间上限时报告停在哪个阶段。
+
+alogin() 为每次登录创建一个 LoginProgress 并放入上下文变量；
+LoginMetrics.phase() 进入阶段时通过 note_phase() 更新当前阶段，
+因此无论指标是否开启，超时结果都能说明是启动浏览器、代理执行还是结果验证耗尽了时间。
+
+QueueClock 记录在限速器中排队等待的累计时间，外层的时间上限（如批量登录中单个账号的上限）据此扣除排队时间。
+LoginDeadline 是一次 alogin() 的总时间上限，所有重试尝试和重试前的等待共用同一个上限。
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+
+class LoginProgress:
+    """一次登录的当前阶段和各登录方式的耗时。"""
+
+    __slots__ = ("phase", "phase_timings", "_method", "_method_started")
+
+    def __init__(self):
+        self.phase = ""
+        self.phase_timings: Dict[str, float] = {}
+        self._method: Optional[str] = None
+        self._method_started = 0.0
+
+    def begin(self, method: str) -> None:
+        """开始一种登录方式（scripted / recipe / agent）。"""
+        self._method = method
+        self._method_started = time.monotonic()
+        self.phase = method
+
+    def end(self) -> None:
+        """结束当前登录方式并记录其耗时。"""
+        if self._method is not None:
+            self.phase_timings[self._method] = time.monotonic() - self._method_started
+            self._method = None
+
+    def snapshot(self) -> Dict[str, float]:
+        """各登录方式的耗时，包括尚未结束的那一种。"""
+        timings = dict(self.phase_timings)
+        if self._method is not None:
+            timings[self._method] = time.monotonic() - self._method_started
+        return timings
+
+
+# 子任务创建时复制上下文，引用的是同一个 LoginProgress，代理和监视任务中的阶段同样可见
+_current_progress: ContextVar[Optional[LoginProgress]] = ContextVar(
+    "pinterest_login_progress", default=None
+)
+
+
+def current_progress() -> Optional[LoginProgress]:
+    """当前登录的进度，不在登录流程中时返回None。"""
+    return _current_progress.get()
+
+
+def set_progress(progress: Optional[LoginProgress]) -> object:
+    """设置当前登录的进度，返回用于 reset_progress() 的令牌。"""
+    return _current_progress.set(progress)
+
+
+def reset_progress(token: object) -> None:
+    """恢复 set_progress() 之前的进度。"""
+    _current_progress.reset(token)
+
+
+def note_phase(name: str) -> None:
+    """记录当前登录进入的阶段。"""
+    progress = _current_progress.get()
+    if progress is not None:
+        progress.phase = name
+
+
+class QueueClock:
+    """一次登录在账号和出口令牌桶中排队等待的累计时间。"""
+
+    __slots__ = ("_total", "_since")
+
+    def __init__(self):
+        self._total = 0.0
+        self._since: Optional[float] = None
+
+    def enter(self) -> None:
+        """开始排队。"""
+        self._since = time.monotonic()
+
+    def exit(self) -> None:
+        """结束排队。"""
+        if self._since is not None:
+            self._total += time.monotonic() - self._since
+            self._since = None
+
+    def waited(self) -> float:
+        """累计排队时间（秒），包括正在进行的排队。"""
+        if self._since is None:
+            return self._total
+        return self._total + time.monotonic() - self._since
+
+
+_current_queue_clock: ContextVar[Optional[QueueClock]] = ContextVar(
+    "pinterest_login_queue_clock", default=None
+)
+
+
+def current_queue_clock() -> Optional[QueueClock]:
+    """当前登录的排队计时，外层未设置时返回None。"""
+    return _current_queue_clock.get()
+
+
+def set_queue_clock(clock: Optional[QueueClock]) -> object:
+    """设置当前登录的排队计时，返回用于 reset_queue_clock() 的令牌。"""
+    return _current_queue_clock.set(clock)
+
+
+def reset_queue_clock(token: object) -> None:
+    """恢复 set_queue_clock() 之前的排队计时。"""
+    _current_queue_clock.reset(token)
+
+
+class LoginDeadline:
+    """一次登录的总时间上限，不计在限速器中排队的时间。
+
+    Args:
+        timeout: 时间上限（秒）
+        clock: 记录排队时间的 QueueClock
+    """
+
+    __slots__ = ("timeout", "_clock", "_started", "_queued")
+
+    def __init__(self, timeout: float, clock: QueueClock):
+        self.timeout = timeout
+        self._clock = clock
+        self._started = time.monotonic()
+        self._queued = clock.waited()
+
+    def remaining(self) -> float:
+        """剩余时间（秒），已超过上限时为0或负数。"""
+        elapsed = time.monotonic() - self._started - (self._clock.waited() - self._queued)
+        return self.timeout - elapsed
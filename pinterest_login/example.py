@@ -23,7 +23,7 @@ async def main():
     
     # 示例1：基本登录
     print("=== 示例1：基本登录 ===")
-    result1 = pinterest_tool._run(
+    result1 = await pinterest_tool.alogin(
         username="your_username@email.com",  # 替换为实际的用户名
         password="your_password",            # 替换为实际的密码
         headless=True,                       # 无头模式
@@ -33,13 +33,16 @@ async def main():
     
     # 示例2：有头模式登录（可以看到浏览器界面）
     print("\n=== 示例2：有头模式登录 ===")
-    result2 = pinterest_tool._run(
+    result2 = await pinterest_tool.alogin(
         username="your_username@email.com",  # 替换为实际的用户名
         password="your_password",            # 替换为实际的密码
         headless=False,                      # 有头模式，可以看到浏览器
         timeout=60                           # 60秒超时
     )
     print(f"登录结果2：{result2}")
+    
+    # 释放浏览器池
+    await pinterest_tool.close()
 
 
 def crewai_example():
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""登录历史记录与统计查询。
+
+每次登录的结果（账号、时间、状态、方式、耗时等，不含密码）写入SQLite，用于观察成功率和耗时的变化趋势。
+record() 只把记录放入内存队列，由后台线程批量写入，不阻塞登录流程；队列已满时丢弃记录并计数。
+表按账号、时间和状态建立索引，提供耗时分位数、按时间窗口的成功率和各账号最近一次成功时间的查询。
+
+用法：
+    python history_store.py report --db history.db --since 24h --window 1h
+    python history_store.py report --db history.db --json
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from login_result import LoginStatus
+
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS logins (
+        id INTEGER PRIMARY KEY,
+        ts REAL NOT NULL,
+        account TEXT NOT NULL,
+        status TEXT NOT NULL,
+        failure_category TEXT,
+        method TEXT,
+        agent_mode TEXT,
+        elapsed REAL NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 1,
+        llm_steps INTEGER NOT NULL DEFAULT 0,
+        llm_tokens INTEGER NOT NULL DEFAULT 0,
+        from_cache INTEGER NOT NULL DEFAULT 0,
+        timeout_phase TEXT
+    );
+    CREATE INDEX IF NOT EXISTS logins_ts ON logins (ts);
+    CREATE INDEX IF NOT EXISTS logins_status_ts ON logins (status, ts);
+    CREATE INDEX IF NOT EXISTS logins_account_status_ts ON logins (account, status, ts);
+"""
+
+_COLUMNS = (
+    "ts", "account", "status", "failure_category", "method", "agent_mode", "elapsed",
+    "attempts", "llm_steps", "llm_tokens", "from_cache", "timeout_phase"
+)
+
+# 后台线程退出的标记
+_STOP = object()
+
+
+class LoginHistoryStore:
+    """登录历史记录。
+
+    Args:
+        path: SQLite数据库文件路径
+        batch_size: 每次事务最多写入的记录数
+        flush_interval: 队列中有记录时最长多久写入一次（秒）
+        max_queue: 内存队列容量，写入跟不上时超出的记录被丢弃
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0, max_queue: int = 10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._written = 0
+        self._dropped = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600))
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def record(self, result: Any, timestamp: Optional[float] = None) -> bool:
+        """记录一次登录结果，不等待写入。
+
+        Args:
+            result: LoginResult
+            timestamp: 登录完成的时间戳，默认当前时间
+
+        Returns:
+            bool: 是否放入了写入队列
+        """
+        status = getattr(result, "status", None)
+        if status is None:
+            return False
+        row = (
+            time.time() if timestamp is None else timestamp,
+            result.username.strip().lower(),
+            status.value,
+            result.failure_category.value if result.failure_category else None,
+            result.method or None,
+            result.agent_mode or None,
+            result.elapsed,
+            getattr(result, "attempts", 1),
+            result.llm_steps,
+            result.llm_tokens,
+            int(result.from_cache),
+            getattr(result, "timeout_phase", "") or None,
+        )
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        return True
+
+    def flush(self) -> None:
+        """等待已放入队列的记录全部写入。"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """写入剩余记录并停止后台线程。"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(_STOP)
+            writer.join()
+
+    def stats(self) -> Dict[str, int]:
+        """获取写入统计。
+
+        Returns:
+            Dict[str, int]: 已写入、丢弃和等待写入的记录数
+        """
+        with self._lock:
+            return {"written": self._written, "dropped": self._dropped, "pending": self._queue.qsize()}
+
+    def latency_percentiles(
+        self,
+        percentiles: Sequence[float] = (50, 95),
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        account: Optional[str] = None,
+        include_cache: bool = False
+    ) -> Dict[str, Any]:
+        """登录耗时的分位数（最近秩法）。
+
+        Args:
+            percentiles: 分位数，0-100
+            since: 起始时间戳
+            until: 结束时间戳
+            account: 只统计该账号
+            include_cache: 是否包括直接使用缓存的结果，默认不包括，以免拉低耗时
+
+        Returns:
+            Dict[str, Any]: {"count": 记录数, "p50": 秒, "p95": 秒, ...}，没有记录时分位数为None
+        """
+        where, params = self._filters(since, until, account, include_cache)
+        with closing(self._connect()) as conn:
+            # 一次取出排好序的耗时，所有分位数在同一份结果上计算
+            values = [row[0] for row in conn.execute(f"SELECT elapsed FROM logins {where} ORDER BY elapsed", params)]
+        count = len(values)
+        summary: Dict[str, Any] = {"count": count}
+        for percentile in percentiles:
+            value = None
+            if count:
+                # 最近秩：第 ceil(p/100 * n) 个值
+                rank = max(1, -(-percentile * count // 100))
+                value = values[min(int(rank), count) - 1]
+            summary[f"p{_format_percentile(percentile)}"] = value
+        return summary
+
+    def success_rate(
+        self,
+        window: float = 3600,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        account: Optional[str] = None,
+        include_cache: bool = False
+    ) -> List[Dict[str, Any]]:
+        """按时间窗口统计成功率。
+
+        Args:
+            window: 窗口长度（秒）
+            since: 起始时间戳
+            until: 结束时间戳
+            account: 只统计该账号
+            include_cache: 是否包括直接使用缓存的结果
+
+        Returns:
+            List[Dict[str, Any]]: 按时间排序的窗口，每项包含 start、total、success、rate
+        """
+        where, params = self._filters(since, until, account, include_cache)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT CAST(ts / ? AS INTEGER) AS bucket, COUNT(*), SUM(status = ?) FROM logins {where} "
+                "GROUP BY bucket ORDER BY bucket",
+                (window, LoginStatus.SUCCESS.value) + params
+            ).fetchall()
+        return [
+            {"start": bucket * window, "total": total, "success": success, "rate": success / total}
+            for bucket, total, success in rows
+        ]
+
+    def last_success(self, account: Optional[str] = None) -> Dict[str, float]:
+        """各账号最近一次登录成功的时间戳。
+
+        Args:
+            account: 只查询该账号
+
+        Returns:
+            Dict[str, float]: 账号 -> 时间戳，从未成功的账号不在其中
+        """
+        sql = "SELECT account, MAX(ts) FROM logins WHERE status = ?"
+        params: Tuple[Any, ...] = (LoginStatus.SUCCESS.value,)
+        if account is not None:
+            sql += " AND account = ?"
+            params += (account.strip().lower(),)
+        with closing(self._connect()) as conn:
+            return dict(conn.execute(f"{sql} GROUP BY account", params).fetchall())
+
+    def _filters(
+        self,
+        since: Optional[float],
+        until: Optional[float],
+        account: Optional[str],
+        include_cache: bool
+    ) -> Tuple[str, Tuple[Any, ...]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if account is not None:
+            clauses.append("account = ?")
+            params.append(account.strip().lower())
+        if not include_cache:
+            clauses.append("from_cache = 0")
+        return ("WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="login-history-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+
+    def _write_loop(self) -> None:
+        """后台线程：攒够一批或等待 flush_interval 后在一个事务中写入。"""
+        conn = self._connect()
+        conn.execute("PRAGMA synchronous=NORMAL")
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        sql = f"INSERT INTO logins ({', '.join(_COLUMNS)}) VALUES ({placeholders})"
+        stopping = False
+        try:
+            while not stopping:
+                item = self._queue.get()
+                batch: List[Any] = []
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                    else:
+                        batch.append(item)
+                    if stopping or len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    try:
+                        with conn:
+                            conn.executemany(sql, batch)
+                        with self._lock:
+                            self._written += len(batch)
+                    except sqlite3.Error as e:
+                        self.logger.warning(f"写入登录历史失败，丢弃{len(batch)}条记录：{e}")
+                        with self._lock:
+                            self._dropped += len(batch)
+                for _ in range(len(batch) + (1 if stopping else 0)):
+                    self._queue.task_done()
+        finally:
+            conn.close()
+
+
+def _format_percentile(percentile: float) -> str:
+    return str(int(percentile)) if float(percentile).is_integer() else str(percentile).replace(".", "_")
+
+
+def _parse_duration(text: str) -> float:
+    """解析 30m、24h、7d 这样的时长，返回秒数。"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def _format_time(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
+
+def main() -> int:
+    """主函数。"""
+    parser = argparse.ArgumentParser(description="Pinterest登录历史统计")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report_parser = subparsers.add_parser("report", help="输出成功率、耗时分位数和各账号最近成功时间")
+    report_parser.add_argument("--db", default=os.getenv("PINTEREST_HISTORY_DB"), help="历史记录数据库文件")
+    report_parser.add_argument("--since", default="24h", help="统计最近多长时间，如 30m、24h、7d")
+    report_parser.add_argument("--window", default="1h", help="成功率的时间窗口")
+    report_parser.add_argument("--account", help="只统计该账号")
+    report_parser.add_argument("--include-cache", action="store_true", help="包括直接使用缓存的结果")
+    report_parser.add_argument("--json", action="store_true", help="以JSON输出")
+    args = parser.parse_args()
+
+    if not args.db or not os.path.exists(args.db):
+        print("❌ 历史记录数据库不存在，请通过 --db 或 PINTEREST_HISTORY_DB 指定", file=sys.stderr)
+        return 2
+
+    store = LoginHistoryStore(args.db)
+    since = time.time() - _parse_duration(args.since)
+    options = {"since": since, "account": args.account, "include_cache": args.include_cache}
+    report = {
+        "latency": store.latency_percentiles((50, 95, 99), **options),
+        "success_rate": store.success_rate(_parse_duration(args.window), **options),
+        "last_success": store.last_success(args.account),
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    latency = report["latency"]
+    print(f"最近{args.since}共{latency['count']}次登录")
+    if latency["count"]:
+        print("耗时：" + "，".join(f"{name} {latency[name]:.2f}秒" for name in ("p50", "p95", "p99")))
+    print("\n时间窗口            登录数  成功数  成功率")
+    for bucket in report["success_rate"]:
+        print(f"{_format_time(bucket['start'])}  {bucket['total']:>6}  {bucket['success']:>6}  {bucket['rate']:>6.1%}")
+    print("\n账号最近一次成功")
+    for account, timestamp in sorted(report["last_success"].items(), key=lambda item: item[1]):
+        print(f"{_format_time(timestamp)}  {account}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""进程内共享的LLM客户端。
+
+同一 (model, base_url, api_key) 的代理共用一个 ChatOpenAI 和一个支持keep-alive的
+httpx连接池，避免每次登录重新建立TLS连接；安装了h2时启用HTTP/2。
+httpx的连接绑定在创建它的事件循环上，因此客户端按事件循环分别创建。
+同时进行的LLM请求数由信号量限制。
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import PinterestConfig, get_openai_api_base
+from metrics import LoginMetrics, get_metrics
+
+
+def http2_available() -> bool:
+    """是否安装了h2，安装后httpx连接才能使用HTTP/2。"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _key_fingerprint(api_key: str) -> str:
+    """API密钥的摘要，注册表和统计信息中不保存密钥原文。"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+class LLMClientStats:
+    """一个共享LLM客户端的使用情况。"""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.queued = 0
+        self.wait_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "max_concurrency": self.max_concurrency,
+            "utilization": self.in_flight / self.max_concurrency,
+            "queued": self.queued,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
+
+
+class SharedChatModel:
+    """限制并发的LLM包装，其余属性转发给被包装的模型。
+
+    Args:
+        llm: browser-use聊天模型
+        max_concurrency: 同时进行的请求数上限
+        metrics: 记录等待时间和请求数的指标对象
+    """
+
+    def __init__(self, llm: Any, max_concurrency: int, metrics: LoginMetrics):
+        self._llm = llm
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._metrics = metrics
+        self.stats = LLMClientStats(max_concurrency)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "_llm":
+            raise AttributeError(name)
+        return getattr(self._llm, name)
+
+    async def ainvoke(self, messages: List[Any], output_format: Any = None, **kwargs: Any) -> Any:
+        stats = self.stats
+        started = time.perf_counter()
+        if self._semaphore.locked():
+            stats.queued += 1
+        async with self._semaphore:
+            waited = time.perf_counter() - started
+            stats.wait_seconds += waited
+            stats.calls += 1
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+            self._metrics.observe("llm_wait_seconds", waited)
+            try:
+                return await self._llm.ainvoke(messages, output_format, **kwargs)
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                stats.in_flight -= 1
+
+
+def _create_chat_openai(model: str, base_url: str, api_key: str, http_client: Any, **options: Any) -> Any:
+    from browser_use.llm import ChatOpenAI
+
+    return ChatOpenAI(model=model, base_url=base_url, api_key=api_key, http_client=http_client, **options)
+
+
+class LLMClientRegistry:
+    """按 (model, base_url, api_key, 事件循环) 缓存的共享LLM客户端。
+
+    Args:
+        config: 覆盖 PinterestConfig.LLM_CLIENT_CONFIG 的配置项
+        llm_factory: 创建聊天模型的函数，参数为 (model, base_url, api_key, http_client, **options)
+        metrics: 指标对象，默认使用 get_metrics()
+    """
+
+    def __init__(
+        self,
+        config: Optional[Dict[str, Any]] = None,
+        llm_factory: Callable[..., Any] = _create_chat_openai,
+        metrics: Optional[LoginMetrics] = None
+    ):
+        self.config = PinterestConfig.LLM_CLIENT_CONFIG.copy()
+        self.config.update(config or {})
+        self.llm_factory = llm_factory
+        self.metrics = metrics or get_metrics()
+        self.http2 = http2_available()
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, str, str, int], Tuple[asyncio.AbstractEventLoop, SharedChatModel, Any]] = {}
+        self._created = 0
+
+    def get(self, api_key: str, model: Optional[str] = None, base_url: Optional[str] = None) -> SharedChatModel:
+        """获取当前事件循环中的共享LLM客户端，不存在时创建。
+
+        Args:
+            api_key: API密钥
+            model: 模型名称，默认使用配置中的 model
+            base_url: API地址，默认使用 get_openai_api_base()
+
+        Returns:
+            SharedChatModel: 共享的聊天模型
+        """
+        model = model or self.config["model"]
+        base_url = base_url or get_openai_api_base()
+        loop = asyncio.get_running_loop()
+        key = (model, base_url, _key_fingerprint(api_key), id(loop))
+
+        with self._lock:
+            self._drop_closed_loops()
+            entry = self._clients.get(key)
+            if entry is not None and entry[0] is loop:
+                return entry[1]
+
+            http_client = self._create_http_client()
+            llm = self.llm_factory(
+                model, base_url, api_key, http_client, temperature=self.config["temperature"]
+            )
+            shared = SharedChatModel(llm, self.config["max_concurrency"], self.metrics)
+            self._clients[key] = (loop, shared, http_client)
+            self._created += 1
+            self.logger.debug(f"创建共享LLM客户端：{model} @ {base_url}，HTTP/2：{self.http2}")
+            return shared
+
+    def stats(self) -> Dict[str, Any]:
+        """获取各共享客户端的使用情况。
+
+        Returns:
+            Dict[str, Any]: 创建次数、HTTP/2是否启用，以及每个客户端的调用和并发统计
+        """
+        with self._lock:
+            entries = list(self._clients.items())
+        clients = []
+        for (model, base_url, fingerprint, _), (loop, shared, http_client) in entries:
+            clients.append({
+                "model": model,
+                "base_url": base_url,
+                "api_key": fingerprint,
+                "loop_closed": loop.is_closed(),
+                "connections": _connection_count(http_client),
+                **shared.stats.to_dict(),
+            })
+        return {"created": self._created, "http2": self.http2, "clients": clients}
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环中创建的全部HTTP连接池。"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            keys = [key for key, entry in self._clients.items() if entry[0] is loop]
+            entries = [self._clients.pop(key) for key in keys]
+        for _, _, http_client in entries:
+            await http_client.aclose()
+
+    def _create_http_client(self) -> Any:
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=self.config["max_connections"],
+            max_keepalive_connections=self.config["max_keepalive_connections"],
+            keepalive_expiry=self.config["keepalive_expiry"]
+        )
+        return httpx.AsyncClient(limits=limits, timeout=self.config["timeout"], http2=self.http2)
+
+    def _drop_closed_loops(self) -> None:
+        # 事件循环结束后其连接已不可用，直接丢弃
+        for key in [key for key, entry in self._clients.items() if entry[0].is_closed()]:
+            del self._clients[key]
+
+
+def _connection_count(http_client: Any) -> Optional[int]:
+    """httpx连接池中的连接数，无法读取时返回None。"""
+    pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    return len(connections) if connections is not None else None
+
+
+_default_registry: Optional[LLMClientRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_llm_registry() -> LLMClientRegistry:
+    """获取进程内默认的LLM客户端注册表。"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = LLMClientRegistry()
+        return _default_registry
@@ -0,0 +1,999 @@
+"""Pinterest登录核心流程，不依赖CrewAI。
+
+PinterestLoginClient 是普通Python入口，适合命令行脚本和工作进程；
+CrewAI工具 PinterestLoginTool 复用同一套登录流程。
+browser-use、Playwright和LLM客户端都在第一次使用时才导入。
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from config import (
+    PinterestConfig, get_agent_mode, get_egress_id, get_openai_api_key, get_debug_mode, get_history_path,
+    get_negative_cache_path, get_profile_dir, get_rate_limit_state_path, get_recipe_path, get_session_cache_dir
+)
+from background_loop import BackgroundEventLoop
+from batch_login import BatchLoginResult, Credential, login_concurrently
+from browser_pool import BrowserLease, BrowserPool
+from deadline import (
+    LoginDeadline, LoginProgress, QueueClock, current_progress, current_queue_clock,
+    reset_progress, reset_queue_clock, set_progress, set_queue_clock
+)
+from history_store import LoginHistoryStore
+from login_recipe import LoginRecipe, RecipeReplayError, RecipeStore
+from llm_registry import LLMClientRegistry, get_llm_registry
+from login_result import FailureCategory, LoginResult, LoginStatus
+from metrics import LoginMetrics, get_metrics
+from negative_cache import NegativeCache
+from profile_manager import ProfileManager
+from rate_limiter import AdaptiveRateLimiter
+from request_filter import RequestFilter
+from retry_policy import RetryPolicy, classify_exception, classify_message
+from scripted_login import LoginChallengeError, LoginLayoutError, LoginPageError, ScriptedLoginEngine
+from session_cache import SessionCache
+from session_probe import ProbeResult, SessionProbe
+
+
+def _agent_usage(history: Any) -> Tuple[int, int]:
+    """从代理执行历史中读取步数和token用量。"""
+    number_of_steps = getattr(history, "number_of_steps", None)
+    steps = number_of_steps() if callable(number_of_steps) else len(getattr(history, "history", []) or [])
+    
+    usage = getattr(history, "usage", None)
+    tokens = getattr(usage, "total_tokens", None)
+    if tokens is None:
+        total_input_tokens = getattr(history, "total_input_tokens", None)
+        tokens = total_input_tokens() if callable(total_input_tokens) else 0
+    return int(steps or 0), int(tokens or 0)
+
+
+def _agent_history(agent: Any) -> Any:
+    """读取被取消的代理到目前为止的执行历史。"""
+    history = getattr(agent, "history", None)
+    if history is None:
+        history = getattr(getattr(agent, "state", None), "history", None)
+    return history
+
+
+def _supported_options(target: Any, options: Dict[str, Any]) -> Dict[str, Any]:
+    """只保留 target 构造函数接受的参数，不同版本的browser-use支持的选项不完全相同。"""
+    try:
+        parameters = inspect.signature(target).parameters
+    except (TypeError, ValueError):
+        return dict(options)
+    if any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters.values()):
+        return dict(options)
+    return {name: value for name, value in options.items() if name in parameters}
+
+
+def _agent_error_category(history: Any) -> Optional[FailureCategory]:
+    """根据代理执行历史中记录的错误判断是否为网络或LLM服务错误，取最后一个能识别的错误。"""
+    errors = getattr(history, "errors", None)
+    for error in reversed(list((errors() if callable(errors) else None) or [])):
+        category = classify_message(error) if isinstance(error, str) else None
+        if category is not None:
+            return category
+    return None
+
+
+def _agent_step_durations(history: Any) -> List[float]:
+    """从代理执行历史中读取每一步（一次LLM调用及其动作）的耗时。"""
+    durations = []
+    for item in getattr(history, "history", None) or []:
+        duration = getattr(getattr(item, "metadata", None), "duration_seconds", None)
+        if isinstance(duration, (int, float)):
+            durations.append(float(duration))
+    return durations
+
+
+class PinterestLoginCore:
+    """Pinterest登录流程：会话缓存、脚本化登录、配方回放和browser-use代理。
+    
+    同时被普通类和pydantic模型（CrewAI工具）继承，
+    因此实例属性统一通过 object.__setattr__ 设置。
+    """
+    
+    def _init_login_core(
+        self,
+        openai_api_key: Optional[str] = None,
+        session_cache: Optional[SessionCache] = None,
+        browser_pool_config: Optional[Dict[str, Any]] = None,
+        recipe_store: Optional[RecipeStore] = None,
+        metrics: Optional[LoginMetrics] = None,
+        request_filter: Optional[RequestFilter] = None,
+        llm_registry: Optional[LLMClientRegistry] = None,
+        agent_mode: Optional[str] = None,
+        profile_manager: Optional[ProfileManager] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        session_probe: Optional[SessionProbe] = None,
+        history_store: Optional[LoginHistoryStore] = None
+    ) -> None:
+        """初始化登录所需的状态。
+        
+        Args:
+            openai_api_key: OpenAI API密钥，用于browser-use库的AI功能
+            session_cache: 会话缓存，默认使用磁盘缓存目录
+            browser_pool_config: 浏览器池配置，默认使用 PinterestConfig.BROWSER_POOL_CONFIG
+            recipe_store: 登录配方存储，默认使用 get_recipe_path() 指定的文件
+            metrics: 各阶段耗时和代理用量的指标对象，默认使用 get_metrics()
+            request_filter: 登录期间的请求拦截器，默认按 PinterestConfig.REQUEST_FILTER_CONFIG 创建
+            llm_registry: 共享LLM客户端注册表，默认使用进程内的 get_llm_registry()
+            agent_mode: 代理模式，PinterestConfig.AGENT_MODES 中的名称，默认由 PINTEREST_AGENT_MODE 决定
+            profile_manager: 按账号持久化的浏览器配置目录，默认在设置了 PINTEREST_PROFILE_DIR 时启用
+            rate_limiter: 登录节奏控制，默认按 PinterestConfig.RATE_LIMIT_CONFIG 创建，
+                出口速率通过 get_rate_limit_state_path() 指定的文件与同一台机器上的其他进程共用
+            retry_policy: 按失败类别的重试策略，默认按 PinterestConfig.RETRY_POLICIES 创建
+            negative_cache: 已确认密码错误的凭据缓存，默认使用 get_negative_cache_path() 指定的文件
+            session_probe: 会话缓存命中时通过HTTP检查会话是否仍然有效，
+                默认在 PinterestConfig.SESSION_PROBE_ON_CACHE_HIT 为True时启用
+            history_store: 登录历史记录，默认在设置了 PINTEREST_HISTORY_DB 时启用
+            
+        Raises:
+            ValueError: 如果未提供也未设置API密钥，或代理模式未知
+        """
+        openai_api_key = openai_api_key or get_openai_api_key()
+        agent_mode = agent_mode or get_agent_mode()
+        if agent_mode not in PinterestConfig.AGENT_MODES:
+            raise ValueError(f"未知的代理模式：{agent_mode}，可选：{', '.join(PinterestConfig.AGENT_MODES)}")
+        object.__setattr__(self, "agent_mode", agent_mode)
+        object.__setattr__(self, "openai_api_key", openai_api_key)
+        
+        # 配置日志
+        object.__setattr__(self, "logger", logging.getLogger(__name__))
+        if get_debug_mode():
+            self.logger.setLevel(logging.DEBUG)
+        object.__setattr__(self, "metrics", metrics or get_metrics())
+        
+        # 会话缓存：同一账号再次登录时直接复用已保存的会话
+        if session_cache is None:
+            session_cache = SessionCache(
+                get_session_cache_dir(),
+                ttl=PinterestConfig.SESSION_CACHE_TTL,
+                max_entries=PinterestConfig.SESSION_CACHE_MAX_ENTRIES
+            )
+        object.__setattr__(self, "session_cache", session_cache)
+        if session_probe is None and PinterestConfig.SESSION_PROBE_ON_CACHE_HIT:
+            session_probe = SessionProbe.from_config(metrics=self.metrics)
+        object.__setattr__(self, "session_probe", session_probe)
+        
+        # 失败缓存：已确认密码错误的同一组凭据不再启动浏览器
+        if negative_cache is None:
+            negative_cache = NegativeCache(
+                get_negative_cache_path(),
+                ttl=PinterestConfig.NEGATIVE_CACHE_TTL,
+                max_entries=PinterestConfig.NEGATIVE_CACHE_MAX_ENTRIES
+            )
+        object.__setattr__(self, "negative_cache", negative_cache)
+        object.__setattr__(self, "scripted_engine", ScriptedLoginEngine(metrics=self.metrics))
+        object.__setattr__(self, "llm_registry", llm_registry or get_llm_registry())
+        object.__setattr__(
+            self, "request_filter", request_filter or RequestFilter.from_config(metrics=self.metrics)
+        )
+        object.__setattr__(self, "recipe_store", recipe_store or RecipeStore(get_recipe_path()))
+        
+        # 按账号持久化的浏览器配置目录，未配置时使用池中的临时上下文
+        if profile_manager is None and get_profile_dir():
+            profile_manager = ProfileManager.from_config(get_profile_dir(), metrics=self.metrics)
+        object.__setattr__(self, "profile_manager", profile_manager)
+        
+        # 登录节奏控制：同一出口的登录共享速率，遇到限流迹象时自动降速
+        object.__setattr__(
+            self, "rate_limiter", rate_limiter or AdaptiveRateLimiter.from_config(
+                {"state_path": get_rate_limit_state_path()}, metrics=self.metrics
+            )
+        )
+        object.__setattr__(self, "egress", get_egress_id())
+        
+        # 网络和LLM服务错误按退避策略重试，密码错误和验证挑战不重试
+        object.__setattr__(self, "retry_policy", retry_policy or RetryPolicy(metrics=self.metrics))
+        
+        # 登录历史：由后台线程批量写入，不阻塞登录
+        if history_store is None and get_history_path():
+            history_store = LoginHistoryStore(get_history_path())
+        object.__setattr__(self, "history_store", history_store)
+        
+        # 浏览器池：按无头/有头模式各保留一个，多次登录共享
+        pool_config = PinterestConfig.BROWSER_POOL_CONFIG.copy()
+        pool_config.update(browser_pool_config or {})
+        object.__setattr__(self, "browser_pool_config", pool_config)
+        object.__setattr__(self, "browser_pools", {})
+        
+        # 同步调用共用的后台事件循环，首次同步登录时启动
+        object.__setattr__(self, "background_loop", BackgroundEventLoop())
+    
+    def login(self, username: str, password: str, headless: bool = True, timeout: int = 30) -> str:
+        """同步执行Pinterest登录，在后台事件循环中运行。
+        
+        Args:
+            username: 用户名或邮箱
+            password: 密码
+            headless: 是否无头模式
+            timeout: 整个登录的时间上限（秒）
+            
+        Returns:
+            str: 登录结果描述
+        """
+        try:
+            return str(self.background_loop.run(
+                self.alogin(username, password, headless=headless, timeout=timeout)
+            ))
+        except Exception as e:
+            error_msg = f"Pinterest登录失败：{str(e)}"
+            self.logger.error(error_msg)
+            return error_msg
+    
+    async def alogin(self, username: str, password: str, headless: bool = True, timeout: int = 30) -> LoginResult:
+        """在调用方的事件循环中执行Pinterest登录。
+        
+        Args:
+            username: 用户名或邮箱
+            password: 密码
+            headless: 是否无头模式
+            timeout: 整个登录的时间上限（秒），包括启动浏览器、代理执行、结果验证，
+                以及所有重试尝试和重试前的等待；在限速器中排队的时间不计入
+            
+        Returns:
+            LoginResult: 登录结果，str() 后与原有的中文描述一致；
+                超时时为 TIMEOUT 类别，timeout_phase 记录超时时所处的阶段；
+                网络或LLM服务错误按 retry_policy 重试，attempts 记录尝试次数；
+                重试前的等待会超过时间上限时不再重试
+        """
+        
+        # 验证凭据格式
+        is_valid, error_msg = PinterestConfig.validate_credentials(username, password)
+        if not is_valid:
+            return LoginResult.failed(
+                username, error_msg, FailureCategory.INVALID_INPUT, status=LoginStatus.ERROR
+            )
+        
+        # 命中会话缓存时无需启动浏览器；校验密码哈希较慢，不在事件循环中执行
+        started = time.monotonic()
+        storage_state = await asyncio.to_thread(self.session_cache.get, username, password)
+        if storage_state is not None:
+            phase_timings = {"cache": time.monotonic() - started}
+            probe = await self._probe_session(username, storage_state)
+            if probe is not None:
+                phase_timings["session_probe"] = probe.elapsed
+            if probe is None or not probe.needs_login:
+                self.logger.debug(f"会话缓存命中：{username}")
+                result = LoginResult.succeeded(username, "cache", from_cache=True, phase_timings=phase_timings)
+                self._record_metrics(result)
+                return result
+            self.logger.info(f"缓存的会话已失效（{probe.status.value}），重新登录：{username}")
+            await asyncio.to_thread(self.session_cache.invalidate, username)
+        
+        message = await asyncio.to_thread(self.negative_cache.get, username, password)
+        if message is not None:
+            self.logger.debug(f"失败缓存命中：{username}")
+            self.metrics.inc("negative_cache_hits_total")
+            result = LoginResult.failed(
+                username, message, FailureCategory.BAD_CREDENTIALS, method="negative_cache", from_cache=True,
+                phase_timings={"cache": time.monotonic() - started}
+            )
+            self._record_metrics(result)
+            return result
+        
+        # 所有尝试共用一个时间上限；外层（如批量登录）已设置排队计时时沿用，否则自行计时
+        clock = current_queue_clock()
+        clock_token = None
+        if clock is None:
+            clock = QueueClock()
+            clock_token = set_queue_clock(clock)
+        try:
+            deadline = LoginDeadline(timeout, clock)
+            attempt = 1
+            while True:
+                result = await self._attempt_login(username, password, headless, deadline)
+                delay = self.retry_policy.next_delay(
+                    getattr(result, "failure_category", None), attempt, remaining=deadline.remaining()
+                )
+                if delay is None:
+                    break
+                self.logger.info(
+                    f"Pinterest登录第{attempt}次尝试失败（{result.failure_category.value}），{delay:.1f}秒后重试：{username}"
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            if clock_token is not None:
+                reset_queue_clock(clock_token)
+        if attempt > 1:
+            result.attempts = attempt
+        await asyncio.to_thread(self.negative_cache.record, result, password)
+        self._record_metrics(result)
+        return result
+    
+    async def _attempt_login(self, username: str, password: str, headless: bool, deadline: LoginDeadline) -> LoginResult:
+        """按登录节奏排队后执行一次登录尝试，超过时间上限时取消。
+        
+        Args:
+            username: 用户名或邮箱
+            password: 密码
+            headless: 是否无头模式
+            deadline: 整个登录的时间上限，本次尝试只使用剩余的时间
+            
+        Returns:
+            LoginResult: 本次尝试的结果
+        """
+        # 排队等待不计入登录时间上限
+        async with self.rate_limiter.slot(username, egress=self.egress) as waited:
+            # 超时后取消整个登录流程，浏览器池在取消时关闭页面和浏览器
+            progress = LoginProgress()
+            token = set_progress(progress)
+            remaining = max(deadline.remaining(), 0)
+            try:
+                result = await asyncio.wait_for(
+                    self._async_login(username, password, headless, remaining), remaining
+                )
+            except asyncio.TimeoutError:
+                phase = progress.phase or "start"
+                self.logger.warning(f"Pinterest登录超时：{username}，阶段：{phase}")
+                self.metrics.inc("login_timeouts_total", phase=phase)
+                result = LoginResult.failed(
+                    username, f"超过{deadline.timeout}秒未完成（阶段：{phase}）", FailureCategory.TIMEOUT,
+                    status=LoginStatus.ERROR, timeout_phase=phase, phase_timings=progress.snapshot()
+                )
+            except Exception as e:
+                self.logger.error(f"Pinterest登录失败：{str(e)}")
+                result = LoginResult.failed(
+                    username, str(e), classify_exception(e), status=LoginStatus.ERROR
+                )
+            finally:
+                reset_progress(token)
+        if waited:
+            result.phase_timings = {"rate_limit": waited, **result.phase_timings}
+        await asyncio.to_thread(self.rate_limiter.record, result, egress=self.egress)
+        return result
+    
+    def login_many(
+        self,
+        credentials: Iterable[Credential],
+        concurrency: int = 4,
+        headless: bool = True,
+        timeout: int = 30,
+        per_login_timeout: Optional[float] = None
+    ) -> AsyncIterator[BatchLoginResult]:
+        """并发登录多个账号，按完成顺序返回结果。
+        
+        格式无效的凭据会立即以 rejected 结果返回，不占用并发名额；
+        单个账号超过 per_login_timeout 仍未完成时被取消，不会阻塞其他账号。
+        
+        Args:
+            credentials: 凭据，每项为 (username, password) 或包含username/password的字典
+            concurrency: 同时进行的登录数量上限
+            headless: 是否无头模式
+            timeout: 单次登录的时间上限（秒）
+            per_login_timeout: 单个账号的总时间上限（秒），默认是登录超时时间的两倍，作为兜底；
+                在限速器中排队等待的时间不计入
+            
+        Returns:
+            AsyncIterator[BatchLoginResult]: 登录结果的异步迭代器
+        """
+        return login_concurrently(
+            self.alogin,
+            credentials,
+            concurrency=concurrency,
+            headless=headless,
+            timeout=timeout,
+            per_login_timeout=per_login_timeout
+        )
+    
+    async def _async_login(self, username: str, password: str, headless: bool, timeout: int) -> LoginResult:
+        """异步执行Pinterest登录。
+        
+        先按固定选择器直接填写登录表单，页面结构无法识别时回放代理录制的登录配方，
+        都不可用时再交给browser-use代理。
+        
+        Args:
+            username: 用户名或邮箱
+            password: 密码
+            headless: 是否无头模式
+            timeout: 超时时间
+            
+        Returns:
+            LoginResult: 登录结果，phase_timings 中记录每种方式的耗时
+        """
+        progress = current_progress() or LoginProgress()
+        attempts = (
+            ("scripted", self._scripted_login),
+            ("recipe", self._recipe_login),
+            ("agent", self._agent_login),
+        )
+        for method, attempt in attempts:
+            progress.begin(method)
+            with self.metrics.phase(method):
+                result = await attempt(username, password, headless, timeout)
+            progress.end()
+            if result is not None:
+                result.phase_timings = {**progress.snapshot(), **result.phase_timings}
+                return result
+    
+    async def _scripted_login(self, username: str, password: str, headless: bool, timeout: int) -> Optional[LoginResult]:
+        """使用Playwright和固定选择器登录，不消耗LLM调用。
+        
+        Args:
+            username: 用户名或邮箱
+            password: 密码
+            headless: 是否无头模式
+            timeout: 超时时间
+            
+        Returns:
+            Optional[LoginResult]: 登录结果，需要回退到代理时返回None
+        """
+        pool = self._get_browser_pool(headless)
+        if pool is None:
+            self.logger.debug("未安装playwright，跳过脚本化登录")
+            return None
+        
+        browser_config = PinterestConfig.get_browser_config(headless=headless, timeout=timeout)
+        
+        try:
+            async with self._lease(
+                pool, username,
+                viewport=browser_config["viewport"],
+                user_agent=browser_config["user_agent"]
+            ) as lease:
+                await self.request_filter.install(lease.context)
+                page = await lease.context.new_page()
+                success, error_text = await self.scripted_engine.login(
+                    page, username, password, timeout
+                )
+                if not success:
+                    return LoginResult.failed(
+                        username, error_text, FailureCategory.BAD_CREDENTIALS, method="scripted"
+                    )
+                
+                storage_state = await lease.context.storage_state()
+                await asyncio.to_thread(self.session_cache.put, username, password, storage_state)
+                return LoginResult.succeeded(username, "scripted")
+        except LoginChallengeError as e:
+            return LoginResult.failed(username, str(e), FailureCategory.CHALLENGE, method="scripted")
+        except LoginPageError as e:
+            return LoginResult.failed(
+                username, str(e), FailureCategory.PAGE_ERROR, status=LoginStatus.ERROR, method="scripted"
+            )
+        except LoginLayoutError as e:
+            self.logger.info(f"脚本化登录无法完成，回退到AI代理：{str(e)}")
+        except Exception as e:
+            # 网络错误时代理同样无法打开页面，直接返回，由重试策略决定是否重试
+            if classify_exception(e) == FailureCategory.NETWORK:
+                return LoginResult.failed(
+                    username, str(e), FailureCategory.NETWORK, status=LoginStatus.ERROR, method="scripted"
+                )
+            self.logger.warning(f"脚本化登录出错，回退到AI代理：{str(e)}")
+        return None
+    
+    async def _recipe_login(self, username: str, password: str, headless: bool, timeout: int) -> Optional[LoginResult]:
+        """回放代理之前录制的登录配方，不消耗LLM调用。
+        
+        Args:
+            username: 用户名或邮箱
+            password: 密码
+            headless: 是否无头模式
+            timeout: 超时时间
+            
+        Returns:
+            Optional[LoginResult]: 登录结果，没有配方或回放失败时返回None
+        """
+        recipe = self.recipe_store.load()
+        pool = self._get_browser_pool(headless)
+        if recipe is None or pool is None:
+            return None
+        
+        browser_config = PinterestConfig.get_browser_config(headless=headless, timeout=timeout)
+        self.recipe_store.replays += 1
+        
+        try:
+            async with self._lease(
+                pool, username,
+                viewport=browser_config["viewport"],
+                user_agent=browser_config["user_agent"]
+            ) as lease:
+                await self.request_filter.install(lease.context)
+                page = await lease.context.new_page()
+                await recipe.replay(page, username, password, PinterestConfig.SCRIPTED_ELEMENT_TIMEOUT)
+                success, error_text = await self.scripted_engine.read_outcome(page, timeout)
+                if not success:
+                    return LoginResult.failed(
+                        username, error_text, FailureCategory.BAD_CREDENTIALS, method="recipe"
+                    )
+                
+                storage_state = await lease.context.storage_state()
+                await asyncio.to_thread(self.session_cache.put, username, password, storage_state)
+                return LoginResult.succeeded(username, "recipe")
+        except LoginChallengeError as e:
+            return LoginResult.failed(username, str(e), FailureCategory.CHALLENGE, method="recipe")
+        except LoginPageError as e:
+            return LoginResult.failed(
+                username, str(e), FailureCategory.PAGE_ERROR, status=LoginStatus.ERROR, method="recipe"
+            )
+        except (RecipeReplayError, LoginLayoutError) as e:
+            self.logger.info(f"登录配方v{recipe.version}回放失败，交给AI代理重新录制：{str(e)}")
+        except Exception as e:
+            if classify_exception(e) == FailureCategory.NETWORK:
+                return LoginResult.failed(
+                    username, str(e), FailureCategory.NETWORK, status=LoginStatus.ERROR, method="recipe"
+                )
+            self.logger.warning(f"登录配方回放出错，回退到AI代理：{str(e)}")
+        self.recipe_store.replay_failures += 1
+        return None
+    
+    async def _agent_login(self, username: str, password: str, headless: bool, timeout: int) -> LoginResult:
+        """使用browser-use代理登录。
+        
+        Args:
+            username: 用户名或邮箱
+            password: 密码
+            headless: 是否无头模式
+            timeout: 超时时间
+            
+        Returns:
+            LoginResult: 登录结果
+        """
+        try:
+            from browser_use import Agent, BrowserSession
+            
+            mode = PinterestConfig.AGENT_MODES[self.agent_mode]
+            
+            # 初始化LLM
+            llm = self._create_llm()
+            
+            # 获取浏览器配置
+            browser_config = PinterestConfig.get_browser_config(headless=headless, timeout=timeout)
+            browser_config["viewport"] = mode["viewport"]
+            
+            # 获取登录任务描述，精简模式下密码通过sensitive_data传入，不出现在提示词中
+            agent_options = dict(mode.get("agent_options", {}))
+            if mode["compact_task"]:
+                task_description = PinterestConfig.get_lean_login_task(username)
+                agent_options["sensitive_data"] = {PinterestConfig.SENSITIVE_PASSWORD_KEY: password}
+            else:
+                task_description = PinterestConfig.get_login_task(username, password)
+            agent_options = _supported_options(Agent, agent_options)
+            
+            pool = self._get_browser_pool(headless)
+            if pool is None:
+                agent = Agent(
+                    task=task_description,
+                    llm=llm,
+                    browser_config=browser_config,
+                    **agent_options
+                )
+                try:
+                    return await self._run_agent(agent, username, password)
+                except asyncio.CancelledError:
+                    # 代理自己启动的浏览器不在池中，超时取消时需要单独关闭
+                    await self._close_agent(agent)
+                    raise
+            
+            session_options = {"viewport": mode["viewport"]}
+            session_options.update(mode.get("session_options", {}))
+            async with self._lease(pool, username) as lease:
+                # 代理通过CDP直接操作浏览器默认上下文，归还时关闭该浏览器以免会话泄漏
+                lease.dirty = True
+                await self.request_filter.install(await lease.default_context())
+                agent = Agent(
+                    task=task_description,
+                    llm=llm,
+                    browser_session=BrowserSession(
+                        cdp_url=lease.cdp_url, **_supported_options(BrowserSession, session_options)
+                    ),
+                    **agent_options
+                )
+                return await self._run_agent(agent, username, password, lease=lease)
+                
+        except ImportError as e:
+            return LoginResult.failed(
+                username, f"缺少必要的依赖包：{str(e)}。请安装browser-use和langchain-openai。",
+                FailureCategory.DEPENDENCY, status=LoginStatus.ERROR, method="agent"
+            )
+        except LoginChallengeError as e:
+            return LoginResult.failed(
+                username, str(e), FailureCategory.CHALLENGE, method="agent", agent_mode=self.agent_mode
+            )
+        except Exception as e:
+            return LoginResult.failed(
+                username, f"登录过程中发生错误：{str(e)}",
+                classify_exception(e), status=LoginStatus.ERROR, method="agent"
+            )
+    
+    def _create_llm(self) -> Any:
+        """创建browser-use代理使用的LLM客户端。
+        
+        同一进程中相同模型、地址和密钥的登录共用一个客户端及其HTTP连接池。
+        
+        Returns:
+            Any: browser-use的聊天模型
+        """
+        return self.llm_registry.get(self.openai_api_key)
+    
+    async def _run_agent(
+        self,
+        agent: Any,
+        username: str,
+        password: str,
+        lease: Optional[BrowserLease] = None
+    ) -> LoginResult:
+        """执行代理登录任务，并根据页面DOM判定结果。
+        
+        Args:
+            agent: browser-use代理
+            username: 用户名或邮箱
+            password: 密码
+            lease: 代理所连接的池中浏览器，用于检查页面状态
+            
+        Returns:
+            LoginResult: 登录结果
+        """
+        max_steps = PinterestConfig.AGENT_MODES[self.agent_mode]["max_steps"]
+        context = await lease.default_context() if lease is not None else None
+        outcome: Optional[Tuple[bool, str]] = None
+        with self.metrics.phase("agent_run", mode=self.agent_mode):
+            if context is not None and PinterestConfig.AGENT_EARLY_EXIT:
+                history, outcome = await self._run_agent_with_watcher(agent, context, max_steps)
+            else:
+                history = await agent.run(max_steps=max_steps)
+        llm_steps, llm_tokens = _agent_usage(history)
+        if self.metrics.enabled:
+            mode = self.agent_mode
+            self.metrics.observe("llm_steps", llm_steps, mode=mode)
+            self.metrics.observe("llm_tokens", llm_tokens, mode=mode)
+            self.metrics.inc("llm_calls_total", llm_steps, mode=mode)
+            self.metrics.inc("llm_tokens_total", llm_tokens, mode=mode)
+            for duration in _agent_step_durations(history):
+                self.metrics.observe("llm_step_seconds", duration, mode=mode)
+        details = {
+            "method": "agent",
+            "agent_mode": self.agent_mode,
+            "llm_steps": llm_steps,
+            "llm_tokens": llm_tokens,
+            "early_exit": outcome is not None
+        }
+        
+        success: Optional[bool] = None
+        error_text = ""
+        storage_state = None
+        if outcome is not None:
+            success, error_text = outcome
+            if success:
+                storage_state = await context.storage_state()
+        elif context is not None:
+            if context.pages:
+                try:
+                    success, error_text = await self.scripted_engine.read_outcome(
+                        context.pages[-1], PinterestConfig.AGENT_VERIFY_TIMEOUT
+                    )
+                except LoginChallengeError as e:
+                    return LoginResult.failed(username, str(e), FailureCategory.CHALLENGE, **details)
+                except LoginPageError as e:
+                    return LoginResult.failed(
+                        username, str(e), FailureCategory.PAGE_ERROR, status=LoginStatus.ERROR, **details
+                    )
+                except LoginLayoutError:
+                    success = None
+            if success:
+                storage_state = await context.storage_state()
+        else:
+            # 无法检查页面时，使用代理done动作中的结构化成功标记
+            is_successful = getattr(history, "is_successful", None)
+            success = is_successful() if callable(is_successful) else None
+            if success:
+                storage_state = await self._export_storage_state(agent)
+        
+        if success:
+            if storage_state:
+                await asyncio.to_thread(self.session_cache.put, username, password, storage_state)
+            if history is not None:
+                self._record_recipe(history, username, password)
+            return LoginResult.succeeded(username, **details)
+        
+        final_result = getattr(history, "final_result", None)
+        agent_message = (final_result() if callable(final_result) else None) or str(history)
+        if success is False and error_text:
+            return LoginResult.failed(username, error_text, FailureCategory.BAD_CREDENTIALS, **details)
+        
+        # 代理因网络或LLM服务错误中止时按对应类别返回，以便重试
+        category = _agent_error_category(history)
+        if category is not None:
+            return LoginResult.failed(username, agent_message, category, status=LoginStatus.ERROR, **details)
+        if success is False:
+            return LoginResult.failed(username, agent_message, FailureCategory.UNKNOWN, **details)
+        return LoginResult.failed(
+            username, agent_message, FailureCategory.UNDETERMINED,
+            status=LoginStatus.UNKNOWN, **details
+        )
+    
+    async def _run_agent_with_watcher(
+        self,
+        agent: Any,
+        context: Any,
+        max_steps: int
+    ) -> Tuple[Any, Optional[Tuple[bool, str]]]:
+        """运行代理，同时监视页面；页面已能判定登录结果时立即取消代理。
+        
+        Args:
+            agent: browser-use代理
+            context: 代理操作的浏览器上下文
+            max_steps: 代理最多执行的步数
+            
+        Returns:
+            Tuple[Any, Optional[Tuple[bool, str]]]: (执行历史, 监视到的登录结果)，
+                代理先结束时登录结果为None
+        """
+        run_task = asyncio.ensure_future(agent.run(max_steps=max_steps))
+        watch_task = asyncio.ensure_future(
+            self.scripted_engine.watch(context, PinterestConfig.AGENT_WATCH_INTERVAL)
+        )
+        try:
+            await asyncio.wait({run_task, watch_task}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            run_task.cancel()
+            watch_task.cancel()
+            await asyncio.gather(run_task, watch_task, return_exceptions=True)
+            raise
+        
+        if watch_task.done() and isinstance(watch_task.exception(), LoginChallengeError):
+            # 页面要求验证时代理也无法继续，停止代理并交给调用方返回失败
+            run_task.cancel()
+            await asyncio.gather(run_task, return_exceptions=True)
+            raise watch_task.exception()
+        
+        if run_task.done() or watch_task.exception() is not None:
+            watch_task.cancel()
+            await asyncio.gather(watch_task, return_exceptions=True)
+            return await run_task, None
+        
+        run_task.cancel()
+        await asyncio.gather(run_task, return_exceptions=True)
+        self.metrics.inc("agent_early_exits_total", mode=self.agent_mode)
+        self.logger.debug("页面已能判定登录结果，提前停止代理")
+        return _agent_history(agent), watch_task.result()
+    
+    async def _probe_session(self, username: str, storage_state: Dict[str, Any]) -> Optional[ProbeResult]:
+        """通过HTTP检查缓存的会话是否仍然有效。
+        
+        Args:
+            username: 用户名或邮箱
+            storage_state: 缓存的storage state
+            
+        Returns:
+            Optional[ProbeResult]: 检查结果，未启用会话检查或检查出错时返回None
+        """
+        if self.session_probe is None:
+            return None
+        try:
+            return await self.session_probe.probe(username, storage_state)
+        except Exception as e:
+            self.logger.debug(f"会话检查出错，按缓存结果处理：{str(e)}")
+            return None
+    
+    def _record_metrics(self, result: LoginResult) -> None:
+        """记录一次登录的结果计数和总耗时，启用了登录历史时写入历史记录。"""
+        if self.history_store is not None:
+            self.history_store.record(result)
+        if not self.metrics.enabled:
+            return
+        method = result.method or "none"
+        self.metrics.inc("logins_total", status=result.status.value, method=method)
+        self.metrics.observe("login_seconds", result.elapsed, method=method)
+    
+    def _record_recipe(self, history: Any, username: str, password: str) -> None:
+        """把代理成功登录的操作保存为新版本的登录配方。
+        
+        Args:
+            history: agent.run() 返回的执行历史
+            username: 用户名或邮箱
+            password: 密码
+        """
+        try:
+            recipe = LoginRecipe.from_agent_history(history, username, password)
+            if recipe is None:
+                self.logger.debug("代理执行历史不完整，未录制登录配方")
+                return
+            recipe = self.recipe_store.save(recipe)
+            self.logger.info(f"已录制登录配方v{recipe.version}，共{len(recipe.steps)}步")
+        except Exception as e:
+            self.logger.warning(f"保存登录配方失败：{str(e)}")
+    
+    @asynccontextmanager
+    async def _lease(self, pool: BrowserPool, username: str, **context_options: Any) -> AsyncIterator[BrowserLease]:
+        """借用一个浏览器上下文；启用了配置目录管理时使用该账号的持久化配置目录。
+        
+        Args:
+            pool: 浏览器池
+            username: 用户名或邮箱
+            **context_options: 浏览器上下文参数
+            
+        Yields:
+            BrowserLease: 浏览器上下文
+        """
+        if self.profile_manager is None:
+            async with pool.acquire(**context_options) as lease:
+                yield lease
+            return
+        
+        async with self.profile_manager.acquire(username) as profile:
+            async with pool.acquire_persistent(profile.user_data_dir, **context_options) as lease:
+                yield lease
+    
+    def _get_browser_pool(self, headless: bool) -> Optional[BrowserPool]:
+        """获取当前事件循环可用的浏览器池。
+        
+        Args:
+            headless: 是否无头模式
+            
+        Returns:
+            Optional[BrowserPool]: 浏览器池，未安装playwright时返回None
+        """
+        try:
+            import playwright.async_api  # noqa: F401
+        except ImportError:
+            return None
+        
+        # Playwright对象绑定在创建它的事件循环上，循环变化后需要新建浏览器池
+        loop = asyncio.get_running_loop()
+        pool = self.browser_pools.get(headless)
+        if pool is None or pool.loop not in (None, loop):
+            browser_config = PinterestConfig.get_browser_config(headless=headless)
+            pool_config = dict(self.browser_pool_config)
+            if self.profile_manager is not None:
+                # 每次登录都启动使用账号配置目录的浏览器，预启动的浏览器用不上
+                pool_config["warm"] = 0
+            pool = BrowserPool(
+                headless=headless,
+                context_options={"viewport": browser_config["viewport"], "user_agent": browser_config["user_agent"]},
+                metrics=self.metrics,
+                **pool_config
+            )
+            self.browser_pools[headless] = pool
+        return pool
+    
+    async def _close_agent(self, agent: Any) -> None:
+        """关闭代理自己启动的浏览器。
+        
+        Args:
+            agent: browser-use代理
+        """
+        close = getattr(agent, "close", None)
+        if close is None:
+            return
+        try:
+            await close()
+        except Exception as e:
+            self.logger.debug(f"关闭代理浏览器失败：{str(e)}")
+    
+    async def _export_storage_state(self, agent: Any) -> Optional[Dict[str, Any]]:
+        """导出代理浏览器当前的storage state。
+        
+        Args:
+            agent: 已完成任务的browser-use代理
+            
+        Returns:
+            Optional[Dict[str, Any]]: storage state，无法导出时返回None
+        """
+        browser_session = getattr(agent, "browser_session", None)
+        if browser_session is None:
+            return None
+        
+        try:
+            for method_name in ("export_storage_state", "get_storage_state"):
+                method = getattr(browser_session, method_name, None)
+                if method is not None:
+                    state = await method()
+                    if isinstance(state, dict):
+                        return state
+            
+            get_cookies = getattr(browser_session, "get_cookies", None)
+            if get_cookies is not None:
+                return {"cookies": await get_cookies(), "origins": []}
+        except Exception as e:
+            self.logger.debug(f"导出会话状态失败：{str(e)}")
+        
+        return None
+    
+    async def awarm_up(self, headless: bool = True) -> bool:
+        """预启动浏览器池中的浏览器和上下文，之后的第一次登录不再等待浏览器启动。
+        
+        需在之后执行登录的同一个事件循环中调用。
+        
+        Args:
+            headless: 预启动无头还是有头模式的浏览器池
+            
+        Returns:
+            bool: 是否已预启动，未安装playwright时返回False
+        """
+        pool = self._get_browser_pool(headless)
+        if pool is None:
+            return False
+        await pool.start(warm=pool.warm)
+        return True
+    
+    def warm_up(self, headless: bool = True) -> bool:
+        """在后台事件循环中预启动浏览器池，供 login() 和工具的同步调用使用。
+        
+        Args:
+            headless: 预启动无头还是有头模式的浏览器池
+            
+        Returns:
+            bool: 是否已预启动
+        """
+        return self.background_loop.run(self.awarm_up(headless))
+    
+    async def close(self):
+        """清理资源，关闭浏览器池中的全部浏览器和当前事件循环中的LLM连接池。"""
+        pools = list(self.browser_pools.values())
+        self.browser_pools.clear()
+        for pool in pools:
+            await pool.close()
+        await self.llm_registry.aclose()
+        if self.session_probe is not None:
+            await self.session_probe.aclose()
+        if self.history_store is not None:
+            await asyncio.to_thread(self.history_store.flush)
+    
+    def shutdown(self):
+        """同步清理资源：关闭浏览器池并停止后台事件循环。"""
+        if self.background_loop.is_running():
+            self.background_loop.run(self.close())
+        self.background_loop.stop()
+
+
+class PinterestLoginClient(PinterestLoginCore):
+    """不依赖CrewAI的Pinterest登录入口。
+    
+    Args:
+        openai_api_key: OpenAI API密钥，用于browser-use库的AI功能
+        session_cache: 会话缓存，默认使用磁盘缓存目录
+        browser_pool_config: 浏览器池配置，默认使用 PinterestConfig.BROWSER_POOL_CONFIG
+        recipe_store: 登录配方存储，默认使用 get_recipe_path() 指定的文件
+        metrics: 指标对象，默认使用 get_metrics()
+        request_filter: 登录期间的请求拦截器，默认按 PinterestConfig.REQUEST_FILTER_CONFIG 创建
+        llm_registry: 共享LLM客户端注册表，默认使用进程内的 get_llm_registry()
+        agent_mode: 代理模式，"default" 或 "lean"，默认由 PINTEREST_AGENT_MODE 决定
+        profile_manager: 按账号持久化的浏览器配置目录，默认在设置了 PINTEREST_PROFILE_DIR 时启用
+        rate_limiter: 登录节奏控制，默认按 PinterestConfig.RATE_LIMIT_CONFIG 创建
+        retry_policy: 按失败类别的重试策略，默认按 PinterestConfig.RETRY_POLICIES 创建
+        negative_cache: 已确认密码错误的凭据缓存，默认使用 get_negative_cache_path() 指定的文件
+        session_probe: 会话缓存命中时通过HTTP检查会话是否仍然有效
+        history_store: 登录历史记录，默认在设置了 PINTEREST_HISTORY_DB 时启用
+    """
+    
+    def __init__(
+        self,
+        openai_api_key: Optional[str] = None,
+        session_cache: Optional[SessionCache] = None,
+        browser_pool_config: Optional[Dict[str, Any]] = None,
+        recipe_store: Optional[RecipeStore] = None,
+        metrics: Optional[LoginMetrics] = None,
+        request_filter: Optional[RequestFilter] = None,
+        llm_registry: Optional[LLMClientRegistry] = None,
+        agent_mode: Optional[str] = None,
+        profile_manager: Optional[ProfileManager] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        session_probe: Optional[SessionProbe] = None,
+        history_store: Optional[LoginHistoryStore] = None
+    ):
+        self._init_login_core(
+            openai_api_key=openai_api_key,
+            session_cache=session_cache,
+            browser_pool_config=browser_pool_config,
+            recipe_store=recipe_store,
+            metrics=metrics,
+            request_filter=request_filter,
+            llm_registry=llm_registry,
+            agent_mode=agent_mode,
+            profile_manager=profile_manager,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            negative_cache=negative_cache,
+            session_probe=session_probe,
+            history_store=history_store
+        )
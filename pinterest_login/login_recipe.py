@@ -0,0 +1,301 @@
+"""登录流程的录制与回放。
+
+browser-use代理登录成功后，把它执行过的操作（打开页面、点击、输入）
+保存为带版本号的“登录配方”。之后的登录直接回放配方，不再调用LLM；
+回放中某一步失败时才重新交给代理，并用代理的新操作更新配方。
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import PinterestConfig
+
+try:
+    import fcntl
+except ImportError:  # Windows上只在进程内加锁
+    fcntl = None
+
+
+# 配方中代替真实凭据的占位符，密码不会写入磁盘
+USERNAME_PLACEHOLDER = "{username}"
+PASSWORD_PLACEHOLDER = "{password}"
+
+# 用于生成选择器的元素属性，按稳定性排序
+_SELECTOR_ATTRIBUTES = ("data-test-id", "id", "name", "type")
+
+
+class RecipeReplayError(Exception):
+    """回放配方时某一步执行失败。"""
+
+    def __init__(self, step_index: int, message: str):
+        super().__init__(f"第{step_index + 1}步回放失败：{message}")
+        self.step_index = step_index
+
+
+@dataclass
+class RecipeStep:
+    """配方中的一步操作。
+
+    Attributes:
+        action: 操作类型，navigate / click / fill
+        selector: 元素选择器，navigate 时为空
+        value: navigate 的URL或 fill 的内容，可以包含凭据占位符
+    """
+
+    action: str
+    selector: str = ""
+    value: str = ""
+
+
+@dataclass
+class LoginRecipe:
+    """带版本号的登录配方。"""
+
+    steps: List[RecipeStep]
+    version: int = 1
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LoginRecipe":
+        return cls(
+            steps=[RecipeStep(**step) for step in data.get("steps", [])],
+            version=data.get("version", 1),
+            updated_at=data.get("updated_at", 0.0)
+        )
+
+    @classmethod
+    def from_agent_history(cls, history: Any, username: str, password: str) -> Optional["LoginRecipe"]:
+        """从browser-use代理的执行历史生成配方。
+
+        Args:
+            history: agent.run() 返回的 AgentHistoryList
+            username: 本次登录的用户名，会替换为占位符
+            password: 本次登录的密码，会替换为占位符
+
+        Returns:
+            Optional[LoginRecipe]: 配方，历史中没有完整的凭据输入、或输入了凭据以外的内容时返回None
+        """
+        model_actions = getattr(history, "model_actions", None)
+        if model_actions is None:
+            return None
+
+        steps = []
+        for action in model_actions():
+            element = action.get("interacted_element")
+            for name, params in action.items():
+                if name == "interacted_element" or not isinstance(params, dict):
+                    continue
+                step = _step_from_action(name, params, element, username, password)
+                if step is not None:
+                    steps.append(step)
+
+        filled = {step.value for step in steps if step.action == "fill"}
+        if USERNAME_PLACEHOLDER not in filled or PASSWORD_PLACEHOLDER not in filled:
+            return None
+        if filled - {USERNAME_PLACEHOLDER, PASSWORD_PLACEHOLDER}:
+            # 代理还输入了其他内容（如验证码或改写过的密码），原样写入磁盘可能泄露敏感信息，也无法回放
+            return None
+        return cls(steps=steps)
+
+    async def replay(self, page: Any, username: str, password: str, step_timeout: float) -> None:
+        """在页面上回放配方。
+
+        Args:
+            page: Playwright页面
+            username: 用户名或邮箱
+            password: 密码
+            step_timeout: 每一步等待元素的时间（秒）
+
+        Raises:
+            RecipeReplayError: 某一步执行失败
+        """
+        for index, step in enumerate(self.steps):
+            try:
+                if step.action == "navigate":
+                    await page.goto(step.value, wait_until="domcontentloaded", timeout=step_timeout * 1000)
+                    continue
+
+                await page.wait_for_selector(step.selector, state="visible", timeout=step_timeout * 1000)
+                if step.action == "fill":
+                    value = step.value.replace(USERNAME_PLACEHOLDER, username)
+                    value = value.replace(PASSWORD_PLACEHOLDER, password)
+                    await page.fill(step.selector, value)
+                elif step.action == "click":
+                    await page.click(step.selector)
+                else:
+                    raise ValueError(f"未知操作 {step.action}")
+            except Exception as e:
+                raise RecipeReplayError(index, str(e)) from e
+
+
+def _step_from_action(
+    name: str,
+    params: Dict[str, Any],
+    element: Any,
+    username: str,
+    password: str
+) -> Optional[RecipeStep]:
+    """把代理的一个动作转换为配方步骤，无法回放的动作返回None。
+
+    输入的内容不是本次的用户名或密码时原样保留，由调用方拒绝录制整个配方。
+    """
+    if name in ("go_to_url", "navigate", "open_tab"):
+        url = params.get("url")
+        return RecipeStep("navigate", value=url) if url else None
+
+    selector = _element_selector(element)
+    if not selector:
+        return None
+
+    if name == "input_text":
+        text = params.get("text", "")
+        if text == username:
+            text = USERNAME_PLACEHOLDER
+        elif text in (password, f"<secret>{PinterestConfig.SENSITIVE_PASSWORD_KEY}</secret>"):
+            # 精简模式下代理输入的是sensitive_data占位符
+            text = PASSWORD_PLACEHOLDER
+        return RecipeStep("fill", selector=selector, value=text)
+
+    if name in ("click_element_by_index", "click_element", "click"):
+        return RecipeStep("click", selector=selector)
+
+    return None
+
+
+def _element_selector(element: Any) -> str:
+    """根据代理记录的元素信息生成Playwright选择器。"""
+    if element is None:
+        return ""
+
+    attributes = getattr(element, "attributes", None) or {}
+    tag = (getattr(element, "node_name", None) or getattr(element, "tag_name", None) or "").lower()
+    for attribute in _SELECTOR_ATTRIBUTES:
+        value = attributes.get(attribute)
+        if value:
+            return f"{tag}[{attribute}='{value}']"
+
+    xpath = getattr(element, "x_path", None) or getattr(element, "xpath", None)
+    if xpath:
+        # browser-use记录的xpath不带开头的斜杠
+        return f"xpath=/{xpath.lstrip('/')}"
+    return ""
+
+
+class RecipeStore:
+    """登录配方的磁盘存储，每次更新版本号加一。
+
+    Args:
+        path: 配方文件路径
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._recipe: Optional[LoginRecipe] = None
+        self._loaded = False
+
+        self.replays = 0
+        self.replay_failures = 0
+        self.updates = 0
+
+    def load(self) -> Optional[LoginRecipe]:
+        """读取当前配方。
+
+        Returns:
+            Optional[LoginRecipe]: 配方，尚未录制时返回None
+        """
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                self._recipe = self._read()
+            return self._recipe
+
+    def save(self, recipe: LoginRecipe) -> LoginRecipe:
+        """保存配方，版本号在磁盘上已有配方的基础上加一。
+
+        多个进程可以共用同一个配方文件：读取版本号和写入都在文件锁内进行，
+        写入经同一目录下的临时文件原子替换。
+
+        Args:
+            recipe: 新录制的配方
+
+        Returns:
+            LoginRecipe: 保存后的配方
+        """
+        with self._lock, self._file_lock():
+            current = self._read()
+            recipe.version = current.version + 1 if current else 1
+            recipe.updated_at = time.time()
+            self._write(recipe)
+
+            self._recipe = recipe
+            self._loaded = True
+            self.updates += 1
+            return recipe
+
+    def stats(self) -> Dict[str, int]:
+        """获取回放统计信息。
+
+        Returns:
+            Dict[str, int]: 当前版本号、回放次数、失败次数和更新次数
+        """
+        recipe = self._recipe
+        return {
+            "version": recipe.version if recipe else 0,
+            "replays": self.replays,
+            "replay_failures": self.replay_failures,
+            "updates": self.updates,
+        }
+
+    def _read(self) -> Optional[LoginRecipe]:
+        """读取磁盘上的配方，文件不存在或无法解析时返回None。"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return LoginRecipe.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            self.logger.warning(f"登录配方文件无法读取，将重新录制：{str(e)}")
+            return None
+
+    def _write(self, recipe: LoginRecipe) -> None:
+        """经同一目录下的临时文件原子写入；调用方持有文件锁。"""
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(recipe.to_dict(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """跨进程的排他锁，锁文件与配方文件位于同一目录。"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
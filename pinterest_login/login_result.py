@@ -0,0 +1,108 @@
+"""结构化的登录结果。"""
+
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from typing import Any, Dict, Optional
+
+
+class LoginStatus(str, Enum):
+    """登录状态。"""
+
+    SUCCESS = "success"    # 页面出现登录成功标识
+    FAILED = "failed"      # 页面明确给出登录失败
+    UNKNOWN = "unknown"    # 流程已结束但无法从页面判定结果
+    ERROR = "error"        # 流程未能完成
+
+
+class FailureCategory(str, Enum):
+    """登录失败类别。"""
+
+    INVALID_INPUT = "invalid_input"        # 凭据格式无效，未执行登录
+    BAD_CREDENTIALS = "bad_credentials"    # 页面提示用户名或密码错误
+    CHALLENGE = "challenge"                # 页面要求验证码或两步验证
+    PAGE_ERROR = "page_error"              # 页面提示了错误，但不能确认是凭据错误，如“请稍后再试”
+    NETWORK = "network"                    # 网络错误，如连接被重置、DNS解析失败
+    LLM_PROVIDER = "llm_provider"          # LLM服务错误，如限流、服务不可用
+    LLM_CONFIG = "llm_config"              # LLM服务拒绝请求，如密钥无效、无权限、额度用尽
+    TIMEOUT = "timeout"                    # 超过时间上限
+    UNDETERMINED = "undetermined"          # 页面上既没有成功标识也没有错误信息
+    DEPENDENCY = "dependency"              # 缺少必要的依赖包
+    UNKNOWN = "unknown"                    # 其他异常
+
+
+@dataclass
+class LoginResult:
+    """一次登录的结果。
+
+    Attributes:
+        username: 用户名或邮箱
+        status: 登录状态
+        method: 得出结果的方式，cache / negative_cache / scripted / recipe / agent
+        agent_mode: 使用代理时的代理模式，default / lean
+        message: 页面错误信息或异常详情
+        failure_category: 失败类别，成功时为None
+        phase_timings: 各阶段耗时（秒）
+        llm_steps: 代理执行的步数
+        llm_tokens: 代理消耗的token数
+        from_cache: 是否直接使用了缓存的会话或缓存的密码错误结果
+        early_exit: 代理是否因页面已能判定结果而被提前停止
+        timeout_phase: 超过时间上限时正在进行的阶段，如 browser_launch、agent_run、verify
+        attempts: 尝试次数，网络或LLM服务错误重试后大于1
+    """
+
+    username: str
+    status: LoginStatus
+    method: str = ""
+    agent_mode: str = ""
+    message: str = ""
+    failure_category: Optional[FailureCategory] = None
+    phase_timings: Dict[str, float] = field(default_factory=dict)
+    llm_steps: int = 0
+    llm_tokens: int = 0
+    from_cache: bool = False
+    early_exit: bool = False
+    timeout_phase: str = ""
+    attempts: int = 1
+
+    @property
+    def success(self) -> bool:
+        return self.status == LoginStatus.SUCCESS
+
+    @property
+    def elapsed(self) -> float:
+        """各阶段耗时之和（秒）。"""
+        return sum(self.phase_timings.values())
+
+    @classmethod
+    def succeeded(cls, username: str, method: str, **kwargs: Any) -> "LoginResult":
+        return cls(username, LoginStatus.SUCCESS, method=method, **kwargs)
+
+    @classmethod
+    def failed(
+        cls,
+        username: str,
+        message: str,
+        category: FailureCategory,
+        status: LoginStatus = LoginStatus.FAILED,
+        **kwargs: Any
+    ) -> "LoginResult":
+        return cls(username, status, message=message, failure_category=category, **kwargs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典。"""
+        data = asdict(self)
+        data["status"] = self.status.value
+        data["failure_category"] = self.failure_category.value if self.failure_category else None
+        data["elapsed"] = self.elapsed
+        return data
+
+    def __str__(self) -> str:
+        """与原有工具返回值一致的中文描述。"""
+        if self.status == LoginStatus.SUCCESS:
+            suffix = "（使用缓存会话）" if self.from_cache else ""
+            return f"Pinterest登录成功！用户：{self.username}{suffix}"
+        if self.failure_category == FailureCategory.INVALID_INPUT:
+            return f"错误：{self.message}"
+        if self.status == LoginStatus.UNKNOWN:
+            return f"Pinterest登录完成，结果：{self.message}"
+        return f"Pinterest登录失败：{self.message}"
@@ -0,0 +1,291 @@
+"""登录各阶段的耗时统计与指标导出。
+
+默认关闭。关闭时 phase() 只记录当前阶段名供超时报告使用，随后返回共享的空上下文管理器，
+observe() 和 inc() 直接返回，热路径上只多一次属性判断。开启后在进程内汇总直方图和计数器，
+可导出为Prometheus文本格式或JSON；安装了opentelemetry时还可以为每个阶段创建span。
+"""
+
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import get_metrics_enabled, get_tracing_enabled
+from deadline import note_phase
+
+
+# 指标名称前缀
+PREFIX = "pinterest_login_"
+
+# 耗时直方图的桶上界（秒）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+# 非耗时类直方图使用的桶
+METRIC_BUCKETS = {
+    "llm_steps": (1, 2, 3, 5, 8, 13, 20, 30, 50),
+    "llm_tokens": (500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """固定桶的直方图。
+
+    Args:
+        buckets: 桶上界，递增排列，最后隐含一个 +Inf 桶
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """各桶的累计计数，桶上界格式化为Prometheus的le标签值。"""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else _format_number(bound), total))
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum": self.sum, "buckets": dict(self.cumulative())}
+
+
+class _NoopPhase:
+    """指标关闭时使用的空上下文管理器。"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopPhase":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NOOP_PHASE = _NoopPhase()
+
+
+class _Phase:
+    """记录一个阶段的耗时，开启追踪时同时创建span。"""
+
+    __slots__ = ("metrics", "name", "labels", "started", "span")
+
+    def __init__(self, metrics: "LoginMetrics", name: str, labels: Dict[str, Any]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.started = 0.0
+        self.span: Any = None
+
+    def __enter__(self) -> "_Phase":
+        tracer = self.metrics.tracer
+        if tracer is not None:
+            self.span = tracer.start_as_current_span(
+                f"pinterest_login.{self.name}",
+                attributes={key: str(value) for key, value in self.labels.items()}
+            )
+            self.span.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        elapsed = time.perf_counter() - self.started
+        self.metrics.observe("phase_seconds", elapsed, phase=self.name, **self.labels)
+        if exc_type is not None:
+            self.metrics.inc("phase_errors_total", phase=self.name, **self.labels)
+        if self.span is not None:
+            self.span.__exit__(exc_type, exc, traceback)
+
+
+class LoginMetrics:
+    """进程内的登录指标。
+
+    Args:
+        enabled: 是否记录指标
+        tracing: 是否为每个阶段创建OpenTelemetry span，需要安装opentelemetry-api
+    """
+
+    def __init__(self, enabled: bool = False, tracing: bool = False):
+        self.enabled = False
+        self.tracer: Any = None
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        if enabled:
+            self.enable(tracing=tracing)
+
+    def enable(self, tracing: bool = False) -> None:
+        """开始记录指标。
+
+        Args:
+            tracing: 是否同时创建OpenTelemetry span
+        """
+        self.enabled = True
+        if tracing and self.tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                self.logger.warning("未安装opentelemetry-api，阶段span已禁用")
+            else:
+                self.tracer = trace.get_tracer("pinterest_login")
+
+    def disable(self) -> None:
+        """停止记录指标，已记录的数据保留。"""
+        self.enabled = False
+        self.tracer = None
+
+    def phase(self, name: str, **labels: Any) -> Any:
+        """记录一个阶段耗时的上下文管理器。
+
+        Args:
+            name: 阶段名称，作为 phase_seconds 的phase标签
+            **labels: 附加标签
+
+        Returns:
+            上下文管理器，指标关闭时为共享的空实现
+        """
+        note_phase(name)
+        if not self.enabled:
+            return _NOOP_PHASE
+        return _Phase(self, name, labels)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """向直方图中记录一个值。
+
+        Args:
+            name: 指标名称，不含前缀
+            value: 观测值
+            **labels: 标签
+        """
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = Histogram(METRIC_BUCKETS.get(name, DEFAULT_BUCKETS))
+                self._histograms[key] = histogram
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """增加计数器。
+
+        Args:
+            name: 指标名称，不含前缀
+            value: 增加量
+            **labels: 标签
+        """
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self) -> None:
+        """清空已记录的指标。"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """以字典形式导出指标。
+
+        Returns:
+            Dict[str, Any]: {"histograms": {...}, "counters": {...}}，
+                每个指标下是标签组合到数据的列表
+        """
+        with self._lock:
+            histograms = {key: histogram.to_dict() for key, histogram in self._histograms.items()}
+            counters = dict(self._counters)
+
+        data: Dict[str, Any] = {"histograms": {}, "counters": {}}
+        for (name, labels), value in sorted(histograms.items()):
+            data["histograms"].setdefault(name, []).append({"labels": dict(labels), **value})
+        for (name, labels), value in sorted(counters.items()):
+            data["counters"].setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return data
+
+    def to_json(self) -> str:
+        """以JSON文本导出指标。"""
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """以Prometheus文本格式导出指标。"""
+        with self._lock:
+            histograms = [(key, histogram.cumulative(), histogram.sum, histogram.count)
+                          for key, histogram in self._histograms.items()]
+            counters = list(self._counters.items())
+
+        lines: List[str] = []
+        declared = set()
+        for (name, labels), buckets, total, count in sorted(histograms, key=lambda item: item[0]):
+            metric = PREFIX + name
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            for bound, cumulative in buckets:
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {_format_number(total)}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+        for (name, labels), value in sorted(counters):
+            metric = PREFIX + name
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(labels)} {_format_number(value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def dump(self, path: str, fmt: Optional[str] = None) -> None:
+        """把指标写入文件。
+
+        Args:
+            path: 文件路径
+            fmt: "prometheus" 或 "json"，默认按扩展名判断，.json 为JSON，其余为Prometheus文本
+        """
+        fmt = fmt or ("json" if path.endswith(".json") else "prometheus")
+        content = self.to_json() if fmt == "json" else self.to_prometheus()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_number(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+_default_metrics = LoginMetrics(enabled=get_metrics_enabled(), tracing=get_tracing_enabled())
+
+
+def get_metrics() -> LoginMetrics:
+    """获取进程内默认的指标对象，是否开启由 PINTEREST_METRICS 环境变量决定。"""
+    return _default_metrics
@@ -0,0 +1,319 @@
+"""已确认密码错误的凭据缓存。
+
+批量登录重复运行时，密码错误的账号每次都要启动浏览器、甚至调用LLM代理才能再次得到同样的失败。
+页面明确提示密码错误后，把这组凭据的加盐哈希记入缓存，有效期内同一组凭据直接返回失败。
+密码改变后哈希不再匹配，对应条目自动失效，新密码照常登录。
+
+缓存文件中不保存用户名和密码：账号和凭据都以缓存自己的随机密钥做HMAC，文件权限仅限当前用户。
+多个进程可以共用同一个缓存文件：读写都在文件锁内进行，写入时先合并磁盘上其他进程的改动，
+再经临时文件原子替换；查找前发现文件被其他进程改写时重新读取。
+缓存文件和随机密钥在第一次记录时才在文件锁内创建，所有进程使用同一个密钥。
+读写磁盘是阻塞操作，异步代码中应通过 asyncio.to_thread() 调用。
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from login_result import FailureCategory, LoginResult, LoginStatus
+
+try:
+    import fcntl
+except ImportError:  # Windows上只在进程内加锁
+    fcntl = None
+
+
+class NegativeCache:
+    """按账号缓存已确认的密码错误结果，支持TTL过期与LRU淘汰。
+
+    Args:
+        path: 缓存文件路径
+        ttl: 条目有效期（秒）
+        max_entries: 最多缓存的账号数量
+    """
+
+    def __init__(self, path: str, ttl: int = 24 * 3600, max_entries: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._secret = ""
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._file_version: Optional[tuple] = None
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._expirations = 0
+        self._evictions = 0
+
+        self._refresh()
+
+    def get(self, username: str, password: str) -> Optional[str]:
+        """查找这组凭据是否已确认密码错误。
+
+        Args:
+            username: 用户名或邮箱
+            password: 密码
+
+        Returns:
+            Optional[str]: 当时页面上的错误信息，未命中时返回None
+        """
+        now = time.time()
+        with self._lock:
+            self._refresh()
+            if not self._secret:
+                # 还没有任何进程记录过失败结果
+                self._misses += 1
+                return None
+            key = self._account_key(username)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            if now >= entry.get("expires_at", 0):
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            if not hmac.compare_digest(entry.get("credential", ""), self._credential_key(username, password)):
+                # 密码已更换，之前的失败结果不再适用
+                self._remove(key)
+                self._invalidations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.get("message", "")
+
+    def record(self, result: LoginResult, password: str) -> bool:
+        """根据登录结果更新缓存。
+
+        页面明确提示密码错误时记录这组凭据；同一账号登录成功时移除旧条目。
+        超时、验证挑战等其他失败不记录，下次仍会正常登录。
+
+        Args:
+            result: 登录结果
+            password: 本次登录使用的密码
+
+        Returns:
+            bool: 是否新增了条目
+        """
+        category = getattr(result, "failure_category", None)
+        if getattr(result, "from_cache", False):
+            return False
+        if getattr(result, "success", False):
+            self.invalidate(result.username)
+            return False
+        if category != FailureCategory.BAD_CREDENTIALS or result.status != LoginStatus.FAILED:
+            return False
+
+        now = time.time()
+        with self._lock:
+            if not self._secret:
+                self._create_secret()
+            key = self._account_key(result.username)
+            self._entries[key] = {
+                "credential": self._credential_key(result.username, password),
+                "message": result.message,
+                "created_at": now,
+                "expires_at": now + self.ttl,
+            }
+            self._entries.move_to_end(key)
+            self._save({key: self._entries[key]})
+        return True
+
+    def invalidate(self, username: str) -> bool:
+        """移除指定账号的条目。
+
+        Args:
+            username: 用户名或邮箱
+
+        Returns:
+            bool: 是否存在并已移除
+        """
+        with self._lock:
+            self._refresh()
+            if not self._secret:
+                return False
+            key = self._account_key(username)
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self) -> None:
+        """清空全部条目。"""
+        with self._lock:
+            self._refresh()
+            self._entries.clear()
+            if self._secret:
+                self._save({}, clear=True)
+
+    def stats(self) -> Dict[str, int]:
+        """获取缓存统计信息。
+
+        Returns:
+            Dict[str, int]: 命中、未命中、因密码更换失效、过期、淘汰次数以及当前条目数
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "expirations": self._expirations,
+                "evictions": self._evictions,
+                "size": len(self._entries),
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _refresh(self) -> None:
+        """缓存文件自上次读写后被改写时重新加载，丢弃已过期的条目；文件不存在时不做任何改动。"""
+        version = self._version()
+        if version is None or version == self._file_version:
+            return
+        try:
+            with self._file_lock():
+                secret, entries = self._read()
+                self._file_version = self._version()
+        except OSError as e:
+            self.logger.warning(f"读取失败缓存文件失败 {self.path}: {e}")
+            return
+        if secret:
+            self._secret = secret
+            self._entries = self._drop_expired(entries)
+
+    def _create_secret(self) -> None:
+        """第一次记录时创建密钥和缓存文件；在文件锁内进行，同时记录的其他进程使用同一个密钥。"""
+        try:
+            with self._file_lock():
+                secret, entries = self._read()
+                if secret:
+                    self._secret = secret
+                    self._entries = self._drop_expired(entries)
+                else:
+                    self._secret = secrets.token_hex(32)
+                    self._write()
+                self._file_version = self._version()
+        except OSError as e:
+            self.logger.warning(f"无法使用失败缓存文件 {self.path}，本次只在内存中缓存: {e}")
+            if not self._secret:
+                self._secret = secrets.token_hex(32)
+
+    def _version(self) -> Optional[tuple]:
+        """缓存文件的inode和修改时间；原子替换会产生新文件，二者任一改变说明文件已被改写。"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _save(self, changes: Dict[str, Optional[Dict[str, Any]]], clear: bool = False) -> None:
+        """把本进程的改动合并到磁盘上的缓存后原子写入。
+
+        Args:
+            changes: 账号键 -> 新条目，None表示删除
+            clear: 是否先清空磁盘上的全部条目
+        """
+        try:
+            with self._file_lock():
+                secret, entries = self._read()
+                if secret and secret != self._secret:
+                    # 文件已被其他进程重建，本进程以旧密钥计算的改动不再适用
+                    self.logger.debug(f"失败缓存文件 {self.path} 的密钥已改变，重新加载")
+                    self._secret = secret
+                    changes = {}
+                if clear:
+                    entries.clear()
+                for key, entry in changes.items():
+                    entries.pop(key, None)
+                    if entry is not None:
+                        entries[key] = entry
+                entries = self._drop_expired(entries)
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+                    self._evictions += 1
+                self._entries = entries
+                self._write()
+                self._file_version = self._version()
+        except OSError as e:
+            self.logger.warning(f"保存失败缓存失败 {self.path}: {e}")
+
+    def _read(self) -> "tuple[str, OrderedDict[str, Dict[str, Any]]]":
+        """读取磁盘上的密钥和条目，文件不存在或无法解析时返回空值。"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return "", OrderedDict()
+        except ValueError as e:
+            self.logger.debug(f"跳过无法解析的失败缓存文件 {self.path}: {e}")
+            return "", OrderedDict()
+        return data.get("secret", ""), OrderedDict((key, entry) for key, entry in data.get("entries", []))
+
+    def _write(self) -> None:
+        """经同一目录下的临时文件原子写入，权限仅限当前用户；调用方持有文件锁。"""
+        data = {"secret": self._secret, "entries": list(self._entries.items())}
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """跨进程的排他锁，锁文件与缓存文件位于同一目录。"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _drop_expired(self, entries: "OrderedDict[str, Dict[str, Any]]") -> "OrderedDict[str, Dict[str, Any]]":
+        now = time.time()
+        for key in [key for key, entry in entries.items() if now >= entry.get("expires_at", 0)]:
+            del entries[key]
+            self._expirations += 1
+        return entries
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._save({key: None})
+
+    def _hmac(self, message: str) -> str:
+        return hmac.new(self._secret.encode("utf-8"), message.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def _account_key(self, username: str) -> str:
+        return self._hmac(f"account:{username.strip().lower()}")
+
+    def _credential_key(self, username: str, password: str) -> str:
+        return self._hmac(f"credential:{username.strip().lower()}\0{password}")
@@ -1,14 +1,24 @@
 """Pinterest Login Tool using browser-use library."""
 
-import asyncio
-import os
-from typing import Any, Optional, Type, List
-import logging
+from typing import Any, Callable, Dict, Optional, Type, List
 
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 
-from config import PinterestConfig, get_openai_api_key, get_debug_mode
+from config import PinterestConfig
+from history_store import LoginHistoryStore
+from llm_registry import LLMClientRegistry
+from login_client import PinterestLoginCore
+from login_recipe import RecipeStore
+from metrics import LoginMetrics
+from negative_cache import NegativeCache
+from profile_manager import ProfileManager
+from rate_limiter import AdaptiveRateLimiter
+from request_filter import RequestFilter
+from result_cache import LoginResultCache, never_cache
+from retry_policy import RetryPolicy
+from session_cache import SessionCache
+from session_probe import SessionProbe
 
 
 class PinterestLoginToolSchema(BaseModel):
@@ -17,10 +27,10 @@ class PinterestLoginToolSchema(BaseModel):
     username: str = Field(..., description="Pinterest账号用户名或邮箱")
     password: str = Field(..., description="Pinterest账号密码")
     headless: bool = Field(default=True, description="是否以无头模式运行浏览器")
-    timeout: int = Field(default=30, description="登录超时时间（秒）")
+    timeout: int = Field(default=30, description="整个登录的时间上限（秒）")
 
 
-class PinterestLoginTool(BaseTool):
+class PinterestLoginTool(PinterestLoginCore, BaseTool):
     """Pinterest登录工具，基于browser-use库实现自动化登录功能。
     
     该工具可以自动打开Pinterest网站，输入用户提供的账号密码进行登录，
@@ -28,6 +38,21 @@ class PinterestLoginTool(BaseTool):
     
     Args:
         openai_api_key: OpenAI API密钥，用于browser-use库的AI功能
+        session_cache: 会话缓存，默认使用磁盘缓存目录
+        browser_pool_config: 浏览器池配置，默认使用 PinterestConfig.BROWSER_POOL_CONFIG
+        recipe_store: 登录配方存储，默认使用 get_recipe_path() 指定的文件
+        metrics: 指标对象，默认使用 get_metrics()
+        request_filter: 登录期间的请求拦截器，默认按 PinterestConfig.REQUEST_FILTER_CONFIG 创建
+        llm_registry: 共享LLM客户端注册表，默认使用进程内的 get_llm_registry()
+        agent_mode: 代理模式，"default" 或 "lean"，默认由 PINTEREST_AGENT_MODE 决定
+        profile_manager: 按账号持久化的浏览器配置目录，默认在设置了 PINTEREST_PROFILE_DIR 时启用
+        rate_limiter: 登录节奏控制，默认按 PinterestConfig.RATE_LIMIT_CONFIG 创建
+        retry_policy: 按失败类别的重试策略，默认按 PinterestConfig.RETRY_POLICIES 创建
+        negative_cache: 已确认密码错误的凭据缓存，默认使用 get_negative_cache_path() 指定的文件
+        session_probe: 会话缓存命中时通过HTTP检查会话是否仍然有效
+        history_store: 登录历史记录，默认在设置了 PINTEREST_HISTORY_DB 时启用
+        result_cache: 合并同一组凭据的并发调用并短期缓存结果，
+            默认按 PinterestConfig.RESULT_CACHE_TTL 创建；CrewAI自带的明文参数缓存始终停用
     """
     
     name: str = "Pinterest登录工具"
@@ -39,107 +64,89 @@ class PinterestLoginTool(BaseTool):
     )
     args_schema: Type[BaseModel] = PinterestLoginToolSchema
     package_dependencies: List[str] = ["browser-use", "playwright"]
+    # CrewAI的工具缓存以包括密码在内的明文参数为键，重复调用改由 result_cache 应答
+    cache_function: Callable = never_cache
     
-    def __init__(self, openai_api_key: Optional[str] = None, **kwargs):
+    def __init__(
+        self,
+        openai_api_key: Optional[str] = None,
+        session_cache: Optional[SessionCache] = None,
+        browser_pool_config: Optional[Dict[str, Any]] = None,
+        recipe_store: Optional[RecipeStore] = None,
+        metrics: Optional[LoginMetrics] = None,
+        request_filter: Optional[RequestFilter] = None,
+        llm_registry: Optional[LLMClientRegistry] = None,
+        agent_mode: Optional[str] = None,
+        profile_manager: Optional[ProfileManager] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        session_probe: Optional[SessionProbe] = None,
+        history_store: Optional[LoginHistoryStore] = None,
+        result_cache: Optional[LoginResultCache] = None,
+        **kwargs
+    ):
         super().__init__(**kwargs)
         
-        try:
-            openai_api_key = openai_api_key or get_openai_api_key()
-            object.__setattr__(self,"openai_api_key", openai_api_key)   
-        except ValueError as e:
-            raise ValueError(str(e))
-        
-        # 配置日志
-        #self.logger = logging.getLogger(__name__)
-        object.__setattr__(self,"logger", logging.getLogger(__name__))
-        if get_debug_mode():
-            self.logger.setLevel(logging.DEBUG)
+        self._init_login_core(
+            openai_api_key=openai_api_key,
+            session_cache=session_cache,
+            browser_pool_config=browser_pool_config,
+            recipe_store=recipe_store,
+            metrics=metrics,
+            request_filter=request_filter,
+            llm_registry=llm_registry,
+            agent_mode=agent_mode,
+            profile_manager=profile_manager,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            negative_cache=negative_cache,
+            session_probe=session_probe,
+            history_store=history_store
+        )
+        if result_cache is None:
+            result_cache = LoginResultCache(
+                ttl=PinterestConfig.RESULT_CACHE_TTL,
+                max_entries=PinterestConfig.RESULT_CACHE_MAX_ENTRIES,
+                metrics=self.metrics
+            )
+        object.__setattr__(self, "result_cache", result_cache)
         
     def _run(self, **kwargs: Any) -> str:
         """执行Pinterest登录操作。
         
+        登录在工具自己的后台事件循环中执行，调用方线程中是否已有运行中的事件循环都不影响。
+        
         Returns:
             str: 登录结果描述
         """
-        username = kwargs.get("username")
-        password = kwargs.get("password")
-        headless = kwargs.get("headless", True)
-        timeout = kwargs.get("timeout", 30)
-        
-        if not username or not password:
-            return "错误：必须提供用户名和密码"
-        
-        # 验证凭据格式
-        is_valid, error_msg = PinterestConfig.validate_credentials(username, password)
-        if not is_valid:
-            return f"错误：{error_msg}"
-        
         try:
-            # 运行异步登录操作
-            result = asyncio.run(self._async_login(username, password, headless, timeout))
-            return result
+            return self.background_loop.run(self._arun(**kwargs))
         except Exception as e:
             error_msg = f"Pinterest登录失败：{str(e)}"
             self.logger.error(error_msg)
             return error_msg
     
-    async def _async_login(self, username: str, password: str, headless: bool, timeout: int) -> str:
-        """异步执行Pinterest登录。
+    async def _arun(self, **kwargs: Any) -> str:
+        """异步执行Pinterest登录操作，参数与 _run 相同。
+        
+        同一组凭据的并发调用只登录一次，有效期内的重复调用直接返回上次的结果。
         
-        Args:
-            username: 用户名或邮箱
-            password: 密码
-            headless: 是否无头模式
-            timeout: 超时时间
-            
         Returns:
-            str: 登录结果
+            str: 登录结果描述
         """
-        try:
-            from browser_use import Agent
-            from browser_use.llm import ChatOpenAI
-            
-            # 初始化LLM
-            llm = ChatOpenAI(
-                model="gpt-4o-mini",
-                api_key=self.openai_api_key,
-                temperature=0.1,
-                base_url=os.getenv('OPENAI_API_BASE', 'https://api.apiyi.com/v1')
-            )
-            
-            # 获取浏览器配置
-            browser_config = PinterestConfig.get_browser_config(headless=headless, timeout=timeout)
-            
-            # 获取登录任务描述
-            task_description = PinterestConfig.get_login_task(username, password)
-            
-            # 创建浏览器代理
-            agent = Agent(
-                task=task_description,
-                llm=llm,
-                browser_config=browser_config
-            )
-            
-            # 执行登录任务
-            result = await agent.run()
-            
-            # 分析结果
-            if result and "成功" in str(result):
-                return f"Pinterest登录成功！用户：{username}"
-            elif result and ("失败" in str(result) or "错误" in str(result)):
-                return f"Pinterest登录失败：{result}"
-            else:
-                return f"Pinterest登录完成，结果：{result}"
-                
-        except ImportError as e:
-            return f"缺少必要的依赖包：{str(e)}。请安装browser-use和langchain-openai。"
-        except Exception as e:
-            return f"登录过程中发生错误：{str(e)}"
-    
-    async def close(self):
-        """清理资源。"""
-        # 如果需要清理浏览器资源，可以在这里实现
-        pass
+        username = kwargs.get("username")
+        password = kwargs.get("password")
+        headless = kwargs.get("headless", True)
+        timeout = kwargs.get("timeout", 30)
+        
+        if not username or not password:
+            return "错误：必须提供用户名和密码"
+        
+        result = await self.result_cache.run(
+            username, password, lambda: self.alogin(username, password, headless=headless, timeout=timeout)
+        )
+        return str(result)
 
 
 # 便捷函数
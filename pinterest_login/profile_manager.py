@@ -0,0 +1,341 @@
+"""按账号持久化的Chromium配置目录。
+
+会话缓存只保存cookies和localStorage；持久化的 user_data_dir 还保留了设备信任等浏览器状态，
+同一账号再次登录时Pinterest要求验证和重新登录的次数更少。
+
+每个账号对应根目录下的一个子目录，通过锁文件保证同一时间只有一个浏览器使用它
+（同一进程内和跨进程均有效）。每次使用后删除配置目录中的缓存子目录，
+并在全部配置目录超过磁盘上限时按最近使用时间淘汰。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+from config import PinterestConfig
+from metrics import LoginMetrics, get_metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows上只在进程内加锁
+    fcntl = None
+
+
+# 配置目录中记录账号和使用情况的文件
+METADATA_FILE = "profile.json"
+
+# 交给Chromium的 user_data_dir 子目录
+USER_DATA_DIR = "user_data"
+
+
+class ProfileLockedError(Exception):
+    """等待超时，账号的配置目录仍被其他登录占用。"""
+
+
+class BrowserProfile:
+    """一次登录借用的账号配置目录。
+
+    Args:
+        username: 用户名或邮箱
+        path: 配置目录
+        reused: 配置目录是否在本次之前已存在
+    """
+
+    def __init__(self, username: str, path: str, reused: bool):
+        self.username = username
+        self.path = path
+        self.reused = reused
+
+    @property
+    def user_data_dir(self) -> str:
+        """传给Chromium的 user_data_dir。"""
+        return os.path.join(self.path, USER_DATA_DIR)
+
+
+class ProfileManager:
+    """按账号创建、复用并加锁的浏览器配置目录，带磁盘上限和LRU淘汰。
+
+    Args:
+        root: 配置目录的根目录
+        max_total_mb: 全部配置目录的磁盘上限（MB）
+        lock_timeout: 等待同一账号的配置目录被释放的时间（秒）
+        prune_dirs: 每次使用后删除的缓存子目录，相对于 user_data_dir
+        metrics: 指标对象，默认使用 get_metrics()
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_total_mb: float = 2048,
+        lock_timeout: float = 60,
+        prune_dirs: Iterable[str] = (),
+        metrics: Optional[LoginMetrics] = None
+    ):
+        self.root = root
+        self.max_total_bytes = int(max_total_mb * 1024 * 1024)
+        self.lock_timeout = lock_timeout
+        self.prune_dirs = tuple(prune_dirs)
+        self.metrics = metrics or get_metrics()
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._held: Dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock_waits = 0
+        self._evictions = 0
+        self._pruned_bytes = 0
+
+    @classmethod
+    def from_config(
+        cls,
+        root: str,
+        config: Optional[Dict[str, Any]] = None,
+        metrics: Optional[LoginMetrics] = None
+    ) -> "ProfileManager":
+        """按配置创建配置目录管理器。
+
+        Args:
+            root: 配置目录的根目录
+            config: 覆盖 PinterestConfig.PROFILE_CONFIG 的配置项
+            metrics: 指标对象
+
+        Returns:
+            ProfileManager: 配置目录管理器
+        """
+        merged = PinterestConfig.PROFILE_CONFIG.copy()
+        merged.update(config or {})
+        return cls(
+            root,
+            max_total_mb=merged["max_total_mb"],
+            lock_timeout=merged["lock_timeout"],
+            prune_dirs=merged["prune_dirs"],
+            metrics=metrics
+        )
+
+    @asynccontextmanager
+    async def acquire(self, username: str, timeout: Optional[float] = None) -> AsyncIterator[BrowserProfile]:
+        """借用账号的配置目录，不存在时创建；归还时清理缓存并检查磁盘上限。
+
+        Args:
+            username: 用户名或邮箱
+            timeout: 等待配置目录被释放的时间（秒），默认使用 lock_timeout
+
+        Yields:
+            BrowserProfile: 配置目录
+
+        Raises:
+            ProfileLockedError: 等待超时
+        """
+        key = self._key(username)
+        with self.metrics.phase("profile_wait"):
+            await self._lock_profile(key, self.lock_timeout if timeout is None else timeout)
+        try:
+            path = self._path(key)
+            reused = os.path.isdir(os.path.join(path, USER_DATA_DIR))
+            with self._lock:
+                if reused:
+                    self._hits += 1
+                else:
+                    self._misses += 1
+            self.metrics.inc("profile_acquires_total", result="hit" if reused else "miss")
+            os.makedirs(os.path.join(path, USER_DATA_DIR), mode=0o700, exist_ok=True)
+            yield BrowserProfile(username, path, reused)
+        finally:
+            try:
+                await asyncio.to_thread(self._finish_use, key, username)
+            finally:
+                self._unlock_profile(key)
+            await asyncio.to_thread(self.enforce_quota)
+
+    def sizes(self) -> Dict[str, int]:
+        """各账号配置目录最近一次使用后的大小。
+
+        Returns:
+            Dict[str, int]: 用户名 -> 字节数
+        """
+        return {
+            metadata.get("username", key): metadata.get("size_bytes", 0)
+            for key, metadata in self._profiles().items()
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """获取配置目录的使用统计。
+
+        Returns:
+            Dict[str, Any]: 配置目录数量、总大小、命中率、淘汰次数和清理的缓存大小
+        """
+        profiles = self._profiles()
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "profiles": len(profiles),
+                "total_bytes": sum(metadata.get("size_bytes", 0) for metadata in profiles.values()),
+                "max_total_bytes": self.max_total_bytes,
+                "in_use": len(self._held),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "lock_waits": self._lock_waits,
+                "evictions": self._evictions,
+                "pruned_bytes": self._pruned_bytes,
+            }
+
+    def enforce_quota(self) -> int:
+        """按最近使用时间淘汰配置目录，直到总大小不超过磁盘上限。正在使用的配置目录不会被淘汰。
+
+        Returns:
+            int: 淘汰的配置目录数量
+        """
+        profiles = self._profiles()
+        total = sum(metadata.get("size_bytes", 0) for metadata in profiles.values())
+        evicted = 0
+        for key, metadata in sorted(profiles.items(), key=lambda item: item[1].get("last_used", 0)):
+            if total <= self.max_total_bytes:
+                break
+            if not self._try_lock(key):
+                continue
+            try:
+                self._delete_profile(key)
+            finally:
+                self._unlock_profile(key)
+            total -= metadata.get("size_bytes", 0)
+            evicted += 1
+
+        if evicted:
+            with self._lock:
+                self._evictions += evicted
+            self.metrics.inc("profile_evictions_total", evicted)
+            self.logger.debug(f"淘汰{evicted}个浏览器配置目录，剩余{total}字节")
+        if total > self.max_total_bytes:
+            self.logger.warning(f"浏览器配置目录共{total}字节，超过上限{self.max_total_bytes}字节")
+        return evicted
+
+    def remove(self, username: str) -> bool:
+        """删除账号的配置目录。
+
+        Args:
+            username: 用户名或邮箱
+
+        Returns:
+            bool: 是否存在并已删除；正在使用时返回False
+        """
+        key = self._key(username)
+        if not os.path.isdir(self._path(key)) or not self._try_lock(key):
+            return False
+        try:
+            self._delete_profile(key)
+        finally:
+            self._unlock_profile(key)
+        return True
+
+    def _finish_use(self, key: str, username: str) -> None:
+        """清理缓存子目录，并更新配置目录的大小和最近使用时间。"""
+        path = self._path(key)
+        user_data_dir = os.path.join(path, USER_DATA_DIR)
+        pruned = 0
+        for relative in self.prune_dirs:
+            cache_dir = os.path.join(user_data_dir, relative)
+            if os.path.isdir(cache_dir):
+                pruned += _dir_size(cache_dir)
+                shutil.rmtree(cache_dir, ignore_errors=True)
+        if pruned:
+            with self._lock:
+                self._pruned_bytes += pruned
+
+        metadata = self._read_metadata(key) or {"username": username, "created_at": time.time()}
+        metadata["last_used"] = time.time()
+        metadata["uses"] = metadata.get("uses", 0) + 1
+        metadata["size_bytes"] = _dir_size(user_data_dir)
+        self._write_metadata(key, metadata)
+
+    def _profiles(self) -> Dict[str, Dict[str, Any]]:
+        """根目录下全部配置目录的元数据。"""
+        if not os.path.isdir(self.root):
+            return {}
+        profiles = {}
+        for name in os.listdir(self.root):
+            if os.path.isdir(self._path(name)):
+                profiles[name] = self._read_metadata(name) or {}
+        return profiles
+
+    async def _lock_profile(self, key: str, timeout: float) -> None:
+        """获取配置目录的锁，被占用时轮询等待。"""
+        if self._try_lock(key):
+            return
+        with self._lock:
+            self._lock_waits += 1
+        deadline = time.monotonic() + timeout
+        while not self._try_lock(key):
+            if time.monotonic() >= deadline:
+                raise ProfileLockedError(f"浏览器配置目录被占用超过{timeout}秒")
+            await asyncio.sleep(0.05)
+
+    def _try_lock(self, key: str) -> bool:
+        with self._lock:
+            if key in self._held:
+                return False
+            os.makedirs(self.root, mode=0o700, exist_ok=True)
+            fd = os.open(os.path.join(self.root, f"{key}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    os.close(fd)
+                    return False
+            self._held[key] = fd
+            return True
+
+    def _unlock_profile(self, key: str) -> None:
+        with self._lock:
+            fd = self._held.pop(key, None)
+        if fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def _delete_profile(self, key: str) -> None:
+        shutil.rmtree(self._path(key), ignore_errors=True)
+
+    def _read_metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self._path(key), METADATA_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_metadata(self, key: str, metadata: Dict[str, Any]) -> None:
+        """原子写入元数据文件。"""
+        path = os.path.join(self._path(key), METADATA_FILE)
+        tmp_path = f"{path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return hashlib.sha256(username.strip().lower().encode("utf-8")).hexdigest()
+
+
+def _dir_size(path: str) -> int:
+    """目录下全部文件的大小之和。"""
+    total = 0
+    for dir_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                total += os.lstat(os.path.join(dir_path, file_name)).st_size
+            except OSError:
+                pass
+    return total
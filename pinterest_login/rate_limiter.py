@@ -0,0 +1,493 @@
+"""登录节奏控制：按账号和出口（IP或代理）的令牌桶，以及按结果自适应的登录速率。
+
+并发登录过快时Pinterest会限流并弹出验证。每次登录先等待账号的令牌桶
+（同一账号两次登录之间的平均间隔），再等待出口的令牌桶（该出口每秒的登录次数）。
+出口的登录速率按AIMD调整：最近的登录中验证挑战、超时、无法判定等限流迹象的比例超过阈值时速率减半，
+比例较低时每次正常结果把速率加上一个小步长，从而逼近不触发限流的最高持续速率。
+
+指定 state_path 时，出口的令牌桶和速率保存在文件中，同一台机器上的多个进程（如 ShardedLoginRunner
+的工作进程、多个 work_queue 工作进程）共用同一个出口速率；账号的令牌桶仍在进程内。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional, Tuple, TypeVar
+
+from config import PinterestConfig
+from deadline import current_queue_clock
+from login_result import FailureCategory, LoginResult
+from metrics import LoginMetrics, get_metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows上只在进程内加锁
+    fcntl = None
+
+
+# 视为限流迹象的失败类别
+THROTTLE_CATEGORIES = frozenset({
+    FailureCategory.CHALLENGE,
+    FailureCategory.PAGE_ERROR,
+    FailureCategory.TIMEOUT,
+    FailureCategory.UNDETERMINED,
+    FailureCategory.UNKNOWN,
+})
+
+# 最多保留的账号令牌桶数量，超出时丢弃已经装满的桶
+MAX_ACCOUNT_BUCKETS = 10000
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """令牌桶。
+
+    reserve() 立即预留一个令牌并返回需要等待的时间，令牌数可以为负，
+    因此排队的请求按到达顺序依次获得令牌。
+
+    Args:
+        rate: 每秒补充的令牌数
+        burst: 桶容量
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """预留一个令牌。
+
+        Args:
+            now: 当前时间（time.monotonic()）
+
+        Returns:
+            float: 需要等待的秒数
+        """
+        self._refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def set_rate(self, rate: float, now: float) -> None:
+        """修改补充速率，已经过去的时间按旧速率结算。"""
+        self._refill(now)
+        self.rate = rate
+
+    def refund(self) -> None:
+        """归还未使用的令牌，用于等待期间被取消的请求。"""
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+    def _refill(self, now: float) -> None:
+        # 共享状态时其他进程可能已用更晚的时间更新过
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+
+class EgressBucket(TokenBucket):
+    """出口的令牌桶，另外记录上次降速的时间。"""
+
+    def __init__(self, rate: float, burst: float):
+        super().__init__(rate, burst)
+        self.last_decrease = 0.0
+
+
+class SharedBucketStore:
+    """同一台机器上多个进程共用的出口令牌桶。
+
+    每次预留令牌或调整速率都在文件锁内读取状态文件、修改并经临时文件原子写回。
+    时间使用 time.monotonic()，同一台机器上的各进程一致；机器重启后旧状态自动作废。
+
+    Args:
+        path: 状态文件路径，文件和锁文件在第一次使用时创建
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+
+    def update(self, egress: str, default: EgressBucket, func: Callable[[EgressBucket], T]) -> Tuple[T, EgressBucket]:
+        """在文件锁内对出口的令牌桶执行 func 并写回。
+
+        Args:
+            egress: 出口标识
+            default: 文件中还没有该出口时使用的令牌桶
+            func: 修改令牌桶的函数
+
+        Returns:
+            Tuple[T, EgressBucket]: (func 的返回值, 修改后的令牌桶)
+        """
+        with self._file_lock():
+            state = self._read()
+            bucket = self._bucket(state.get(egress), default)
+            value = func(bucket)
+            state[egress] = {
+                "rate": bucket.rate,
+                "tokens": bucket.tokens,
+                "updated": bucket.updated,
+                "last_decrease": bucket.last_decrease,
+            }
+            self._write(state)
+        return value, bucket
+
+    @staticmethod
+    def _bucket(entry: Optional[Dict[str, float]], default: EgressBucket) -> EgressBucket:
+        bucket = EgressBucket(default.rate, default.burst)
+        bucket.tokens, bucket.updated, bucket.last_decrease = default.tokens, default.updated, default.last_decrease
+        # 记录的时间晚于当前时间说明机器已重启，monotonic时钟重新计时
+        if entry is not None and entry.get("updated", 0) <= time.monotonic():
+            bucket.rate = entry.get("rate", bucket.rate)
+            bucket.tokens = min(bucket.burst, entry.get("tokens", bucket.tokens))
+            bucket.updated = entry.get("updated", bucket.updated)
+            bucket.last_decrease = entry.get("last_decrease", 0.0)
+        return bucket
+
+    def _read(self) -> Dict[str, Dict[str, float]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            self.logger.debug(f"忽略无法解析的限速状态文件 {self.path}: {e}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, state: Dict[str, Dict[str, float]]) -> None:
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+class _EgressState:
+    """一个出口的令牌桶、最近结果和统计。"""
+
+    def __init__(self, rate: float, burst: float, window: int):
+        self.bucket = EgressBucket(rate, burst)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.waiting = 0
+        self.acquired = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.decreases = 0
+        self.increases = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        outcomes = len(self.outcomes)
+        return {
+            "rate": round(self.bucket.rate, 4),
+            "queue_depth": self.waiting,
+            "acquired": self.acquired,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "avg_wait_seconds": round(self.wait_seconds / self.acquired, 3) if self.acquired else 0.0,
+            "max_wait_seconds": round(self.max_wait, 3),
+            "throttle_rate": sum(self.outcomes) / outcomes if outcomes else 0.0,
+            "decreases": self.decreases,
+            "increases": self.increases,
+        }
+
+
+class AdaptiveRateLimiter:
+    """按账号和出口限制登录速率，并根据登录结果自适应调整出口速率。
+
+    Args:
+        rate: 每个出口的初始登录速率（次/秒）
+        burst: 出口令牌桶容量，即空闲后允许的突发登录数
+        min_rate: 速率下限
+        max_rate: 速率上限
+        account_interval: 同一账号两次登录之间的平均间隔（秒）
+        account_burst: 同一账号允许连续进行的登录数，如失败后立即重试一次
+        window: 计算限流迹象比例的最近结果数
+        min_samples: 开始调整速率前至少需要的结果数
+        backoff_threshold: 限流迹象比例达到该值时降低速率
+        decrease_factor: 降低速率时乘以的系数
+        increase_step: 每次正常结果增加的速率
+        cooldown: 两次降低速率之间的最短间隔（秒）
+        enabled: 是否限速，关闭时 slot() 不等待
+        state_path: 出口令牌桶的共享状态文件，同一台机器上使用同一文件的进程共用出口速率；
+            None表示只在进程内限速
+        metrics: 指标对象，默认使用 get_metrics()
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: float = 4,
+        min_rate: float = 0.05,
+        max_rate: float = 5.0,
+        account_interval: float = 10,
+        account_burst: float = 2,
+        window: int = 20,
+        min_samples: int = 5,
+        backoff_threshold: float = 0.2,
+        decrease_factor: float = 0.5,
+        increase_step: float = 0.05,
+        cooldown: float = 30,
+        enabled: bool = True,
+        state_path: Optional[str] = None,
+        metrics: Optional[LoginMetrics] = None
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.account_interval = account_interval
+        self.account_burst = account_burst
+        self.window = window
+        self.min_samples = min_samples
+        self.backoff_threshold = backoff_threshold
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.cooldown = cooldown
+        self.enabled = enabled
+        self.store = SharedBucketStore(state_path) if state_path else None
+        self.metrics = metrics or get_metrics()
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._egresses: Dict[str, _EgressState] = {}
+        self._accounts: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._account_waiting = 0
+        self._account_wait_seconds = 0.0
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Optional[Dict[str, Any]] = None,
+        metrics: Optional[LoginMetrics] = None
+    ) -> "AdaptiveRateLimiter":
+        """按配置创建限速器。
+
+        Args:
+            config: 覆盖 PinterestConfig.RATE_LIMIT_CONFIG 的配置项
+            metrics: 指标对象
+
+        Returns:
+            AdaptiveRateLimiter: 限速器
+        """
+        merged = PinterestConfig.RATE_LIMIT_CONFIG.copy()
+        merged.update(config or {})
+        return cls(metrics=metrics, **merged)
+
+    @asynccontextmanager
+    async def slot(self, username: str, egress: str = "default") -> AsyncIterator[float]:
+        """等待账号和出口的令牌后执行一次登录。
+
+        Args:
+            username: 用户名或邮箱
+            egress: 出口标识，如代理地址；同一出口共享登录速率
+
+        Yields:
+            float: 本次等待的总时间（秒）
+        """
+        if not self.enabled:
+            yield 0.0
+            return
+
+        # 外层的时间上限扣除排队时间
+        clock = current_queue_clock()
+        if clock is not None:
+            clock.enter()
+        try:
+            account_waited = 0.0
+            if self.account_interval > 0:
+                with self._lock:
+                    bucket = self._account_bucket(username.strip().lower())
+                    self._account_waiting += 1
+                try:
+                    account_waited = await self._wait(bucket)
+                finally:
+                    with self._lock:
+                        self._account_waiting -= 1
+
+            with self._lock:
+                state = self._egress(egress)
+                state.waiting += 1
+            try:
+                egress_waited = await self._wait_egress(egress, state)
+            finally:
+                with self._lock:
+                    state.waiting -= 1
+        finally:
+            if clock is not None:
+                clock.exit()
+
+        with self._lock:
+            self._account_wait_seconds += account_waited
+            state.acquired += 1
+            state.wait_seconds += egress_waited
+            state.max_wait = max(state.max_wait, egress_waited)
+        waited = account_waited + egress_waited
+        self.metrics.observe("rate_limit_wait_seconds", waited, egress=egress)
+        yield waited
+
+    def record(self, result: LoginResult, egress: str = "default") -> None:
+        """记录一次登录结果，并按限流迹象的比例调整该出口的速率。
+
+        Args:
+            result: 登录结果，使用缓存或输入无效的结果不计入
+            egress: 出口标识
+        """
+        category = getattr(result, "failure_category", None)
+        if not self.enabled or getattr(result, "from_cache", False) or category == FailureCategory.INVALID_INPUT:
+            return
+
+        throttled = category in THROTTLE_CATEGORIES
+        with self._lock:
+            state = self._egress(egress)
+            state.outcomes.append(throttled)
+            if len(state.outcomes) < self.min_samples:
+                return
+            ratio = sum(state.outcomes) / len(state.outcomes)
+            decrease = ratio >= self.backoff_threshold
+            # 限流迹象较少时逐步提高速率
+            if not decrease and (throttled or ratio >= self.backoff_threshold / 2):
+                return
+
+        if not self._update_egress(egress, state, lambda bucket: self._adjust(bucket, decrease)):
+            return
+        with self._lock:
+            if not decrease:
+                state.increases += 1
+                return
+            state.outcomes.clear()
+            state.decreases += 1
+            rate = state.bucket.rate
+
+        self.metrics.inc("rate_limit_backoffs_total", egress=egress)
+        self.logger.info(f"出口 {egress} 限流迹象比例{ratio:.0%}，登录速率降低到{rate:.3f}次/秒")
+
+    def stats(self) -> Dict[str, Any]:
+        """获取排队和速率统计。
+
+        Returns:
+            Dict[str, Any]: 各出口的当前速率、队列长度、等待时间和速率调整次数，以及账号级的排队情况
+        """
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "egress": {name: state.to_dict() for name, state in self._egresses.items()},
+                "accounts": {
+                    "tracked": len(self._accounts),
+                    "queue_depth": self._account_waiting,
+                    "wait_seconds": round(self._account_wait_seconds, 3),
+                },
+            }
+
+    def _adjust(self, bucket: EgressBucket, decrease: bool) -> bool:
+        """按AIMD调整出口速率，返回是否调整了。"""
+        now = time.monotonic()
+        if decrease:
+            if now - bucket.last_decrease < self.cooldown:
+                return False
+            bucket.set_rate(max(self.min_rate, bucket.rate * self.decrease_factor), now)
+            bucket.last_decrease = now
+            return True
+        if bucket.rate >= self.max_rate:
+            return False
+        bucket.set_rate(min(self.max_rate, bucket.rate + self.increase_step), now)
+        return True
+
+    def _update_egress(self, egress: str, state: _EgressState, func: Callable[[EgressBucket], T]) -> T:
+        """对出口的令牌桶执行 func；有共享状态文件时在文件锁内执行，并把结果同步到本进程。"""
+        if self.store is None:
+            with self._lock:
+                return func(state.bucket)
+        try:
+            value, bucket = self.store.update(egress, state.bucket, func)
+        except OSError as e:
+            self.logger.warning(f"无法读写共享的限速状态 {self.store.path}，本次只在进程内限速: {e}")
+            with self._lock:
+                return func(state.bucket)
+        with self._lock:
+            state.bucket = bucket
+        return value
+
+    async def _wait_egress(self, egress: str, state: _EgressState) -> float:
+        """预留出口的一个令牌并等待到可用；共享状态时读写文件不在事件循环中进行。"""
+        if self.store is None:
+            return await self._wait(state.bucket)
+        delay = await asyncio.to_thread(
+            self._update_egress, egress, state, lambda bucket: bucket.reserve(time.monotonic())
+        )
+        if delay <= 0:
+            return 0.0
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self._update_egress(egress, state, lambda bucket: bucket.refund())
+            raise
+        return delay
+
+    async def _wait(self, bucket: TokenBucket) -> float:
+        """预留一个令牌并等待到可用，返回等待的秒数。"""
+        with self._lock:
+            delay = bucket.reserve(time.monotonic())
+        if delay <= 0:
+            return 0.0
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            with self._lock:
+                bucket.refund()
+            raise
+        return delay
+
+    def _egress(self, egress: str) -> _EgressState:
+        state = self._egresses.get(egress)
+        if state is None:
+            state = _EgressState(self.rate, self.burst, self.window)
+            self._egresses[egress] = state
+        return state
+
+    def _account_bucket(self, key: str) -> TokenBucket:
+        bucket = self._accounts.get(key)
+        if bucket is None:
+            bucket = TokenBucket(1 / self.account_interval, self.account_burst)
+            self._accounts[key] = bucket
+            if len(self._accounts) > MAX_ACCOUNT_BUCKETS:
+                self._drop_full_buckets()
+        self._accounts.move_to_end(key)
+        return bucket
+
+    def _drop_full_buckets(self) -> None:
+        # 装满的桶与新建的桶等价，可以直接丢弃
+        now = time.monotonic()
+        for key in [key for key, bucket in self._accounts.items() if bucket.is_full(now)]:
+            del self._accounts[key]
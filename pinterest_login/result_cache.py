@@ -0,0 +1,150 @@
+"""登录结果的短期缓存与并发请求合并（single-flight）。
+
+同一个crew中的多个代理常在几秒内对同一账号调用登录工具。同一组凭据的并发调用只执行一次登录，
+其余调用等待同一个结果；登录完成后结果在短时间内直接返回给重复的调用。
+
+缓存键是以进程内随机密钥计算的凭据HMAC，内存中不以明文密码作为键。
+CrewAI自带的工具缓存以明文参数（包括密码）作为键，工具的 cache_function 返回False以停用它，
+重复调用由本缓存应答。
+"""
+
+import asyncio
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from login_result import LoginStatus
+from metrics import LoginMetrics, get_metrics
+
+
+def never_cache(_args: Any = None, _result: Any = None) -> bool:
+    """CrewAI工具的 cache_function：不让CrewAI以明文参数缓存登录结果。"""
+    return False
+
+
+class LoginResultCache:
+    """按凭据合并并发登录，并在有效期内缓存结果。
+
+    只缓存登录流程得到明确结论的结果（成功或失败）；流程出错、超时等 ERROR 结果不缓存，
+    下次调用重新登录。
+
+    Args:
+        ttl: 结果有效期（秒），0表示只合并并发调用、不缓存
+        max_entries: 最多缓存的结果数量
+        metrics: 指标对象，默认使用 get_metrics()
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 1000, metrics: Optional[LoginMetrics] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.metrics = metrics or get_metrics()
+
+        self._secret = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self._hits = 0
+        self._joins = 0
+        self._misses = 0
+
+    async def run(
+        self,
+        username: str,
+        password: str,
+        login: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """返回这组凭据的登录结果：有效期内的缓存结果、进行中登录的结果，或执行 login() 的结果。
+
+        登录在独立的任务中执行，某个调用方被取消不影响等待同一结果的其他调用方。
+
+        Args:
+            username: 用户名或邮箱
+            password: 密码
+            login: 执行一次登录的协程函数
+
+        Returns:
+            Any: login() 的返回值，通常为 LoginResult
+        """
+        key = self._key(username, password)
+        loop = asyncio.get_running_loop()
+        source = "login"
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                self._hits += 1
+                source = "cache"
+            else:
+                task = self._inflight.get(key)
+                if task is not None and task.get_loop() is loop:
+                    self._joins += 1
+                    source = "inflight"
+                else:
+                    self._misses += 1
+                    task = loop.create_task(login())
+                    self._inflight[key] = task
+                    task.add_done_callback(lambda done: self._finish(key, done))
+
+        if source != "login":
+            self.metrics.inc("result_cache_hits_total", source=source)
+        if cached is not None:
+            return cached
+        return await asyncio.shield(task)
+
+    def invalidate(self, username: str, password: str) -> None:
+        """移除这组凭据的缓存结果。"""
+        with self._lock:
+            self._entries.pop(self._key(username, password), None)
+
+    def clear(self) -> None:
+        """清空缓存结果，进行中的登录不受影响。"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """获取缓存统计。
+
+        Returns:
+            Dict[str, int]: 缓存命中、合并到进行中登录、实际执行登录的次数，以及当前缓存和进行中的数量
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "joins": self._joins,
+                "misses": self._misses,
+                "size": len(self._entries),
+                "inflight": len(self._inflight),
+            }
+
+    def _key(self, username: str, password: str) -> str:
+        message = f"{username.strip().lower()}\0{password}".encode("utf-8")
+        return hmac.new(self._secret, message, hashlib.sha256).hexdigest()
+
+    def _lookup(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _finish(self, key: str, task: "asyncio.Task[Any]") -> None:
+        """登录任务结束：移出进行中列表，得到明确结论的结果写入缓存。"""
+        with self._lock:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+            if task.cancelled() or task.exception() is not None or self.ttl <= 0:
+                return
+            result = task.result()
+            if getattr(result, "status", LoginStatus.ERROR) == LoginStatus.ERROR:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
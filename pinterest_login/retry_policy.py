@@ -0,0 +1,193 @@
+"""登录失败分类与按类别的重试策略。
+
+异常和代理的错误信息按类别区分：密码错误、验证码/两步验证、网络错误、LLM服务错误、超时等。
+只有网络和LLM服务这类短暂性错误会按指数退避加随机抖动重试；
+密码错误、验证挑战以及LLM密钥无效、无权限或额度用尽重试也不会成功，直接返回，避免再浪费一次浏览器和LLM调用。
+
+异常按类名和所在模块识别，不需要导入openai、httpx或Playwright。
+"""
+
+import asyncio
+import random
+import threading
+from typing import Dict, Iterable, Optional
+
+from config import PinterestConfig
+from login_result import FailureCategory
+from metrics import LoginMetrics, get_metrics
+
+
+# LLM服务拒绝请求的异常类名：密钥无效或无权限，需要修改配置
+LLM_CONFIG_ERRORS = frozenset({"AuthenticationError", "PermissionDeniedError"})
+
+# LLM服务相关的短暂性异常类名（openai、anthropic、browser-use的LLM封装）
+LLM_PROVIDER_ERRORS = frozenset({
+    "APIError", "APIConnectionError", "APITimeoutError", "APIStatusError", "RateLimitError",
+    "InternalServerError", "ServiceUnavailableError", "ModelProviderError", "ModelRateLimitError",
+})
+
+# 网络相关的异常类名（httpx、aiohttp、websockets）
+NETWORK_ERRORS = frozenset({
+    "TransportError", "NetworkError", "ConnectError", "ConnectTimeout", "ReadError", "ReadTimeout",
+    "WriteError", "RemoteProtocolError", "ProxyError", "ClientConnectionError", "ServerDisconnectedError",
+    "ConnectionClosed",
+})
+
+# 错误信息中表示网络问题的片段，Playwright的网络错误只能通过信息识别
+NETWORK_MESSAGES = ("net::err_", "econnreset", "econnrefused", "connection reset", "connection refused",
+                    "name or service not known", "temporary failure in name resolution")
+
+# 错误信息中表示LLM服务拒绝请求的片段；额度用尽时openai抛出的也是 RateLimitError，只能通过信息区分
+LLM_CONFIG_MESSAGES = ("insufficient_quota", "invalid_api_key", "incorrect api key", "authenticationerror",
+                       "permissiondeniederror", "error code: 401", "error code: 403")
+
+# 错误信息中表示LLM服务短暂性问题的片段，用于代理执行历史中记录的错误
+LLM_PROVIDER_MESSAGES = ("ratelimiterror", "rate limit", "apiconnectionerror", "apistatuserror",
+                         "modelprovidererror", "error code: 429", "error code: 500",
+                         "error code: 502", "error code: 503", "error code: 529")
+
+
+# 计数器名称 -> 指标名称
+_COUNTER_METRICS = {"failures": "failures_total", "retries": "retries_total", "gave_up": "retries_exhausted_total"}
+
+
+def _class_names(exc: BaseException) -> Iterable[str]:
+    return (cls.__name__ for cls in type(exc).__mro__)
+
+
+def classify_exception(exc: BaseException) -> FailureCategory:
+    """判断异常的失败类别。
+
+    Args:
+        exc: 登录过程中抛出的异常
+
+    Returns:
+        FailureCategory: 失败类别，无法识别时为 UNKNOWN
+    """
+    if isinstance(exc, ImportError):
+        return FailureCategory.DEPENDENCY
+
+    names = set(_class_names(exc))
+    if names & LLM_CONFIG_ERRORS or _matches(str(exc), LLM_CONFIG_MESSAGES):
+        return FailureCategory.LLM_CONFIG
+    if names & LLM_PROVIDER_ERRORS:
+        return FailureCategory.LLM_PROVIDER
+    if names & NETWORK_ERRORS:
+        return FailureCategory.NETWORK
+
+    category = classify_message(str(exc))
+    if category is not None:
+        return category
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)) or "TimeoutError" in names:
+        return FailureCategory.TIMEOUT
+    if isinstance(exc, ConnectionError):
+        return FailureCategory.NETWORK
+    return FailureCategory.UNKNOWN
+
+
+def classify_message(message: str) -> Optional[FailureCategory]:
+    """根据错误信息判断是否为网络或LLM服务错误。
+
+    Args:
+        message: 错误信息，如代理执行历史中记录的错误
+
+    Returns:
+        Optional[FailureCategory]: LLM_CONFIG、LLM_PROVIDER 或 NETWORK，无法判断时返回None
+    """
+    if _matches(message, LLM_CONFIG_MESSAGES):
+        return FailureCategory.LLM_CONFIG
+    if _matches(message, LLM_PROVIDER_MESSAGES):
+        return FailureCategory.LLM_PROVIDER
+    if _matches(message, NETWORK_MESSAGES):
+        return FailureCategory.NETWORK
+    return None
+
+
+def _matches(message: str, fragments: Iterable[str]) -> bool:
+    text = message.lower()
+    return any(fragment in text for fragment in fragments)
+
+
+class RetryPolicy:
+    """按失败类别决定是否重试以及重试前的等待时间。
+
+    Args:
+        policies: 失败类别的值 -> {"max_retries", "base_delay", "max_delay"}，
+            未列出的类别不重试
+        jitter: 是否使用全随机抖动（等待时间在0到退避上限之间均匀分布）
+        metrics: 指标对象，默认使用 get_metrics()
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, Dict[str, float]]] = None,
+        jitter: bool = True,
+        metrics: Optional[LoginMetrics] = None
+    ):
+        self.policies = dict(PinterestConfig.RETRY_POLICIES if policies is None else policies)
+        self.jitter = jitter
+        self.metrics = metrics or get_metrics()
+
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def next_delay(
+        self,
+        category: Optional[FailureCategory],
+        attempt: int,
+        remaining: Optional[float] = None
+    ) -> Optional[float]:
+        """第 attempt 次尝试失败后，下一次重试前的等待时间。
+
+        Args:
+            category: 本次失败的类别，成功时为None
+            attempt: 已进行的尝试次数，从1开始
+            remaining: 登录时间上限的剩余秒数，等待后已没有剩余时间时不再重试；None表示不限
+
+        Returns:
+            Optional[float]: 等待秒数，不应重试时返回None
+        """
+        if category is None:
+            return None
+        self._count(category, "failures")
+        policy = self.policies.get(category.value)
+        if not policy or attempt > policy.get("max_retries", 0):
+            if policy and policy.get("max_retries", 0):
+                self._count(category, "gave_up")
+            return None
+
+        ceiling = min(policy.get("max_delay", 60), policy.get("base_delay", 1) * 2 ** (attempt - 1))
+        delay = random.uniform(0, ceiling) if self.jitter else ceiling
+        if remaining is not None and delay >= remaining:
+            self._count(category, "gave_up")
+            return None
+        self._count(category, "retries")
+        return delay
+
+    def can_retry(self, category: Optional[FailureCategory], attempts: int) -> bool:
+        """已进行 attempts 次尝试后，该类别的失败是否还允许重试，不计入统计。
+
+        Args:
+            category: 失败类别，成功时为None
+            attempts: 已进行的尝试次数
+
+        Returns:
+            bool: 该类别可以重试且尚未用完重试次数
+        """
+        policy = self.policies.get(category.value) if category is not None else None
+        return bool(policy) and attempts <= policy.get("max_retries", 0)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """按失败类别统计的失败、重试和放弃次数。
+
+        Returns:
+            Dict[str, Dict[str, int]]: 失败类别 -> {"failures", "retries", "gave_up"}
+        """
+        with self._lock:
+            return {category: dict(counters) for category, counters in self._counters.items()}
+
+    def _count(self, category: FailureCategory, name: str) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(category.value, {"failures": 0, "retries": 0, "gave_up": 0})
+            counters[name] += 1
+        self.metrics.inc(_COUNTER_METRICS[name], category=category.value)
@@ -0,0 +1,218 @@
+"""基于Playwright的脚本化Pinterest登录。
+
+直接使用 PinterestConfig.SELECTORS 填写并提交登录表单，不调用LLM。
+页面结构与预期不符时抛出 LoginLayoutError，由调用方回退到browser-use代理；
+页面要求验证码或两步验证时抛出 LoginChallengeError，代理也无法完成，调用方直接返回失败。
+只有字段上的错误提示或错误信息明确指出密码错误、账号不存在时才判定为凭据错误；
+其他错误信息（如服务繁忙）抛出 LoginPageError，调用方按可重试的错误返回，不记入失败缓存。
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from config import PinterestConfig
+from metrics import LoginMetrics, get_metrics
+
+
+class LoginLayoutError(Exception):
+    """登录页面缺少预期元素或结果无法判定。"""
+
+
+class LoginChallengeError(Exception):
+    """页面要求验证码或两步验证。"""
+
+
+class LoginPageError(Exception):
+    """页面提示了错误，但不能确认是用户名或密码错误。"""
+
+
+class ScriptedLoginEngine:
+    """使用固定选择器执行登录的引擎。
+
+    Args:
+        selectors: 选择器配置，默认使用 PinterestConfig.SELECTORS
+        login_url: 登录页面地址，默认使用 PinterestConfig.PINTEREST_LOGIN_URL
+        element_timeout: 等待表单元素出现的时间（秒）
+        metrics: 记录导航、填表和结果判定耗时的指标对象，默认使用 get_metrics()
+        credential_markers: 表示凭据有误的错误信息片段，默认使用 PinterestConfig.CREDENTIAL_ERROR_MARKERS
+    """
+
+    def __init__(
+        self,
+        selectors: Optional[Dict[str, str]] = None,
+        login_url: Optional[str] = None,
+        element_timeout: float = PinterestConfig.SCRIPTED_ELEMENT_TIMEOUT,
+        metrics: Optional[LoginMetrics] = None,
+        credential_markers: Optional[Iterable[str]] = None
+    ):
+        self.selectors = selectors or PinterestConfig.SELECTORS
+        self.login_url = login_url or PinterestConfig.PINTEREST_LOGIN_URL
+        self.element_timeout = element_timeout
+        self.metrics = metrics or get_metrics()
+        self.credential_markers = tuple(
+            marker.lower() for marker in (credential_markers or PinterestConfig.CREDENTIAL_ERROR_MARKERS)
+        )
+
+    async def login(self, page: Any, username: str, password: str, timeout: int) -> tuple[bool, str]:
+        """在给定页面上完成登录。
+
+        Args:
+            page: Playwright页面
+            username: 用户名或邮箱
+            password: 密码
+            timeout: 超时时间（秒）
+
+        Returns:
+            tuple[bool, str]: (是否登录成功, 失败时的页面错误信息)
+
+        Raises:
+            LoginLayoutError: 找不到表单元素，或提交后既未出现成功标识也未出现错误信息
+            LoginChallengeError: 提交后页面要求验证码或两步验证
+        """
+        with self.metrics.phase("navigate"):
+            await page.goto(self.login_url, wait_until="domcontentloaded", timeout=timeout * 1000)
+
+        with self.metrics.phase("submit_form"):
+            await self._wait_for(page, "username_input")
+            await page.fill(self.selectors["username_input"], username)
+            await self._wait_for(page, "password_input")
+            await page.fill(self.selectors["password_input"], password)
+            await self._wait_for(page, "submit_button")
+            await page.click(self.selectors["submit_button"])
+
+        return await self.read_outcome(page, timeout)
+
+    async def read_outcome(self, page: Any, timeout: float) -> tuple[bool, str]:
+        """根据成功标识和错误信息判定登录结果。
+
+        Args:
+            page: Playwright页面
+            timeout: 等待结果的时间（秒）
+
+        Returns:
+            tuple[bool, str]: (是否登录成功, 失败时的页面错误信息)
+
+        Raises:
+            LoginLayoutError: 超时仍无法判定结果
+            LoginChallengeError: 页面要求验证码或两步验证
+            LoginPageError: 页面提示的错误不是凭据错误
+        """
+        success_selector = self.selectors["success_indicator"]
+        outcome_selector = ", ".join(filter(None, (
+            success_selector,
+            self.selectors["error_message"],
+            self.selectors.get("credential_error"),
+            self.selectors.get("challenge_indicator"),
+        )))
+
+        try:
+            with self.metrics.phase("verify"):
+                await page.wait_for_selector(outcome_selector, state="visible", timeout=timeout * 1000)
+        except Exception as e:
+            raise LoginLayoutError(f"无法判定登录结果：{str(e)}") from e
+
+        if await page.query_selector(success_selector) is not None:
+            return True, ""
+
+        error_text = await self._credential_error(page)
+        if error_text is not None:
+            return False, error_text
+        await self._check_challenge(page)
+        raise LoginLayoutError("无法判定登录结果：页面上的结果标识已消失")
+
+    async def watch(self, context: Any, interval: float = 0.5) -> tuple[bool, str]:
+        """监视浏览器上下文中的页面，直到可以判定登录结果。
+
+        页面上出现可见的成功标识或凭据错误信息时立即返回；页面在访问过登录页之后跳转到其他地址时，
+        等待成功标识出现。与代理并行运行，由调用方在不再需要时取消。
+
+        Args:
+            context: Playwright浏览器上下文
+            interval: 检查间隔（秒）
+
+        Returns:
+            tuple[bool, str]: (是否登录成功, 失败时的页面错误信息)
+
+        Raises:
+            LoginChallengeError: 页面要求验证码或两步验证
+        """
+        login_path = urlsplit(self.login_url).path.rstrip("/")
+        seen_login = False
+        while True:
+            for page in list(context.pages):
+                try:
+                    outcome = await self._visible_outcome(page)
+                    if outcome is not None:
+                        return outcome
+
+                    path = urlsplit(page.url).path.rstrip("/")
+                    if login_path and path == login_path:
+                        seen_login = True
+                    elif seen_login and page.url.startswith("http"):
+                        # 离开登录页后，等待跳转后的页面加载出成功标识
+                        return await self.read_outcome(page, PinterestConfig.AGENT_VERIFY_TIMEOUT)
+                except LoginChallengeError:
+                    raise
+                except (LoginLayoutError, LoginPageError):
+                    # 不能确认是凭据错误的页面错误交给代理继续处理（如重新提交），代理结束后再判定
+                    continue
+                except Exception:
+                    # 页面可能正在跳转或已被关闭
+                    continue
+            await asyncio.sleep(interval)
+
+    async def _visible_outcome(self, page: Any) -> Optional[tuple[bool, str]]:
+        """检查页面上是否已有可见的成功标识或错误信息，不等待。"""
+        success_element = await page.query_selector(self.selectors["success_indicator"])
+        if success_element is not None and await success_element.is_visible():
+            return True, ""
+
+        error_text = await self._credential_error(page)
+        if error_text is not None:
+            return False, error_text
+        await self._check_challenge(page)
+        return None
+
+    async def _credential_error(self, page: Any) -> Optional[str]:
+        """读取页面上可见的错误信息。
+
+        Returns:
+            Optional[str]: 凭据错误的信息，页面上没有错误信息时返回None
+
+        Raises:
+            LoginPageError: 页面提示的错误不是凭据错误
+        """
+        field_selector = self.selectors.get("credential_error")
+        if field_selector:
+            element = await page.query_selector(field_selector)
+            if element is not None and await element.is_visible():
+                return (await element.inner_text()).strip() or "用户名或密码错误"
+
+        element = await page.query_selector(self.selectors["error_message"])
+        if element is None or not await element.is_visible():
+            return None
+        error_text = (await element.inner_text()).strip()
+        if error_text and any(marker in error_text.lower() for marker in self.credential_markers):
+            return error_text
+        raise LoginPageError(f"页面提示错误：{error_text or '无错误信息'}")
+
+    async def _check_challenge(self, page: Any) -> None:
+        """页面上有可见的验证码或两步验证输入框时抛出 LoginChallengeError。"""
+        challenge_selector = self.selectors.get("challenge_indicator")
+        if not challenge_selector:
+            return
+        element = await page.query_selector(challenge_selector)
+        if element is not None and await element.is_visible():
+            raise LoginChallengeError("Pinterest要求完成验证码或两步验证")
+
+    async def _wait_for(self, page: Any, selector_name: str) -> None:
+        """等待表单元素可见，找不到时抛出 LoginLayoutError。"""
+        try:
+            await page.wait_for_selector(
+                self.selectors[selector_name],
+                state="visible",
+                timeout=self.element_timeout * 1000
+            )
+        except Exception as e:
+            raise LoginLayoutError(f"未找到页面元素 {selector_name}：{str(e)}") from e
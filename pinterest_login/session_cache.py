@@ -0,0 +1,272 @@
+"""Pinterest登录会话缓存。
+
+登录成功后把Playwright的storage state（cookies + localStorage）按用户名
+保存到磁盘，下次同一账号登录时直接复用，跳过浏览器和LLM代理。
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Pinterest用于保持登录状态的cookie名称
+SESSION_COOKIE_NAMES = ("_pinterest_sess", "_auth")
+
+# 密码哈希参数：scrypt使离线暴力破解缓存文件中的哈希代价高昂
+SCRYPT_PARAMS = {"n": 2 ** 14, "r": 8, "p": 1}
+
+
+class SessionCache:
+    """按用户名缓存已登录会话，支持TTL过期与LRU淘汰。
+
+    每个账号对应缓存目录下的一个JSON文件，文件的修改时间即最近使用时间，
+    因此进程重启后仍能恢复LRU顺序。条目中只保存以每个条目独立的盐计算的密码scrypt哈希，
+    用于确认调用方提供的密码与缓存会话属于同一组凭据。
+
+    Args:
+        cache_dir: 缓存目录
+        ttl: 会话有效期（秒）
+        max_entries: 最多缓存的账号数量
+    """
+
+    def __init__(self, cache_dir: str, ttl: int = 6 * 3600, max_entries: int = 500):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+        self._load()
+
+    def get(self, username: str, password: str) -> Optional[Dict[str, Any]]:
+        """获取缓存的会话。
+
+        Args:
+            username: 用户名或邮箱
+            password: 密码，用于校验缓存条目是否属于这组凭据
+
+        Returns:
+            Optional[Dict[str, Any]]: storage state，未命中时返回None
+        """
+        key = self._key(username)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            if self._is_stale(entry, now):
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+        # scrypt较慢，在锁外计算
+        matches = self._password_matches(entry, password)
+        with self._lock:
+            if not matches or self._entries.get(key) is not entry:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            self._touch(key)
+            return entry["storage_state"]
+
+    def put(self, username: str, password: str, storage_state: Dict[str, Any]) -> None:
+        """保存登录成功后的会话。
+
+        Args:
+            username: 用户名或邮箱
+            password: 密码
+            storage_state: Playwright storage state
+        """
+        key = self._key(username)
+        salt = secrets.token_hex(16)
+        now = time.time()
+        entry = {
+            "username": username,
+            "salt": salt,
+            "kdf": dict(SCRYPT_PARAMS, name="scrypt"),
+            "password_hash": self._hash_password(salt, password, SCRYPT_PARAMS),
+            "created_at": now,
+            "expires_at": now + self.ttl,
+            "storage_state": storage_state,
+        }
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._write(key, entry)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._evictions += 1
+
+    def sessions(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """获取全部未过期的会话，用于批量检查会话是否仍然有效。
+
+        Returns:
+            List[Tuple[str, Dict[str, Any]]]: (username, storage_state) 列表，按最近使用时间从旧到新
+        """
+        now = time.time()
+        with self._lock:
+            return [
+                (entry["username"], entry["storage_state"])
+                for entry in self._entries.values()
+                if not self._is_stale(entry, now)
+            ]
+
+    def invalidate(self, username: str) -> bool:
+        """移除指定账号的缓存会话。
+
+        Args:
+            username: 用户名或邮箱
+
+        Returns:
+            bool: 是否存在并已移除
+        """
+        key = self._key(username)
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self) -> None:
+        """清空全部缓存。"""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, int]:
+        """获取缓存统计信息。
+
+        Returns:
+            Dict[str, int]: 命中、未命中、淘汰、过期次数以及当前条目数
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "size": len(self._entries),
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self) -> None:
+        """从磁盘加载缓存条目，按最近使用时间恢复LRU顺序。"""
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        loaded = []
+        now = time.time()
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, file_name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                last_used = os.path.getmtime(path)
+            except (OSError, ValueError) as e:
+                self.logger.debug(f"跳过无法读取的会话缓存文件 {path}: {e}")
+                continue
+
+            if self._is_stale(entry, now):
+                self._delete_file(file_name[:-len(".json")])
+                self._expirations += 1
+                continue
+            loaded.append((last_used, file_name[:-len(".json")], entry))
+
+        for _, key, entry in sorted(loaded, key=lambda item: item[0]):
+            self._entries[key] = entry
+
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._evictions += 1
+
+    def _is_stale(self, entry: Dict[str, Any], now: float) -> bool:
+        """判断条目是否已过期：超过TTL或登录cookie已失效。"""
+        if now >= entry.get("expires_at", 0):
+            return True
+
+        cookies = entry.get("storage_state", {}).get("cookies", [])
+        for cookie in cookies:
+            if cookie.get("name") not in SESSION_COOKIE_NAMES:
+                continue
+            expires = cookie.get("expires", -1)
+            # Playwright用-1表示会话cookie
+            if expires is not None and 0 < expires <= now:
+                return True
+        return False
+
+    def _password_matches(self, entry: Dict[str, Any], password: str) -> bool:
+        kdf = entry.get("kdf") or {}
+        if kdf.get("name") != "scrypt":
+            return False
+        params = {name: kdf[name] for name in ("n", "r", "p")}
+        expected = entry.get("password_hash", "")
+        actual = self._hash_password(entry.get("salt", ""), password, params)
+        return hmac.compare_digest(expected, actual)
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._delete_file(key)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _write(self, key: str, entry: Dict[str, Any]) -> None:
+        """原子写入条目文件，权限仅限当前用户。"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _touch(self, key: str) -> None:
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _delete_file(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.debug(f"删除会话缓存文件失败 {key}: {e}")
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return hashlib.sha256(username.strip().lower().encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _hash_password(salt: str, password: str, params: Dict[str, int]) -> str:
+        return hashlib.scrypt(
+            password.encode("utf-8"), salt=bytes.fromhex(salt), dklen=32, maxmem=64 * 1024 * 1024, **params
+        ).hex()
@@ -0,0 +1,332 @@
+"""不启动浏览器，通过HTTP检查缓存的Pinterest会话是否仍然有效。
+
+用会话缓存中保存的cookies请求一个需要登录的轻量接口，根据响应把会话判定为
+有效、已过期或需要验证。多个检查共用一个支持keep-alive的httpx连接池，
+并发检查数由信号量限制，每分钟可以检查数千个会话。只有检查未通过的会话才需要完整登录。
+
+每个请求的Cookie头单独构造，连接池不保存任何响应中的cookie，不同账号的会话不会混用。
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from enum import Enum
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+from config import PinterestConfig
+from llm_registry import http2_available
+from metrics import LoginMetrics, get_metrics
+
+
+class SessionStatus(str, Enum):
+    """会话检查结果。"""
+
+    VALID = "valid"            # 接口返回了已登录用户的数据
+    EXPIRED = "expired"        # 未登录或会话已失效
+    CHALLENGED = "challenged"  # Pinterest要求验证码或其他验证
+    ERROR = "error"            # 网络错误或无法识别的响应，无法判断
+
+
+@dataclass
+class ProbeResult:
+    """一次会话检查的结果。
+
+    Attributes:
+        username: 用户名或邮箱
+        status: 检查结果
+        http_status: HTTP状态码，请求失败时为0
+        elapsed: 耗时（秒）
+        detail: 判定依据或错误信息
+    """
+
+    username: str
+    status: SessionStatus
+    http_status: int = 0
+    elapsed: float = 0.0
+    detail: str = ""
+
+    @property
+    def needs_login(self) -> bool:
+        """会话已确认不可用，需要完整登录。无法判断（ERROR）时不视为失败。"""
+        return self.status in (SessionStatus.EXPIRED, SessionStatus.CHALLENGED)
+
+
+def cookie_header(storage_state: Dict[str, Any], domain: str, now: Optional[float] = None) -> str:
+    """从Playwright storage state中取出适用于 domain 的未过期cookie，组成Cookie请求头。
+
+    Args:
+        storage_state: Playwright storage state
+        domain: 请求的主机名
+        now: 当前时间戳，默认 time.time()
+
+    Returns:
+        str: Cookie请求头的值，没有可用cookie时为空字符串
+    """
+    now = time.time() if now is None else now
+    pairs = []
+    for cookie in storage_state.get("cookies", []):
+        cookie_domain = (cookie.get("domain") or "").lstrip(".")
+        if not cookie_domain or not (domain == cookie_domain or domain.endswith(f".{cookie_domain}")):
+            continue
+        expires = cookie.get("expires", -1)
+        if expires is not None and 0 < expires <= now:
+            continue
+        pairs.append(f"{cookie['name']}={cookie['value']}")
+    return "; ".join(pairs)
+
+
+def classify_response(
+    status_code: int,
+    location: str = "",
+    body: str = "",
+    challenge_markers: Iterable[str] = ()
+) -> Tuple[SessionStatus, str]:
+    """根据接口响应判定会话状态。
+
+    Args:
+        status_code: HTTP状态码
+        location: 重定向地址
+        body: 响应正文
+        challenge_markers: 表示需要验证的地址或错误信息片段
+
+    Returns:
+        Tuple[SessionStatus, str]: (会话状态, 判定依据)
+    """
+    markers = tuple(marker.lower() for marker in challenge_markers)
+    if 300 <= status_code < 400:
+        target = location.lower()
+        if any(marker in target for marker in markers):
+            return SessionStatus.CHALLENGED, f"重定向到 {location}"
+        if "/login" in target:
+            return SessionStatus.EXPIRED, f"重定向到 {location}"
+        return SessionStatus.ERROR, f"未预期的重定向：{location}"
+    if status_code in (401, 403):
+        if any(marker in body.lower() for marker in markers):
+            return SessionStatus.CHALLENGED, f"HTTP {status_code}"
+        return SessionStatus.EXPIRED, f"HTTP {status_code}"
+    if status_code != 200:
+        return SessionStatus.ERROR, f"HTTP {status_code}"
+
+    try:
+        response = json.loads(body).get("resource_response", {})
+    except (ValueError, AttributeError):
+        return SessionStatus.ERROR, "响应不是JSON"
+    error = response.get("error") or {}
+    error_text = json.dumps(error, ensure_ascii=False).lower() if error else ""
+    if error_text and any(marker in error_text for marker in markers):
+        return SessionStatus.CHALLENGED, error.get("message") or "需要验证"
+    if response.get("status") == "success" and response.get("data"):
+        return SessionStatus.VALID, ""
+    if error:
+        return SessionStatus.EXPIRED, error.get("message") or "未登录"
+    return SessionStatus.EXPIRED, "接口未返回用户数据"
+
+
+class SessionProbe:
+    """通过HTTP检查会话是否仍然有效。
+
+    httpx客户端绑定在创建它的事件循环上，事件循环变化后自动重新创建。
+
+    Args:
+        endpoint: 需要登录的轻量接口地址
+        concurrency: 同时进行的检查数上限
+        timeout: 单次请求超时（秒）
+        max_connections: HTTP连接池大小
+        max_keepalive_connections: 保留的空闲连接数
+        keepalive_expiry: 空闲连接保留时间（秒）
+        user_agent: 请求使用的User-Agent
+        challenge_markers: 表示需要验证的地址或错误信息片段
+        metrics: 指标对象，默认使用 get_metrics()
+        transport: 自定义的httpx传输层，如代理或测试用的 httpx.MockTransport
+    """
+
+    def __init__(
+        self,
+        endpoint: str = "https://www.pinterest.com/resource/UserSettingsResource/get/",
+        concurrency: int = 100,
+        timeout: float = 10,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 50,
+        keepalive_expiry: float = 60,
+        user_agent: str = "",
+        challenge_markers: Iterable[str] = ("challenge", "captcha", "two_factor", "unauth/verify"),
+        metrics: Optional[LoginMetrics] = None,
+        transport: Any = None
+    ):
+        self.endpoint = endpoint
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.user_agent = user_agent or PinterestConfig.BROWSER_CONFIG["user_agent"]
+        self.challenge_markers = tuple(challenge_markers)
+        self.metrics = metrics or get_metrics()
+        self.transport = transport
+        self.logger = logging.getLogger(__name__)
+
+        self._client: Any = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._counts: Dict[str, int] = {status.value: 0 for status in SessionStatus}
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Optional[Dict[str, Any]] = None,
+        metrics: Optional[LoginMetrics] = None
+    ) -> "SessionProbe":
+        """按配置创建会话检查器。
+
+        Args:
+            config: 覆盖 PinterestConfig.SESSION_PROBE_CONFIG 的配置项
+            metrics: 指标对象
+
+        Returns:
+            SessionProbe: 会话检查器
+        """
+        merged = PinterestConfig.SESSION_PROBE_CONFIG.copy()
+        merged.update(config or {})
+        return cls(metrics=metrics, **merged)
+
+    async def probe(self, username: str, storage_state: Dict[str, Any]) -> ProbeResult:
+        """检查一个会话。
+
+        Args:
+            username: 用户名或邮箱
+            storage_state: 会话缓存中保存的Playwright storage state
+
+        Returns:
+            ProbeResult: 检查结果，网络错误时为 ERROR
+        """
+        import httpx
+
+        client = self._get_client()
+        started = time.monotonic()
+        host = httpx.URL(self.endpoint).host
+        cookies = cookie_header(storage_state, host)
+        if not cookies:
+            return self._finish(ProbeResult(username, SessionStatus.EXPIRED, detail="没有可用的cookie"), started)
+
+        headers = {
+            "Cookie": cookies,
+            "Accept": "application/json",
+            "X-Requested-With": "XMLHttpRequest",
+            "X-Pinterest-AppState": "active",
+        }
+        csrf_token = _cookie_value(storage_state, "csrftoken")
+        if csrf_token:
+            headers["X-CSRFToken"] = csrf_token
+
+        async with self._semaphore:
+            try:
+                response = await client.get(self.endpoint, headers=headers)
+            except httpx.HTTPError as e:
+                result = ProbeResult(username, SessionStatus.ERROR, detail=f"{type(e).__name__}: {str(e)}")
+                return self._finish(result, started)
+
+        status, detail = classify_response(
+            response.status_code, response.headers.get("location", ""), response.text, self.challenge_markers
+        )
+        return self._finish(ProbeResult(username, status, response.status_code, detail=detail), started)
+
+    async def probe_many(
+        self,
+        sessions: Iterable[Tuple[str, Dict[str, Any]]],
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[ProbeResult]:
+        """并发检查多个会话，按完成顺序返回结果。
+
+        会话是逐条读取的，同时存在的检查任务不超过并发上限。
+
+        Args:
+            sessions: (username, storage_state) 序列，如 SessionCache.sessions()
+            concurrency: 同时进行的检查数上限，默认使用构造参数
+
+        Yields:
+            ProbeResult: 单个会话的检查结果
+        """
+        limit = concurrency or self.concurrency
+        pending: Set[asyncio.Task] = set()
+        iterator = iter(sessions)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < limit:
+                    try:
+                        username, storage_state = next(iterator)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(self.probe(username, storage_state)))
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """按检查结果统计的次数。
+
+        Returns:
+            Dict[str, Any]: 各状态的次数和连接池是否使用HTTP/2
+        """
+        return {"counts": dict(self._counts), "http2": http2_available()}
+
+    async def aclose(self) -> None:
+        """关闭HTTP连接池。"""
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+
+    def _get_client(self) -> Any:
+        """获取当前事件循环中的httpx客户端。"""
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is loop:
+            return self._client
+
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+        # 拒绝保存任何响应cookie，连接池中的请求只携带各自会话的Cookie头
+        cookies = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        self._client = httpx.AsyncClient(
+            limits=limits,
+            timeout=self.timeout,
+            http2=http2_available(),
+            follow_redirects=False,
+            cookies=cookies,
+            headers={"User-Agent": self.user_agent},
+            transport=self.transport
+        )
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    def _finish(self, result: ProbeResult, started: float) -> ProbeResult:
+        result.elapsed = time.monotonic() - started
+        self._counts[result.status.value] += 1
+        self.metrics.inc("session_probes_total", status=result.status.value)
+        self.metrics.observe("session_probe_seconds", result.elapsed)
+        return result
+
+
+def _cookie_value(storage_state: Dict[str, Any], name: str) -> str:
+    for cookie in storage_state.get("cookies", []):
+        if cookie.get("name") == name:
+            return cookie.get("value", "")
+    return ""
@@ -0,0 +1,230 @@
+"""多进程分片登录。
+
+把凭据列表分给多个工作进程，每个进程有自己的事件循环和浏览器池，
+结果在主进程中按输入顺序合并成一个结果流。
+"""
+
+import asyncio
+import heapq
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from batch_login import BatchLoginResult, Credential
+from login_result import FailureCategory, LoginResult, LoginStatus
+
+
+# 工作进程结束时发送的标记
+_DONE = "done"
+
+
+def default_worker_count() -> int:
+    """当前进程可用的CPU数量。"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _create_default_tool(**kwargs: Any) -> Any:
+    # 工作进程不需要CrewAI，使用普通登录入口以减少启动开销
+    from login_client import PinterestLoginClient
+    return PinterestLoginClient(**kwargs)
+
+
+async def _run_shard(
+    shard: Sequence[Tuple[int, Credential]],
+    results: Any,
+    stop_event: Any,
+    tool_factory: Callable[..., Any],
+    tool_kwargs: Dict[str, Any],
+    login_options: Dict[str, Any]
+) -> None:
+    """在工作进程的事件循环中登录一个分片的全部账号。"""
+    tool = tool_factory(**tool_kwargs)
+    indexes = [index for index, _ in shard]
+    credentials = [credential for _, credential in shard]
+
+    async def consume():
+        async for item in tool.login_many(credentials, **login_options):
+            # 把分片内的序号换回输入中的序号
+            item.index = indexes[item.index]
+            results.put(item)
+
+    consumer = asyncio.ensure_future(consume())
+    try:
+        while not consumer.done():
+            if stop_event.is_set():
+                consumer.cancel()
+                break
+            await asyncio.wait({consumer}, timeout=0.2)
+        try:
+            await consumer
+        except asyncio.CancelledError:
+            pass
+    finally:
+        await tool.close()
+
+
+def _worker_main(
+    worker_id: int,
+    shard: Sequence[Tuple[int, Credential]],
+    results: Any,
+    stop_event: Any,
+    tool_factory: Callable[..., Any],
+    tool_kwargs: Dict[str, Any],
+    login_options: Dict[str, Any]
+) -> None:
+    """工作进程入口。Ctrl-C由主进程统一处理。"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        asyncio.run(_run_shard(shard, results, stop_event, tool_factory, tool_kwargs, login_options))
+    finally:
+        results.put((_DONE, worker_id))
+
+
+class ShardedLoginRunner:
+    """多进程分片登录运行器。
+
+    Args:
+        workers: 工作进程数量，默认等于可用CPU数量
+        concurrency: 每个工作进程内同时进行的登录数量
+        headless: 是否无头模式
+        timeout: 单次登录超时时间（秒）
+        tool_kwargs: 创建 PinterestLoginClient 的参数，需要可以被pickle
+        tool_factory: 在工作进程中创建工具的函数，需要是模块级函数
+        shutdown_grace: 中断后等待工作进程退出的时间（秒）
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        concurrency: int = 4,
+        headless: bool = True,
+        timeout: int = 30,
+        tool_kwargs: Optional[Dict[str, Any]] = None,
+        tool_factory: Callable[..., Any] = _create_default_tool,
+        shutdown_grace: float = 10
+    ):
+        self.workers = workers or default_worker_count()
+        self.concurrency = concurrency
+        self.headless = headless
+        self.timeout = timeout
+        self.tool_kwargs = tool_kwargs or {}
+        self.tool_factory = tool_factory
+        self.shutdown_grace = shutdown_grace
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, credentials: Sequence[Credential]) -> Iterator[BatchLoginResult]:
+        """执行分片登录，按输入顺序返回结果。
+
+        Args:
+            credentials: 凭据列表
+
+        Yields:
+            BatchLoginResult: 单个账号的登录结果
+        """
+        shards = self._split(credentials)
+        if not shards:
+            return
+
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        stop_event = ctx.Event()
+        login_options = {
+            "concurrency": self.concurrency,
+            "headless": self.headless,
+            "timeout": self.timeout,
+        }
+
+        processes = []
+        outstanding: Dict[int, set] = {}
+        for worker_id, shard in enumerate(shards):
+            outstanding[worker_id] = {index for index, _ in shard}
+            process = ctx.Process(
+                target=_worker_main,
+                args=(worker_id, shard, results, stop_event,
+                      self.tool_factory, self.tool_kwargs, login_options),
+                name=f"pinterest-login-worker-{worker_id}",
+                daemon=True
+            )
+            process.start()
+            processes.append(process)
+
+        owner = {index: worker_id for worker_id, indexes in outstanding.items() for index in indexes}
+        usernames = {index: self._username(credential) for index, credential in enumerate(credentials)}
+        buffered: List[Tuple[int, BatchLoginResult]] = []
+        next_index = 0
+        running = set(outstanding)
+
+        try:
+            while running or buffered:
+                while buffered and buffered[0][0] == next_index:
+                    yield heapq.heappop(buffered)[1]
+                    next_index += 1
+                if not running:
+                    break
+
+                try:
+                    message = results.get(timeout=0.5)
+                except queue.Empty:
+                    # 工作进程异常退出时，为它尚未返回的账号补上失败结果
+                    for worker_id in list(running):
+                        if not processes[worker_id].is_alive():
+                            running.discard(worker_id)
+                            self._fill_missing(worker_id, outstanding, usernames, buffered)
+                    continue
+
+                if isinstance(message, tuple) and message[0] == _DONE:
+                    worker_id = message[1]
+                    running.discard(worker_id)
+                    self._fill_missing(worker_id, outstanding, usernames, buffered)
+                    continue
+
+                outstanding[owner[message.index]].discard(message.index)
+                heapq.heappush(buffered, (message.index, message))
+        finally:
+            self._shutdown(processes, stop_event)
+
+    def _split(self, credentials: Sequence[Credential]) -> List[List[Tuple[int, Credential]]]:
+        """按轮询方式把凭据分给各个工作进程。"""
+        worker_count = max(1, min(self.workers, len(credentials)))
+        shards: List[List[Tuple[int, Credential]]] = [[] for _ in range(worker_count)]
+        for index, credential in enumerate(credentials):
+            shards[index % worker_count].append((index, credential))
+        return [shard for shard in shards if shard]
+
+    def _fill_missing(
+        self,
+        worker_id: int,
+        outstanding: Dict[int, set],
+        usernames: Dict[int, str],
+        buffered: List[Tuple[int, BatchLoginResult]]
+    ) -> None:
+        missing, outstanding[worker_id] = outstanding[worker_id], set()
+        if missing:
+            self.logger.error(f"工作进程 {worker_id} 提前退出，{len(missing)} 个账号未完成")
+        for index in missing:
+            result = BatchLoginResult(index, usernames[index], LoginResult.failed(
+                usernames[index], "工作进程提前退出", FailureCategory.UNKNOWN, status=LoginStatus.ERROR
+            ))
+            heapq.heappush(buffered, (index, result))
+
+    def _shutdown(self, processes: List[Any], stop_event: Any) -> None:
+        """通知工作进程停止，超时后强制终止。"""
+        stop_event.set()
+        for process in processes:
+            process.join(self.shutdown_grace)
+        for process in processes:
+            if process.is_alive():
+                self.logger.warning(f"强制终止工作进程 {process.name}")
+                process.terminate()
+                process.join()
+
+    @staticmethod
+    def _username(credential: Credential) -> str:
+        if isinstance(credential, dict):
+            return credential.get("username") or ""
+        return credential[0]
@@ -0,0 +1,99 @@
+"""批量登录命令行工具测试文件。"""
+
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from batch_cli import BatchCheckpoint, iter_credentials, run_batch
+from login_result import FailureCategory, LoginResult
+
+
+async def fake_login(username, password, headless=True, timeout=30):
+    # 序号越小完成越晚，使结果不按输入顺序到达
+    await asyncio.sleep(0.001 * (10 - int(username[4])))
+    if password == "wrong-password":
+        return LoginResult.failed(username, "密码错误", FailureCategory.BAD_CREDENTIALS, method="scripted")
+    return LoginResult.succeeded(username, "scripted")
+
+
+class TestBatchCli(unittest.TestCase):
+    """批量登录命令行工具测试类。"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.temp_dir, "accounts.jsonl")
+        with open(self.input_path, "w", encoding="utf-8") as f:
+            for i in range(6):
+                password = "wrong-password" if i == 2 else "password123"
+                f.write(json.dumps({"username": f"user{i}@example.com", "password": password}) + "\n")
+            f.write("not json\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_batch(self, rows, checkpoint):
+        output = io.StringIO()
+        counts = asyncio.run(run_batch(fake_login, rows, output, checkpoint, concurrency=3))
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        return counts, records
+
+    def test_iter_csv(self):
+        """测试读取CSV凭据。"""
+        path = os.path.join(self.temp_dir, "accounts.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("username,password,note\n a@example.com ,password123,x\nb@example.com,,\n")
+
+        rows = list(iter_credentials(path))
+
+        self.assertEqual(rows, [
+            {"username": "a@example.com", "password": "password123"},
+            {"username": "b@example.com", "password": ""},
+        ])
+
+    def test_results_and_checkpoint(self):
+        """测试逐行输出结果、校验无效行，且输出中不包含密码。"""
+        checkpoint = BatchCheckpoint(os.path.join(self.temp_dir, "ckpt"), self.input_path)
+
+        counts, records = self.run_batch(iter_credentials(self.input_path), checkpoint)
+
+        self.assertEqual(counts, {"skipped": 0, "success": 5, "failed": 1, "rejected": 1})
+        self.assertEqual(sorted(record["line"] for record in records), list(range(7)))
+        rejected = [record for record in records if record["rejected"]]
+        self.assertEqual([record["line"] for record in rejected], [6])
+        self.assertTrue(all("queued" in record for record in records if not record["rejected"]))
+        self.assertNotIn("password123", json.dumps(records))
+        self.assertEqual(checkpoint.watermark, 7)
+        self.assertEqual(checkpoint.done, set())
+
+    def test_resume(self):
+        """测试从检查点继续时跳过已完成的行。"""
+        path = os.path.join(self.temp_dir, "ckpt")
+        checkpoint = BatchCheckpoint(path, self.input_path)
+        for line_number in (0, 1, 3):
+            checkpoint.mark(line_number)
+        checkpoint.save()
+
+        resumed = BatchCheckpoint(path, self.input_path)
+        self.assertTrue(resumed.load())
+        self.assertEqual((resumed.watermark, resumed.done), (2, {3}))
+        counts, records = self.run_batch(iter_credentials(self.input_path), resumed)
+
+        self.assertEqual(counts["skipped"], 3)
+        self.assertEqual(sorted(record["line"] for record in records), [2, 4, 5, 6])
+        self.assertEqual(resumed.watermark, 7)
+
+    def test_checkpoint_for_other_input(self):
+        """测试拒绝使用另一个输入文件的检查点。"""
+        path = os.path.join(self.temp_dir, "ckpt")
+        BatchCheckpoint(path, self.input_path).save()
+
+        with self.assertRaises(ValueError):
+            BatchCheckpoint(path, os.path.join(self.temp_dir, "other.csv")).load()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
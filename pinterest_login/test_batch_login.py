@@ -0,0 +1,131 @@
+"""批量登录测试文件。"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from batch_login import login_concurrently
+from login_result import LoginResult
+from metrics import LoginMetrics
+from negative_cache import NegativeCache
+from rate_limiter import AdaptiveRateLimiter
+from pinterest_login_tool import PinterestLoginTool
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+class TestLoginConcurrently(unittest.TestCase):
+    """批量并发登录测试类。"""
+
+    def test_concurrency_limit(self):
+        """测试同时进行的登录数量不超过并发上限。"""
+        active = 0
+        peak = 0
+
+        async def login(username, password, headless=True, timeout=30):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return f"Pinterest登录成功！用户：{username}"
+
+        credentials = [(f"user{i}@example.com", "password123") for i in range(10)]
+        results = asyncio.run(collect(login_concurrently(login, credentials, concurrency=3)))
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(peak, 3)
+        self.assertTrue(all(r.elapsed > 0 for r in results))
+
+    def test_completion_order(self):
+        """测试结果按完成顺序返回。"""
+        delays = {"slow@example.com": 0.05, "fast@example.com": 0.0}
+
+        async def login(username, password, headless=True, timeout=30):
+            await asyncio.sleep(delays[username])
+            return "ok"
+
+        credentials = [("slow@example.com", "password123"), ("fast@example.com", "password123")]
+        results = asyncio.run(collect(login_concurrently(login, credentials, concurrency=2)))
+
+        self.assertEqual([r.username for r in results], ["fast@example.com", "slow@example.com"])
+        self.assertEqual(results[1].index, 0)
+
+    def test_invalid_credentials_rejected(self):
+        """测试无效凭据直接被拒绝，不调用登录。"""
+        login = AsyncMock(return_value="ok")
+        credentials = [
+            {"username": "test@example.com", "password": "123"},
+            {"username": "ok@example.com", "password": "password123"},
+        ]
+
+        results = asyncio.run(collect(login_concurrently(login, credentials, concurrency=1)))
+
+        self.assertTrue(results[0].rejected)
+        self.assertIn("密码长度", str(results[0].result))
+        login.assert_awaited_once()
+
+    def test_hung_login_does_not_block(self):
+        """测试卡住的账号超时后被取消，其他账号正常完成。"""
+        async def login(username, password, headless=True, timeout=30):
+            if username == "hung@example.com":
+                await asyncio.sleep(10)
+            return "ok"
+
+        credentials = [("hung@example.com", "password123"), ("ok@example.com", "password123")]
+        results = asyncio.run(collect(login_concurrently(
+            login, credentials, concurrency=2, per_login_timeout=0.05
+        )))
+
+        by_user = {r.username: r for r in results}
+        self.assertTrue(by_user["hung@example.com"].timed_out)
+        self.assertEqual(by_user["ok@example.com"].result, "ok")
+
+    def test_rate_limit_wait_not_counted(self):
+        """测试在限速器中排队的时间不计入单个账号的时间上限。"""
+        limiter = AdaptiveRateLimiter(rate=10, burst=1, account_interval=0, metrics=LoginMetrics())
+
+        async def login(username, password, headless=True, timeout=30):
+            async with limiter.slot(username):
+                await asyncio.sleep(0.05)
+            return "ok"
+
+        # 出口每0.1秒一个令牌，后面的账号排队最多约0.3秒，远超0.15秒的上限
+        credentials = [(f"user{i}@example.com", "password123") for i in range(4)]
+        results = asyncio.run(collect(login_concurrently(
+            login, credentials, concurrency=4, per_login_timeout=0.15
+        )))
+
+        self.assertFalse(any(r.timed_out for r in results))
+        self.assertEqual([r.result for r in results], ["ok"] * 4)
+        # 排队时间单独报告，不计入登录耗时
+        self.assertGreater(max(r.queued for r in results), 0.25)
+        self.assertLess(max(r.elapsed for r in results), 0.15)
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key', 'PINTEREST_RATE_LIMIT_STATE': ''})
+    @patch.object(PinterestLoginTool, '_async_login', new_callable=AsyncMock)
+    def test_tool_login_many(self, mock_async_login):
+        """测试工具的批量登录接口。"""
+        mock_async_login.side_effect = lambda username, *args: LoginResult.succeeded(username, "scripted")
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        tool = PinterestLoginTool(negative_cache=NegativeCache(os.path.join(temp_dir, "negative_cache.json")))
+
+        credentials = [("a@example.com", "password123"), ("b@example.com", "password123")]
+        results = asyncio.run(collect(tool.login_many(credentials, concurrency=2)))
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(mock_async_login.await_count, 2)
+        self.assertEqual(
+            sorted(str(r.result) for r in results),
+            ["Pinterest登录成功！用户：a@example.com", "Pinterest登录成功！用户：b@example.com"]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
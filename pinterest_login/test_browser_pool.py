@@ -0,0 +1,303 @@
+"""浏览器池测试文件。"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from browser_pool import DEVTOOLS_PORT_FILE, BrowserPool
+from config import PinterestConfig
+from login_client import PinterestLoginClient
+from metrics import LoginMetrics
+from rate_limiter import AdaptiveRateLimiter
+
+
+def write_devtools_port(user_data_dir, port):
+    """模拟Chromium把自己选择的远程调试端口写入配置目录。"""
+    with open(os.path.join(user_data_dir, DEVTOOLS_PORT_FILE), "w", encoding="utf-8") as f:
+        f.write(f"{port}\n/devtools/browser/{port}")
+
+
+class FakeBrowser:
+    """模拟Playwright浏览器。"""
+
+    def __init__(self, user_data_dir=""):
+        self.connected = True
+        self.contexts = []
+        self.user_data_dir = user_data_dir
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_browser_cdp_session(self):
+        session = MagicMock()
+        session.send = AsyncMock(return_value={
+            "arguments": ["chrome", "--enable-automation", f"--user-data-dir={self.user_data_dir}"]
+        })
+        session.detach = AsyncMock()
+        return session
+
+    async def new_context(self, **options):
+        context = MagicMock()
+        context.options = options
+        context.close = AsyncMock()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+def fake_playwright_module(temp_dir):
+    """构造一个可替换 playwright.async_api 的模块。"""
+    playwright = MagicMock()
+    playwright.launched = []
+
+    async def launch(**kwargs):
+        port = 9300 + len(playwright.launched)
+        user_data_dir = os.path.join(temp_dir, f"profile-{port}")
+        os.makedirs(user_data_dir)
+        write_devtools_port(user_data_dir, port)
+        browser = FakeBrowser(user_data_dir)
+        browser.args = kwargs["args"]
+        playwright.launched.append(browser)
+        return browser
+
+    async def launch_persistent_context(user_data_dir, **kwargs):
+        browser = FakeBrowser(user_data_dir)
+        playwright.launched.append(browser)
+        write_devtools_port(user_data_dir, 9400)
+        context = await browser.new_context(**{k: v for k, v in kwargs.items() if k not in ("headless", "args")})
+        context.user_data_dir = user_data_dir
+        context.args = kwargs["args"]
+        # 持久化上下文没有单独的浏览器对象
+        context.browser = None
+        return context
+
+    playwright.chromium.launch = launch
+    playwright.chromium.launch_persistent_context = launch_persistent_context
+    playwright.stop = AsyncMock()
+
+    starter = MagicMock()
+    starter.start = AsyncMock(return_value=playwright)
+
+    module = types.ModuleType("playwright.async_api")
+    module.async_playwright = MagicMock(return_value=starter)
+    return module, playwright
+
+
+class TestBrowserPool(unittest.TestCase):
+    """浏览器池测试类。"""
+
+    def setUp(self):
+        """测试前准备。"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        module, self.playwright = fake_playwright_module(self.temp_dir)
+        patcher = patch.dict(sys.modules, {"playwright": types.ModuleType("playwright"),
+                                           "playwright.async_api": module})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_warm_start_and_reuse(self):
+        """测试预启动的浏览器在多次借用间复用。"""
+        async def scenario():
+            pool = BrowserPool(size=1, idle_timeout=0, max_uses=10)
+            await pool.start()
+            for _ in range(3):
+                async with pool.acquire(viewport={"width": 800, "height": 600}) as lease:
+                    self.assertEqual(lease.context.options["viewport"]["width"], 800)
+                    # 远程调试端口由浏览器自己选择，从配置目录中读取
+                    self.assertEqual(lease.cdp_url, "http://127.0.0.1:9300")
+                    self.assertIs(lease.browser, self.playwright.launched[0])
+            stats = pool.stats()
+            await pool.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        self.assertEqual(stats["launched"], 1)
+        self.assertEqual(stats["leases"], 3)
+        self.assertEqual(stats["idle"], 1)
+
+    def test_spare_context_ready_before_first_lease(self):
+        """测试首次使用时按 warm 预启动浏览器并预先创建上下文，借用时直接取用。"""
+        options = {"viewport": {"width": 800, "height": 600}}
+
+        async def scenario():
+            pool = BrowserPool(size=2, idle_timeout=0, warm=1, context_options=options)
+            await pool.start(warm=pool.warm)
+            browser = self.playwright.launched[0]
+            self.assertEqual(len(browser.contexts), 1)
+            spare = browser.contexts[0]
+
+            async with pool.acquire(**options) as lease:
+                self.assertIs(lease.context, spare)
+            await asyncio.sleep(0)
+            # 归还后重新准备一个上下文
+            self.assertEqual(len(browser.contexts), 2)
+            async with pool.acquire(viewport={"width": 1024, "height": 768}) as lease:
+                self.assertIsNot(lease.context, browser.contexts[1])
+            stats = pool.stats()
+            await pool.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        self.assertEqual(stats["launched"], 1)
+        self.assertEqual(stats["spare_hits"], 1)
+
+    def test_first_acquire_warms_pool(self):
+        """测试未显式启动时，首次借用按 warm 预启动浏览器。"""
+        async def scenario():
+            pool = BrowserPool(size=2, idle_timeout=0, warm=2)
+            async with pool.acquire():
+                pass
+            stats = pool.stats()
+            await pool.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        self.assertEqual(stats["launched"], 2)
+        self.assertEqual(stats["idle"], 2)
+
+    def test_client_warm_up(self):
+        """测试客户端 warm_up() 在第一次登录前启动浏览器并创建上下文。"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            metrics = LoginMetrics()
+            client = PinterestLoginClient(
+                session_cache=MagicMock(),
+                negative_cache=MagicMock(),
+                metrics=metrics,
+                rate_limiter=AdaptiveRateLimiter(enabled=False, metrics=metrics)
+            )
+        try:
+            self.assertTrue(client.warm_up())
+            pool = client.browser_pools[True]
+            self.assertEqual(pool.stats()["idle"], PinterestConfig.BROWSER_POOL_CONFIG["warm"])
+            browser = self.playwright.launched[0]
+            self.assertEqual(len(browser.contexts), 1)
+            self.assertEqual(browser.contexts[0].options, pool.context_options)
+        finally:
+            client.shutdown()
+
+    def test_recycle_after_max_uses(self):
+        """测试达到最大使用次数后浏览器被关闭并重新启动。"""
+        async def scenario():
+            pool = BrowserPool(size=1, idle_timeout=0, max_uses=2)
+            for _ in range(3):
+                async with pool.acquire():
+                    pass
+            stats = pool.stats()
+            await pool.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        self.assertEqual(stats["launched"], 2)
+        self.assertEqual(stats["recycled"], 1)
+        self.assertFalse(self.playwright.launched[0].connected)
+
+    def test_dirty_lease_is_not_reused(self):
+        """测试被标记为dirty的浏览器归还后关闭。"""
+        async def scenario():
+            pool = BrowserPool(size=1, idle_timeout=0)
+            async with pool.acquire() as lease:
+                lease.dirty = True
+            async with pool.acquire():
+                pass
+            stats = pool.stats()
+            await pool.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        self.assertEqual(stats["launched"], 2)
+
+    def test_cancelled_lease_closes_browser(self):
+        """测试登录超时被取消时关闭上下文和浏览器，并释放池容量。"""
+        async def scenario():
+            pool = BrowserPool(size=1, idle_timeout=0)
+            contexts = []
+
+            async def stuck_login():
+                async with pool.acquire() as lease:
+                    contexts.append(lease.context)
+                    await asyncio.sleep(3600)
+
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(stuck_login(), 0.05)
+            async with pool.acquire():
+                pass
+            stats = pool.stats()
+            await pool.close()
+            return contexts, stats
+
+        contexts, stats = asyncio.run(scenario())
+        contexts[0].close.assert_awaited_once()
+        self.assertFalse(self.playwright.launched[0].connected)
+        self.assertEqual(stats["launched"], 2)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_persistent_lease(self):
+        """测试持久化配置目录的浏览器归还时关闭，不进入池中复用，且不读取上次运行留下的端口文件。"""
+        profile = os.path.join(self.temp_dir, "profile")
+        os.makedirs(profile)
+        write_devtools_port(profile, 1)
+        removed = []
+        launch = self.playwright.chromium.launch_persistent_context
+
+        async def check_stale_file_removed(user_data_dir, **kwargs):
+            removed.append(not os.path.exists(os.path.join(user_data_dir, DEVTOOLS_PORT_FILE)))
+            return await launch(user_data_dir, **kwargs)
+
+        self.playwright.chromium.launch_persistent_context = check_stale_file_removed
+
+        async def scenario():
+            pool = BrowserPool(size=1, idle_timeout=0, warm=0)
+            async with pool.acquire_persistent(profile, viewport={"width": 800, "height": 600}) as lease:
+                self.assertEqual(lease.context.user_data_dir, profile)
+                self.assertEqual(lease.context.options["viewport"]["width"], 800)
+                self.assertEqual(lease.context.args, ["--remote-debugging-port=0"])
+                self.assertEqual(lease.cdp_url, "http://127.0.0.1:9400")
+                self.assertIsNone(lease.browser)
+                self.assertEqual(pool.stats()["in_use"], 1)
+                context = lease.context
+            stats = pool.stats()
+            await pool.close()
+            return context, stats
+
+        context, stats = asyncio.run(scenario())
+        self.assertEqual(removed, [True])
+        context.close.assert_awaited_once()
+        self.assertEqual(stats["in_use"], 0)
+        self.assertEqual(stats["idle"], 0)
+
+    def test_reap_idle(self):
+        """测试空闲超时的浏览器被关闭。"""
+        async def scenario():
+            pool = BrowserPool(size=2, idle_timeout=0.01)
+            await pool.start()
+            await asyncio.sleep(0.02)
+            closed = await pool.reap_idle()
+            await pool.close()
+            return closed
+
+        self.assertEqual(asyncio.run(scenario()), 2)
+
+    def test_close_drains_pool(self):
+        """测试关闭浏览器池时关闭全部浏览器并停止Playwright。"""
+        async def scenario():
+            pool = BrowserPool(size=2, idle_timeout=0)
+            await pool.start()
+            await pool.close()
+            return pool
+
+        pool = asyncio.run(scenario())
+        self.assertTrue(all(not b.connected for b in self.playwright.launched))
+        self.playwright.stop.assert_awaited_once()
+        self.assertEqual(pool.stats()["idle"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
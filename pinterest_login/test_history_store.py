@@ -0,0 +1,132 @@
+"""登录历史记录测试文件。"""
+
+import asyncio
+import os
+import shutil
+import sqlite3
+import stat
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from history_store import LoginHistoryStore
+from login_client import PinterestLoginClient
+from login_result import FailureCategory, LoginResult
+from metrics import LoginMetrics
+from negative_cache import NegativeCache
+from rate_limiter import AdaptiveRateLimiter
+from session_cache import SessionCache
+
+
+def success(username, elapsed, from_cache=False):
+    method = "cache" if from_cache else "scripted"
+    return LoginResult.succeeded(username, method, from_cache=from_cache, phase_timings={method: elapsed})
+
+
+def failure(username, elapsed):
+    return LoginResult.failed(
+        username, "密码错误", FailureCategory.BAD_CREDENTIALS, method="scripted", phase_timings={"scripted": elapsed}
+    )
+
+
+class TestLoginHistoryStore(unittest.TestCase):
+    """LoginHistoryStore测试类。"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "history.db")
+        self.store = LoginHistoryStore(self.path, batch_size=3, flush_interval=0.01)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_queries(self):
+        """测试耗时分位数、按窗口的成功率和各账号最近成功时间。"""
+        for i in range(1, 11):
+            self.store.record(success("A@example.com", float(i)), timestamp=1000 + i)
+        self.store.record(failure("a@example.com", 50.0), timestamp=4000)
+        self.store.record(success("b@example.com", 0.01, from_cache=True), timestamp=4100)
+        self.store.flush()
+
+        latency = self.store.latency_percentiles(since=0)
+        self.assertEqual(latency, {"count": 11, "p50": 6.0, "p95": 50.0})
+        self.assertEqual(self.store.latency_percentiles(until=2000)["p95"], 10.0)
+        self.assertEqual(self.store.latency_percentiles(include_cache=True)["count"], 12)
+        self.assertEqual(self.store.latency_percentiles(since=5000), {"count": 0, "p50": None, "p95": None})
+
+        windows = self.store.success_rate(window=3600)
+        self.assertEqual([(w["start"], w["total"], w["success"]) for w in windows], [(0, 10, 10), (3600, 1, 0)])
+        self.assertEqual(windows[1]["rate"], 0.0)
+
+        self.assertEqual(self.store.last_success(), {"a@example.com": 1010, "b@example.com": 4100})
+        self.assertEqual(self.store.last_success("B@example.com"), {"b@example.com": 4100})
+        self.assertEqual(self.store.stats(), {"written": 12, "dropped": 0, "pending": 0})
+
+    def test_schema(self):
+        """测试数据库文件权限、索引，且不保存密码。"""
+        self.store.record(failure("a@example.com", 1.0))
+        self.store.flush()
+
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        conn = sqlite3.connect(self.path)
+        try:
+            indexes = {row[1] for row in conn.execute("PRAGMA index_list(logins)")}
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(logins)")}
+        finally:
+            conn.close()
+        self.assertTrue({"logins_ts", "logins_status_ts", "logins_account_status_ts"} <= indexes)
+        self.assertNotIn("password", columns)
+
+    def test_full_queue_drops(self):
+        """测试写入队列已满时丢弃记录而不阻塞。"""
+        store = LoginHistoryStore(self.path, max_queue=1)
+        with patch.object(store, "_ensure_writer"):
+            self.assertTrue(store.record(success("a@example.com", 1.0)))
+            self.assertFalse(store.record(success("a@example.com", 1.0)))
+        self.assertEqual(store.stats()["dropped"], 1)
+
+
+class TestLoginWritesHistory(unittest.TestCase):
+    """登录写入历史记录的测试类。"""
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        metrics = LoginMetrics()
+        self.store = LoginHistoryStore(os.path.join(self.temp_dir, "history.db"))
+        self.session_cache = SessionCache(os.path.join(self.temp_dir, "sessions"))
+        self.client = PinterestLoginClient(
+            session_cache=self.session_cache,
+            negative_cache=NegativeCache(os.path.join(self.temp_dir, "negative_cache.json")),
+            metrics=metrics,
+            rate_limiter=AdaptiveRateLimiter(enabled=False, metrics=metrics),
+            history_store=self.store
+        )
+        scripted = AsyncMock(return_value=LoginResult.succeeded("test@example.com", "scripted"))
+        object.__setattr__(self.client, "_scripted_login", scripted)
+
+    def tearDown(self):
+        self.client.shutdown()
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_login_recorded(self):
+        """测试登录结果和缓存命中都写入历史记录。"""
+        async def run():
+            try:
+                await self.client.alogin("test@example.com", "password123")
+                self.session_cache.put("test@example.com", "password123", {"cookies": [], "origins": []})
+                await self.client.alogin("test@example.com", "password123")
+            finally:
+                await self.client.close()
+
+        asyncio.run(run())
+
+        self.assertEqual(self.store.latency_percentiles(include_cache=True)["count"], 2)
+        self.assertEqual(self.store.latency_percentiles()["count"], 1)
+        self.assertIn("test@example.com", self.store.last_success())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
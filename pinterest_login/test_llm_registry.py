@@ -0,0 +1,122 @@
+"""共享LLM客户端测试文件。"""
+
+import asyncio
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from llm_registry import LLMClientRegistry
+from login_client import PinterestLoginClient
+from metrics import LoginMetrics
+
+
+class FakeLLM:
+    """记录创建参数并模拟请求耗时的LLM。"""
+
+    provider = "fake"
+
+    def __init__(self, model, base_url, api_key, http_client, **options):
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.http_client = http_client
+        self.options = options
+
+    async def ainvoke(self, messages, output_format=None):
+        await asyncio.sleep(0.01)
+        return "ok"
+
+
+class TestLLMClientRegistry(unittest.TestCase):
+    """LLMClientRegistry测试类。"""
+
+    def setUp(self):
+        self.registry = LLMClientRegistry(
+            config={"max_concurrency": 2}, llm_factory=FakeLLM, metrics=LoginMetrics()
+        )
+
+    def test_reuses_client_per_key(self):
+        """测试相同模型、地址和密钥复用同一客户端和连接池。"""
+        async def get_clients():
+            first = self.registry.get("key-a", base_url="https://api.example.com/v1")
+            second = self.registry.get("key-a", base_url="https://api.example.com/v1")
+            other = self.registry.get("key-b", base_url="https://api.example.com/v1")
+            await self.registry.aclose()
+            return first, second, other
+
+        first, second, other = asyncio.run(get_clients())
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertIs(first.http_client, second.http_client)
+        self.assertEqual(first.options, {"temperature": 0.1})
+        self.assertEqual(first.provider, "fake")
+
+    def test_new_client_per_event_loop(self):
+        """测试不同事件循环使用不同的客户端。"""
+        async def get_client():
+            return self.registry.get("key-a", base_url="https://api.example.com/v1")
+
+        first = asyncio.run(get_client())
+        second = asyncio.run(get_client())
+
+        self.assertIsNot(first, second)
+        self.assertEqual(self.registry.stats()["created"], 2)
+        # 已结束的事件循环中的客户端被丢弃
+        self.assertEqual(len(self.registry.stats()["clients"]), 1)
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    def test_client_close_releases_connections(self):
+        """测试登录客户端关闭时关闭其事件循环中的LLM连接池。"""
+        client = PinterestLoginClient(
+            session_cache=MagicMock(), negative_cache=MagicMock(), llm_registry=self.registry
+        )
+
+        async def get_llm():
+            return client._create_llm()
+
+        llm = client.background_loop.run(get_llm())
+        self.assertFalse(llm.http_client.is_closed)
+
+        client.shutdown()
+
+        self.assertTrue(llm.http_client.is_closed)
+        self.assertEqual(self.registry.stats()["clients"], [])
+
+    def test_bounded_concurrency(self):
+        """测试同时进行的请求数受上限控制并记录排队情况。"""
+        async def invoke_many():
+            llm = self.registry.get("key-a", base_url="https://api.example.com/v1")
+            await asyncio.gather(*(llm.ainvoke([]) for _ in range(5)))
+            return llm
+
+        llm = asyncio.run(invoke_many())
+
+        stats = llm.stats.to_dict()
+        self.assertEqual(stats["calls"], 5)
+        self.assertEqual(stats["peak_in_flight"], 2)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertGreater(stats["queued"], 0)
+
+    def test_stats_hide_api_key(self):
+        """测试统计信息中不包含密钥原文。"""
+        async def get_client():
+            self.registry.get("sk-secret-value", base_url="https://api.example.com/v1")
+            return self.registry.stats()
+
+        stats = asyncio.run(get_client())
+
+        self.assertNotIn("sk-secret-value", str(stats))
+        self.assertEqual(len(stats["clients"][0]["api_key"]), 12)
+
+    @patch.dict("os.environ", {"OPENAI_API_BASE": "https://proxy.example.com/v1"})
+    def test_default_base_url(self):
+        """测试默认使用 OPENAI_API_BASE 环境变量。"""
+        async def get_client():
+            return self.registry.get("key-a")
+
+        self.assertEqual(asyncio.run(get_client()).base_url, "https://proxy.example.com/v1")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
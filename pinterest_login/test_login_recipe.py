@@ -0,0 +1,143 @@
+"""登录配方录制与回放测试文件。"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from login_recipe import (
+    LoginRecipe, PASSWORD_PLACEHOLDER, RecipeReplayError, RecipeStep, RecipeStore,
+    USERNAME_PLACEHOLDER
+)
+
+
+def make_element(**attributes):
+    element = MagicMock()
+    element.node_name = "INPUT"
+    element.attributes = attributes
+    return element
+
+
+def make_history():
+    """构造browser-use代理的执行历史。"""
+    history = MagicMock()
+    history.model_actions.return_value = [
+        {"go_to_url": {"url": "https://www.pinterest.com/login/"}, "interacted_element": None},
+        {"input_text": {"index": 3, "text": "test@example.com"},
+         "interacted_element": make_element(id="email")},
+        {"input_text": {"index": 4, "text": "password123"},
+         "interacted_element": make_element(name="password")},
+        {"click_element_by_index": {"index": 5},
+         "interacted_element": make_element(**{"data-test-id": "registerFormSubmitButton"})},
+        {"done": {"text": "登录成功", "success": True}, "interacted_element": None},
+    ]
+    return history
+
+
+class TestLoginRecipe(unittest.TestCase):
+    """登录配方测试类。"""
+
+    def test_from_agent_history(self):
+        """测试从代理历史生成配方，凭据被替换为占位符。"""
+        recipe = LoginRecipe.from_agent_history(make_history(), "test@example.com", "password123")
+
+        self.assertEqual([step.action for step in recipe.steps], ["navigate", "fill", "fill", "click"])
+        self.assertEqual(recipe.steps[1].selector, "input[id='email']")
+        self.assertEqual(recipe.steps[1].value, USERNAME_PLACEHOLDER)
+        self.assertEqual(recipe.steps[2].value, PASSWORD_PLACEHOLDER)
+        self.assertNotIn("password123", json.dumps(recipe.to_dict()))
+
+    def test_from_sensitive_data_history(self):
+        """测试精简模式下代理输入的密码占位符同样被识别为密码。"""
+        history = make_history()
+        history.model_actions.return_value[2]["input_text"]["text"] = "<secret>x_password</secret>"
+
+        recipe = LoginRecipe.from_agent_history(history, "test@example.com", "password123")
+
+        self.assertEqual(recipe.steps[2].value, PASSWORD_PLACEHOLDER)
+
+    def test_incomplete_history(self):
+        """测试历史中没有输入密码时不生成配方。"""
+        history = MagicMock()
+        history.model_actions.return_value = make_history().model_actions()[:2]
+
+        self.assertIsNone(LoginRecipe.from_agent_history(history, "test@example.com", "password123"))
+
+    def test_unknown_input_not_recorded(self):
+        """测试代理输入了用户名和密码以外的内容时不生成配方，避免把这些内容写入磁盘。"""
+        history = make_history()
+        history.model_actions.return_value.insert(3, {
+            "input_text": {"index": 6, "text": "PASSWORD123"},
+            "interacted_element": make_element(name="password")
+        })
+
+        self.assertIsNone(LoginRecipe.from_agent_history(history, "test@example.com", "password123"))
+
+    def test_replay(self):
+        """测试回放时填入真实凭据。"""
+        recipe = LoginRecipe.from_agent_history(make_history(), "test@example.com", "password123")
+        page = MagicMock()
+        page.goto = AsyncMock()
+        page.wait_for_selector = AsyncMock()
+        page.fill = AsyncMock()
+        page.click = AsyncMock()
+
+        asyncio.run(recipe.replay(page, "other@example.com", "secret456", 1))
+
+        page.fill.assert_any_await("input[id='email']", "other@example.com")
+        page.fill.assert_any_await("input[name='password']", "secret456")
+        page.click.assert_awaited_once()
+
+    def test_replay_failure(self):
+        """测试元素不存在时报告失败的步骤。"""
+        recipe = LoginRecipe(steps=[RecipeStep("click", selector="button")])
+        page = MagicMock()
+        page.wait_for_selector = AsyncMock(side_effect=TimeoutError("timeout"))
+
+        with self.assertRaises(RecipeReplayError) as context:
+            asyncio.run(recipe.replay(page, "test@example.com", "password123", 1))
+        self.assertEqual(context.exception.step_index, 0)
+
+
+class TestRecipeStore(unittest.TestCase):
+    """登录配方存储测试类。"""
+
+    def setUp(self):
+        """测试前准备。"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "recipe.json")
+
+    def tearDown(self):
+        """测试后清理。"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_versioning(self):
+        """测试每次保存版本号加一，并能重新加载。"""
+        store = RecipeStore(self.path)
+        self.assertIsNone(store.load())
+
+        store.save(LoginRecipe(steps=[RecipeStep("click", selector="button")]))
+        store.save(LoginRecipe(steps=[RecipeStep("click", selector="a")]))
+
+        reloaded = RecipeStore(self.path).load()
+        self.assertEqual(reloaded.version, 2)
+        self.assertEqual(reloaded.steps[0].selector, "a")
+
+    def test_shared_file(self):
+        """测试多个实例（如多个进程）保存时在磁盘上的版本号基础上加一，不留下临时文件。"""
+        first = RecipeStore(self.path)
+        second = RecipeStore(self.path)
+        self.assertIsNone(second.load())
+
+        first.save(LoginRecipe(steps=[RecipeStep("click", selector="button")]))
+        saved = second.save(LoginRecipe(steps=[RecipeStep("click", selector="a")]))
+
+        self.assertEqual(saved.version, 2)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["recipe.json", "recipe.json.lock"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,229 @@
+"""结构化登录结果测试文件。"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from config import PinterestConfig
+from login_result import FailureCategory, LoginResult, LoginStatus
+from negative_cache import NegativeCache
+from pinterest_login_tool import PinterestLoginTool
+from scripted_login import LoginLayoutError, LoginPageError
+from session_cache import SessionCache
+
+
+class TestLoginResult(unittest.TestCase):
+    """LoginResult测试类。"""
+
+    def test_str_matches_legacy_messages(self):
+        """测试字符串形式与原有返回值一致。"""
+        self.assertEqual(
+            str(LoginResult.succeeded("a@example.com", "scripted")),
+            "Pinterest登录成功！用户：a@example.com"
+        )
+        self.assertEqual(
+            str(LoginResult.succeeded("a@example.com", "cache", from_cache=True)),
+            "Pinterest登录成功！用户：a@example.com（使用缓存会话）"
+        )
+        self.assertEqual(
+            str(LoginResult.failed("a@example.com", "密码错误", FailureCategory.BAD_CREDENTIALS)),
+            "Pinterest登录失败：密码错误"
+        )
+        self.assertEqual(
+            str(LoginResult.failed("", "用户名和密码不能为空", FailureCategory.INVALID_INPUT,
+                                   status=LoginStatus.ERROR)),
+            "错误：用户名和密码不能为空"
+        )
+
+    def test_to_dict(self):
+        """测试转换为字典时使用枚举值并包含总耗时。"""
+        result = LoginResult.failed(
+            "a@example.com", "超时", FailureCategory.TIMEOUT,
+            status=LoginStatus.ERROR, phase_timings={"scripted": 1.0, "agent": 2.5}
+        )
+        data = result.to_dict()
+
+        self.assertEqual(data["status"], "error")
+        self.assertEqual(data["failure_category"], "timeout")
+        self.assertEqual(data["elapsed"], 3.5)
+        self.assertFalse(result.success)
+
+
+async def wait_forever(*args, **kwargs):
+    await asyncio.sleep(3600)
+
+
+class TestAgentVerdict(unittest.TestCase):
+    """代理登录结果判定测试类。"""
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.tool = PinterestLoginTool(
+            session_cache=SessionCache(self.temp_dir),
+            negative_cache=NegativeCache(os.path.join(self.temp_dir, "negative_cache.json"))
+        )
+        self.history = MagicMock()
+        self.history.number_of_steps.return_value = 6
+        self.history.usage.total_tokens = 1234
+        # 代理的最终回复即使包含“成功”也不能作为判定依据
+        self.history.final_result.return_value = "登录成功"
+        self.agent = MagicMock()
+        self.agent.run = AsyncMock(return_value=self.history)
+
+        self.context = MagicMock()
+        self.context.pages = [MagicMock()]
+        self.context.storage_state = AsyncMock(return_value={"cookies": []})
+        self.lease = MagicMock()
+        self.lease.default_context = AsyncMock(return_value=self.context)
+
+    def tearDown(self):
+        self.tool.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_agent(self, outcome, watched=None):
+        engine = MagicMock()
+        if isinstance(outcome, Exception):
+            engine.read_outcome = AsyncMock(side_effect=outcome)
+        else:
+            engine.read_outcome = AsyncMock(return_value=outcome)
+        if watched is None:
+            engine.watch = AsyncMock(side_effect=wait_forever)
+        else:
+            engine.watch = AsyncMock(return_value=watched)
+        object.__setattr__(self.tool, "scripted_engine", engine)
+        return asyncio.run(self.tool._run_agent(
+            self.agent, "test@example.com", "password123", lease=self.lease
+        ))
+
+    def test_success_from_page(self):
+        """测试页面出现成功标识时判定为成功并记录代理用量。"""
+        result = self.run_agent((True, ""))
+
+        self.assertEqual(result.status, LoginStatus.SUCCESS)
+        self.assertEqual(result.method, "agent")
+        self.assertEqual(result.llm_steps, 6)
+        self.assertEqual(result.llm_tokens, 1234)
+
+    def test_failure_from_page(self):
+        """测试页面出现错误信息时判定为凭据错误，而不是相信代理的回复。"""
+        result = self.run_agent((False, "密码不正确"))
+
+        self.assertEqual(result.status, LoginStatus.FAILED)
+        self.assertEqual(result.failure_category, FailureCategory.BAD_CREDENTIALS)
+        self.assertEqual(result.message, "密码不正确")
+
+    def test_generic_page_error(self):
+        """测试页面错误不能确认是凭据错误时返回可重试的错误，而不是凭据错误。"""
+        result = self.run_agent(LoginPageError("页面提示错误：请稍后再试"))
+
+        self.assertEqual(result.status, LoginStatus.ERROR)
+        self.assertEqual(result.failure_category, FailureCategory.PAGE_ERROR)
+        self.assertIn("page_error", self.tool.retry_policy.policies)
+
+    def test_undetermined_page(self):
+        """测试页面状态无法判定时返回UNKNOWN。"""
+        result = self.run_agent(LoginLayoutError("无法判定"))
+
+        self.assertEqual(result.status, LoginStatus.UNKNOWN)
+        self.assertEqual(result.failure_category, FailureCategory.UNDETERMINED)
+
+    def test_mode_and_step_limit(self):
+        """测试代理按模式的步数上限运行，并在结果中记录模式。"""
+        object.__setattr__(self.tool, "agent_mode", "lean")
+
+        result = self.run_agent((True, ""))
+
+        self.agent.run.assert_awaited_once_with(max_steps=PinterestConfig.AGENT_MODES["lean"]["max_steps"])
+        self.assertEqual(result.agent_mode, "lean")
+
+    def test_early_exit(self):
+        """测试页面先判定出结果时取消代理并直接使用该结果。"""
+        cancelled = []
+
+        async def slow_run(**kwargs):
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        self.agent.run = AsyncMock(side_effect=slow_run)
+        self.agent.history = self.history
+
+        result = self.run_agent(LoginLayoutError("不应调用"), watched=(True, ""))
+
+        self.assertEqual(cancelled, [True])
+        self.assertEqual(result.status, LoginStatus.SUCCESS)
+        self.assertTrue(result.early_exit)
+        self.assertEqual(result.llm_steps, 6)
+        self.tool.scripted_engine.read_outcome.assert_not_awaited()
+
+    def test_structured_flag_without_pool(self):
+        """测试没有浏览器池时使用代理的结构化成功标记。"""
+        self.history.is_successful.return_value = False
+
+        result = asyncio.run(self.tool._run_agent(self.agent, "test@example.com", "password123"))
+
+        self.assertEqual(result.status, LoginStatus.FAILED)
+        self.assertEqual(result.failure_category, FailureCategory.UNKNOWN)
+
+
+class TestLoginDeadline(unittest.TestCase):
+    """登录时间上限测试类。"""
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key', 'PINTEREST_RATE_LIMIT_STATE': ''})
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.tool = PinterestLoginTool(
+            session_cache=SessionCache(self.temp_dir),
+            negative_cache=NegativeCache(os.path.join(self.temp_dir, "negative_cache.json"))
+        )
+
+    def tearDown(self):
+        self.tool.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_timeout_records_phase_and_cancels(self):
+        """测试超过时间上限时取消登录流程，并记录超时时所处的阶段。"""
+        cancelled = []
+
+        async def stuck_agent(username, password, headless, timeout):
+            with self.tool.metrics.phase("agent_run"):
+                try:
+                    await asyncio.sleep(3600)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+
+        object.__setattr__(self.tool, "_scripted_login", AsyncMock(return_value=None))
+        object.__setattr__(self.tool, "_recipe_login", AsyncMock(return_value=None))
+        object.__setattr__(self.tool, "_agent_login", stuck_agent)
+
+        result = asyncio.run(self.tool.alogin("test@example.com", "password123", timeout=0.05))
+
+        self.assertEqual(cancelled, [True])
+        self.assertEqual(result.status, LoginStatus.ERROR)
+        self.assertEqual(result.failure_category, FailureCategory.TIMEOUT)
+        self.assertEqual(result.timeout_phase, "agent_run")
+        self.assertEqual(set(result.phase_timings), {"scripted", "recipe", "agent"})
+        self.assertIn("agent_run", str(result))
+
+    def test_within_deadline(self):
+        """测试在时间上限内完成的登录不受影响。"""
+        object.__setattr__(
+            self.tool, "_scripted_login",
+            AsyncMock(return_value=LoginResult.succeeded("test@example.com", "scripted"))
+        )
+
+        result = asyncio.run(self.tool.alogin("test@example.com", "password123", timeout=5))
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.timeout_phase, "")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
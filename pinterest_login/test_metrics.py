@@ -0,0 +1,124 @@
+"""登录指标测试文件。"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from login_result import LoginResult
+from metrics import Histogram, LoginMetrics
+from negative_cache import NegativeCache
+from pinterest_login_tool import PinterestLoginTool
+from session_cache import SessionCache
+
+
+class TestLoginMetrics(unittest.TestCase):
+    """LoginMetrics测试类。"""
+
+    def test_disabled_records_nothing(self):
+        """测试关闭时阶段计时使用共享的空实现且不记录数据。"""
+        metrics = LoginMetrics()
+
+        with metrics.phase("navigate") as first, metrics.phase("verify") as second:
+            pass
+        metrics.inc("logins_total")
+        metrics.observe("login_seconds", 1.0)
+
+        self.assertIs(first, second)
+        self.assertEqual(metrics.to_dict(), {"histograms": {}, "counters": {}})
+        self.assertEqual(metrics.to_prometheus(), "")
+
+    def test_phase_records_histogram(self):
+        """测试阶段耗时和阶段异常计数。"""
+        metrics = LoginMetrics(enabled=True)
+
+        with metrics.phase("navigate"):
+            pass
+        with self.assertRaises(RuntimeError):
+            with metrics.phase("navigate"):
+                raise RuntimeError("boom")
+
+        data = metrics.to_dict()
+        phase = data["histograms"]["phase_seconds"][0]
+        self.assertEqual(phase["labels"], {"phase": "navigate"})
+        self.assertEqual(phase["count"], 2)
+        self.assertEqual(data["counters"]["phase_errors_total"][0]["value"], 1)
+
+    def test_histogram_buckets(self):
+        """测试直方图累计计数。"""
+        histogram = Histogram((1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.cumulative(), [("1", 2), ("5", 3), ("+Inf", 4)])
+        self.assertEqual(histogram.sum, 14.5)
+
+    def test_prometheus_format(self):
+        """测试Prometheus文本格式。"""
+        metrics = LoginMetrics(enabled=True)
+        metrics.inc("logins_total", status="success", method="scripted")
+        metrics.observe("browser_launch_seconds", 0.3)
+
+        text = metrics.to_prometheus()
+
+        self.assertIn("# TYPE pinterest_login_browser_launch_seconds histogram", text)
+        self.assertIn('pinterest_login_browser_launch_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn("pinterest_login_browser_launch_seconds_count 1", text)
+        self.assertIn("# TYPE pinterest_login_logins_total counter", text)
+        self.assertIn('pinterest_login_logins_total{method="scripted",status="success"} 1', text)
+
+    def test_dump_json(self):
+        """测试按扩展名导出JSON文件。"""
+        metrics = LoginMetrics(enabled=True)
+        metrics.inc("llm_calls_total", 3)
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "metrics.json")
+            metrics.dump(path)
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        self.assertEqual(data["counters"]["llm_calls_total"][0]["value"], 3)
+
+
+class TestLoginInstrumentation(unittest.TestCase):
+    """登录流程埋点测试类。"""
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key', 'PINTEREST_RATE_LIMIT_STATE': ''})
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.metrics = LoginMetrics(enabled=True)
+        self.tool = PinterestLoginTool(
+            session_cache=SessionCache(self.temp_dir), metrics=self.metrics,
+            negative_cache=NegativeCache(os.path.join(self.temp_dir, "negative_cache.json"))
+        )
+
+    def tearDown(self):
+        self.tool.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_login_records_phases(self):
+        """测试登录记录每种方式的耗时和结果计数。"""
+        object.__setattr__(self.tool, "_scripted_login", AsyncMock(return_value=None))
+        object.__setattr__(self.tool, "_recipe_login", AsyncMock(
+            return_value=LoginResult.succeeded("test@example.com", "recipe")
+        ))
+
+        asyncio.run(self.tool.alogin("test@example.com", "password123"))
+
+        data = self.metrics.to_dict()
+        phases = {item["labels"]["phase"] for item in data["histograms"]["phase_seconds"]}
+        self.assertEqual(phases, {"scripted", "recipe"})
+        self.assertEqual(
+            data["counters"]["logins_total"][0]["labels"],
+            {"method": "recipe", "status": "success"}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,166 @@
+"""密码错误缓存测试文件。"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from login_client import PinterestLoginClient
+from login_result import FailureCategory, LoginResult, LoginStatus
+from metrics import LoginMetrics
+from negative_cache import NegativeCache
+from rate_limiter import AdaptiveRateLimiter
+from session_cache import SessionCache
+
+
+def bad_credentials(username="test@example.com"):
+    return LoginResult.failed(username, "密码不正确", FailureCategory.BAD_CREDENTIALS, method="scripted")
+
+
+class TestNegativeCache(unittest.TestCase):
+    """NegativeCache测试类。"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "negative_cache.json")
+        self.cache = NegativeCache(self.path, ttl=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_hit_and_persistence(self):
+        """测试密码错误结果在重启后仍能命中，文件中不包含用户名和密码。"""
+        self.assertTrue(self.cache.record(bad_credentials(), "password123"))
+
+        reloaded = NegativeCache(self.path, ttl=60)
+
+        self.assertEqual(reloaded.get("Test@Example.com ", "password123"), "密码不正确")
+        self.assertEqual(reloaded.stats()["hits"], 1)
+        with open(self.path, "r", encoding="utf-8") as f:
+            content = f.read()
+        self.assertNotIn("password123", content)
+        self.assertNotIn("test@example.com", content)
+
+    def test_lazy_file(self):
+        """测试第一次记录前不创建缓存文件、锁文件和密钥。"""
+        self.assertIsNone(self.cache.get("test@example.com", "password123"))
+        self.assertFalse(self.cache.invalidate("test@example.com"))
+        self.cache.clear()
+
+        self.assertEqual(os.listdir(self.temp_dir), [])
+        self.assertEqual(self.cache._secret, "")
+
+    def test_shared_file(self):
+        """测试多个实例（如多个进程）共用文件时使用同一个密钥，并发写入互不覆盖。"""
+        other = NegativeCache(self.path, ttl=60)
+
+        def record(cache, prefix):
+            for i in range(20):
+                cache.record(bad_credentials(f"{prefix}{i}@example.com"), "password123")
+
+        threads = [
+            threading.Thread(target=record, args=(self.cache, "a")),
+            threading.Thread(target=record, args=(other, "b")),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(other._secret, self.cache._secret)
+        reloaded = NegativeCache(self.path, ttl=60)
+        self.assertEqual(len(reloaded), 40)
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["negative_cache.json", "negative_cache.json.lock"])
+
+    def test_get_sees_records_from_other_instances(self):
+        """测试查找时重新读取其他实例在本实例创建之后写入的条目。"""
+        other = NegativeCache(self.path, ttl=60)
+        self.assertIsNone(other.get("test@example.com", "password123"))
+
+        self.cache.record(bad_credentials(), "password123")
+        self.assertEqual(other.get("test@example.com", "password123"), "密码不正确")
+
+        self.cache.record(LoginResult.succeeded("test@example.com", "scripted"), "password123")
+        self.assertIsNone(other.get("test@example.com", "password123"))
+
+    def test_password_change_invalidates(self):
+        """测试密码改变后条目失效。"""
+        self.cache.record(bad_credentials(), "password123")
+
+        self.assertIsNone(self.cache.get("test@example.com", "new-password"))
+        self.assertIsNone(self.cache.get("test@example.com", "password123"))
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_expired(self):
+        """测试过期的条目不再命中。"""
+        self.cache.record(bad_credentials(), "password123")
+
+        with patch("negative_cache.time.time", return_value=time.time() + 61):
+            self.assertIsNone(self.cache.get("test@example.com", "password123"))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+    def test_only_confirmed_bad_credentials(self):
+        """测试只记录页面确认的密码错误，登录成功时移除旧条目。"""
+        timed_out = LoginResult.failed(
+            "test@example.com", "超时", FailureCategory.TIMEOUT, status=LoginStatus.ERROR
+        )
+        self.assertFalse(self.cache.record(timed_out, "password123"))
+        page_error = LoginResult.failed(
+            "test@example.com", "页面提示错误：请稍后再试", FailureCategory.PAGE_ERROR, status=LoginStatus.ERROR
+        )
+        self.assertFalse(self.cache.record(page_error, "password123"))
+        self.assertFalse(self.cache.record("Pinterest登录成功！", "password123"))
+
+        self.cache.record(bad_credentials(), "password123")
+        self.cache.record(LoginResult.succeeded("test@example.com", "scripted"), "password123")
+
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestNegativeCacheLogin(unittest.TestCase):
+    """登录流程中的密码错误缓存测试类。"""
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        metrics = LoginMetrics()
+        self.client = PinterestLoginClient(
+            session_cache=SessionCache(self.temp_dir),
+            negative_cache=NegativeCache(os.path.join(self.temp_dir, "negative_cache.json")),
+            metrics=metrics,
+            rate_limiter=AdaptiveRateLimiter(enabled=False, metrics=metrics)
+        )
+
+    def tearDown(self):
+        self.client.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_short_circuit(self):
+        """测试同一组错误凭据第二次登录时不启动浏览器，更换密码后正常登录。"""
+        scripted = AsyncMock(side_effect=[bad_credentials(), LoginResult.succeeded("test@example.com", "scripted")])
+        object.__setattr__(self.client, "_scripted_login", scripted)
+
+        async def scenario():
+            first = await self.client.alogin("test@example.com", "password123")
+            second = await self.client.alogin("test@example.com", "password123")
+            third = await self.client.alogin("test@example.com", "new-password")
+            return first, second, third
+
+        first, second, third = asyncio.run(scenario())
+
+        self.assertEqual(first.method, "scripted")
+        self.assertEqual((second.method, second.from_cache), ("negative_cache", True))
+        self.assertEqual(second.failure_category, FailureCategory.BAD_CREDENTIALS)
+        self.assertEqual(str(second), "Pinterest登录失败：密码不正确")
+        self.assertTrue(third.success)
+        self.assertEqual(scripted.await_count, 2)
+        self.assertEqual(self.client.negative_cache.stats()["hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
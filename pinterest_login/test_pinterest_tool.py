@@ -1,7 +1,11 @@
 """Pinterest登录工具测试文件。"""
 
+import asyncio
+import shutil
+import subprocess
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock
 import os
 import sys
 
@@ -9,7 +13,9 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from pinterest_login_tool import PinterestLoginTool, PinterestLoginToolSchema
+from login_client import PinterestLoginClient
 from config import PinterestConfig
+from login_result import LoginResult
 
 
 class TestPinterestLoginTool(unittest.TestCase):
@@ -17,14 +23,24 @@ class TestPinterestLoginTool(unittest.TestCase):
     
     def setUp(self):
         """测试前准备。"""
+        # 限速状态和失败缓存写入临时目录，不与其他测试和进程共用
+        self.temp_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {
+            'PINTEREST_RATE_LIMIT_STATE': os.path.join(self.temp_dir, 'rate_limit.json'),
+            'PINTEREST_NEGATIVE_CACHE_PATH': os.path.join(self.temp_dir, 'negative_cache.json')
+        })
+        self.env.start()
         # 模拟API密钥
         os.environ['OPENAI_API_KEY'] = 'test-api-key'
         self.tool = PinterestLoginTool()
     
     def tearDown(self):
         """测试后清理。"""
+        self.tool.shutdown()
         if 'OPENAI_API_KEY' in os.environ:
             del os.environ['OPENAI_API_KEY']
+        self.env.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
     
     def test_tool_initialization(self):
         """测试工具初始化。"""
@@ -42,6 +58,13 @@ class TestPinterestLoginTool(unittest.TestCase):
         
         self.assertIn("OpenAI API密钥", str(context.exception))
     
+    def test_unknown_agent_mode(self):
+        """测试未知的代理模式。"""
+        with self.assertRaises(ValueError) as context:
+            PinterestLoginTool(agent_mode="turbo")
+        
+        self.assertIn("代理模式", str(context.exception))
+    
     def test_schema_validation(self):
         """测试输入参数验证。"""
         # 有效参数
@@ -63,10 +86,10 @@ class TestPinterestLoginTool(unittest.TestCase):
         self.assertIn("错误", result)
         self.assertIn("用户名和密码", result)
     
-    @patch('pinterest_login_tool.asyncio.run')
-    def test_run_with_valid_parameters(self, mock_asyncio_run):
+    @patch.object(PinterestLoginTool, '_async_login', new_callable=AsyncMock)
+    def test_run_with_valid_parameters(self, mock_async_login):
         """测试使用有效参数运行。"""
-        mock_asyncio_run.return_value = "登录成功"
+        mock_async_login.return_value = LoginResult.succeeded("test@example.com", "scripted")
         
         result = self.tool._run(
             username="test@example.com",
@@ -75,13 +98,13 @@ class TestPinterestLoginTool(unittest.TestCase):
             timeout=30
         )
         
-        mock_asyncio_run.assert_called_once()
-        self.assertEqual(result, "登录成功")
+        mock_async_login.assert_awaited_once()
+        self.assertEqual(result, "Pinterest登录成功！用户：test@example.com")
     
-    @patch('pinterest_login_tool.asyncio.run')
-    def test_run_with_exception(self, mock_asyncio_run):
+    @patch.object(PinterestLoginTool, '_async_login', new_callable=AsyncMock)
+    def test_run_with_exception(self, mock_async_login):
         """测试运行时异常处理。"""
-        mock_asyncio_run.side_effect = Exception("测试异常")
+        mock_async_login.side_effect = Exception("测试异常")
         
         result = self.tool._run(
             username="test@example.com",
@@ -90,6 +113,45 @@ class TestPinterestLoginTool(unittest.TestCase):
         
         self.assertIn("Pinterest登录失败", result)
         self.assertIn("测试异常", result)
+    
+    @patch.object(PinterestLoginTool, '_async_login', new_callable=AsyncMock)
+    def test_run_reuses_background_loop(self, mock_async_login):
+        """测试多次同步调用共用同一个后台事件循环。"""
+        loops = []
+        
+        async def record_loop(username, *args):
+            loops.append(asyncio.get_running_loop())
+            return LoginResult.succeeded(username, "scripted")
+        
+        mock_async_login.side_effect = record_loop
+        # 使用不同账号，避免第二次调用由结果缓存直接应答
+        for username in ("a@example.com", "b@example.com"):
+            result = self.tool._run(username=username, password="testpassword123")
+            self.assertEqual(result, f"Pinterest登录成功！用户：{username}")
+        
+        self.assertEqual(len(loops), 2)
+        self.assertIs(loops[0], loops[1])
+    
+    @patch.object(PinterestLoginTool, '_async_login', new_callable=AsyncMock)
+    def test_run_inside_running_loop(self, mock_async_login):
+        """测试在已有运行中事件循环的代码里调用同步接口。"""
+        mock_async_login.return_value = LoginResult.succeeded("test@example.com", "scripted")
+        
+        async def caller():
+            return self.tool._run(username="test@example.com", password="testpassword123")
+        
+        self.assertEqual(asyncio.run(caller()), "Pinterest登录成功！用户：test@example.com")
+    
+    @patch.object(PinterestLoginTool, '_async_login', new_callable=AsyncMock)
+    def test_alogin(self, mock_async_login):
+        """测试在调用方事件循环中异步登录。"""
+        mock_async_login.return_value = LoginResult.succeeded("test@example.com", "scripted")
+        
+        result = asyncio.run(self.tool.alogin("test@example.com", "testpassword123"))
+        
+        self.assertTrue(result.success)
+        self.assertEqual(str(result), "Pinterest登录成功！用户：test@example.com")
+        self.assertFalse(self.tool.background_loop.is_running())
 
 
 class TestPinterestConfig(unittest.TestCase):
@@ -121,6 +183,13 @@ class TestPinterestConfig(unittest.TestCase):
         self.assertNotIn("password123", task)  # 密码应该被隐藏
         self.assertIn("*", task)  # 应该有星号替代
     
+    def test_get_lean_login_task(self):
+        """测试精简模式的任务描述不包含密码且比默认任务短。"""
+        task = PinterestConfig.get_lean_login_task("test@example.com")
+        self.assertIn("test@example.com", task)
+        self.assertIn(PinterestConfig.SENSITIVE_PASSWORD_KEY, task)
+        self.assertLess(len(task), len(PinterestConfig.get_login_task("test@example.com", "password123")))
+    
     def test_validate_credentials(self):
         """测试凭据验证。"""
         # 有效凭据
@@ -173,6 +242,38 @@ class TestIntegration(unittest.TestCase):
         self.assertTrue(valid)
 
 
+
+class TestLazyImport(unittest.TestCase):
+    """按需导入测试类。"""
+    
+    def test_package_import_is_lightweight(self):
+        """测试导入包时不加载CrewAI、browser-use和LLM客户端。"""
+        code = (
+            "import sys, pinterest_login; "
+            "print(sorted(m for m in ('crewai', 'browser_use', 'openai', 'playwright') if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        self.assertEqual(output, "[]")
+    
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key', 'PINTEREST_RATE_LIMIT_STATE': ''})
+    @patch.object(PinterestLoginClient, '_async_login', new_callable=AsyncMock)
+    def test_plain_client(self, mock_async_login):
+        """测试不依赖CrewAI的登录入口。"""
+        mock_async_login.return_value = LoginResult.succeeded("test@example.com", "scripted")
+        with tempfile.TemporaryDirectory() as temp_dir, patch.dict(os.environ, {
+            'PINTEREST_NEGATIVE_CACHE_PATH': os.path.join(temp_dir, 'negative_cache.json')
+        }):
+            client = PinterestLoginClient()
+            result = client.login("test@example.com", "testpassword123")
+            client.shutdown()
+        
+        self.assertEqual(result, "Pinterest登录成功！用户：test@example.com")
+
+
 if __name__ == '__main__':
     # 设置测试环境
     os.environ['OPENAI_API_KEY'] = 'test-api-key-for-testing'
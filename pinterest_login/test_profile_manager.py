@@ -0,0 +1,102 @@
+"""持久化浏览器配置目录测试文件。"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from metrics import LoginMetrics
+from profile_manager import ProfileLockedError, ProfileManager
+
+
+def write_file(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+class TestProfileManager(unittest.TestCase):
+    """ProfileManager测试类。"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = ProfileManager(
+            self.temp_dir, max_total_mb=1, lock_timeout=0.1,
+            prune_dirs=["Default/Cache"], metrics=LoginMetrics()
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def use(self, username, files=None):
+        """借用一次配置目录并写入文件，返回配置目录。"""
+        async def scenario():
+            async with self.manager.acquire(username) as profile:
+                for relative, size in (files or {}).items():
+                    write_file(os.path.join(profile.user_data_dir, relative), size)
+                return profile
+
+        return asyncio.run(scenario())
+
+    def test_create_and_reuse(self):
+        """测试同一账号复用配置目录，并统计命中率。"""
+        first = self.use("a@example.com", {"Default/Cookies": 100})
+        second = self.use("A@example.com ")
+
+        self.assertFalse(first.reused)
+        self.assertTrue(second.reused)
+        self.assertEqual(first.path, second.path)
+        self.assertTrue(os.path.exists(os.path.join(second.user_data_dir, "Default/Cookies")))
+        stats = self.manager.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_prune_cache_dirs(self):
+        """测试使用后删除缓存子目录，保留其他数据，并记录大小。"""
+        profile = self.use("a@example.com", {"Default/Cookies": 100, "Default/Cache/data_0": 5000})
+
+        self.assertFalse(os.path.exists(os.path.join(profile.user_data_dir, "Default/Cache")))
+        self.assertEqual(self.manager.sizes(), {"a@example.com": 100})
+        self.assertEqual(self.manager.stats()["pruned_bytes"], 5000)
+
+    def test_lock_per_username(self):
+        """测试同一账号的配置目录同时只能被借用一次，其他账号不受影响。"""
+        async def scenario():
+            async with self.manager.acquire("a@example.com"):
+                async with self.manager.acquire("b@example.com"):
+                    pass
+                with self.assertRaises(ProfileLockedError):
+                    async with self.manager.acquire("a@example.com"):
+                        pass
+
+        asyncio.run(scenario())
+        self.assertEqual(self.manager.stats()["lock_waits"], 1)
+
+    def test_lru_eviction(self):
+        """测试超过磁盘上限时按最近使用时间淘汰。"""
+        half = 600 * 1024
+        self.use("old@example.com", {"Default/Cookies": half})
+        time.sleep(0.01)
+        self.use("new@example.com", {"Default/Cookies": half})
+
+        self.assertEqual(set(self.manager.sizes()), {"new@example.com"})
+        self.assertEqual(self.manager.stats()["evictions"], 1)
+
+    def test_in_use_profile_not_evicted(self):
+        """测试正在使用的配置目录不会被淘汰，也不能被删除。"""
+        async def scenario():
+            async with self.manager.acquire("a@example.com") as profile:
+                write_file(os.path.join(profile.user_data_dir, "Default/Cookies"), 10)
+                self.assertFalse(self.manager.remove("a@example.com"))
+            self.assertTrue(self.manager.remove("a@example.com"))
+
+        asyncio.run(scenario())
+        self.assertEqual(self.manager.sizes(), {})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
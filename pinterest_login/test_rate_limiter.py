@@ -0,0 +1,172 @@
+"""登录节奏控制测试文件。"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from login_result import FailureCategory, LoginResult, LoginStatus
+from metrics import LoginMetrics
+from rate_limiter import AdaptiveRateLimiter, TokenBucket
+
+
+def timed_out(username="a@example.com"):
+    return LoginResult.failed(username, "超时", FailureCategory.TIMEOUT, status=LoginStatus.ERROR)
+
+
+def succeeded(username="a@example.com"):
+    return LoginResult.succeeded(username, "scripted")
+
+
+class TestTokenBucket(unittest.TestCase):
+    """TokenBucket测试类。"""
+
+    def test_reserve_and_refill(self):
+        """测试突发容量用完后按速率排队，时间流逝后补充令牌。"""
+        bucket = TokenBucket(rate=2, burst=2)
+        now = bucket.updated
+
+        self.assertEqual(bucket.reserve(now), 0.0)
+        self.assertEqual(bucket.reserve(now), 0.0)
+        self.assertAlmostEqual(bucket.reserve(now), 0.5)
+        self.assertAlmostEqual(bucket.reserve(now), 1.0)
+        self.assertEqual(bucket.reserve(now + 10), 0.0)
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+    """AdaptiveRateLimiter测试类。"""
+
+    def make_limiter(self, **options):
+        config = {"rate": 1.0, "burst": 10, "account_interval": 0, "min_samples": 4, "window": 4,
+                  "cooldown": 0, "metrics": LoginMetrics()}
+        config.update(options)
+        return AdaptiveRateLimiter(**config)
+
+    def test_egress_pacing_and_queue_depth(self):
+        """测试出口令牌用完后排队等待，并报告队列长度和等待时间。"""
+        limiter = self.make_limiter(rate=50, burst=1)
+        depths = []
+
+        async def login():
+            async with limiter.slot("a@example.com") as waited:
+                depths.append(limiter.stats()["egress"]["default"]["queue_depth"])
+                return waited
+
+        async def scenario():
+            return await asyncio.gather(*(login() for _ in range(3)))
+
+        waits = asyncio.run(scenario())
+
+        self.assertEqual(waits[0], 0.0)
+        self.assertAlmostEqual(max(waits), 0.04, delta=0.01)
+        stats = limiter.stats()["egress"]["default"]
+        self.assertEqual(stats["acquired"], 3)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreater(stats["wait_seconds"], 0)
+        # 第二个请求获得令牌时第三个仍在排队
+        self.assertEqual(max(depths), 1)
+
+    def test_account_interval(self):
+        """测试同一账号超过突发次数后等待，其他账号不受影响。"""
+        limiter = self.make_limiter(account_interval=0.05, account_burst=1)
+
+        async def scenario():
+            waits = []
+            for username in ("a@example.com", "b@example.com", "A@example.com"):
+                async with limiter.slot(username) as waited:
+                    waits.append(waited)
+            return waits
+
+        waits = asyncio.run(scenario())
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertGreater(waits[2], 0.03)
+
+    def test_backoff_and_ramp_up(self):
+        """测试限流迹象比例过高时降速，恢复正常后逐步提速。"""
+        limiter = self.make_limiter(increase_step=0.1, max_rate=2.0)
+
+        for _ in range(4):
+            limiter.record(timed_out())
+        self.assertEqual(limiter.stats()["egress"]["default"]["rate"], 0.5)
+
+        for _ in range(8):
+            limiter.record(succeeded())
+        stats = limiter.stats()["egress"]["default"]
+        self.assertEqual(stats["decreases"], 1)
+        self.assertGreater(stats["increases"], 0)
+        self.assertGreater(stats["rate"], 0.5)
+
+    def test_bad_credentials_do_not_back_off(self):
+        """测试密码错误、缓存命中和无效输入不被视为限流迹象。"""
+        limiter = self.make_limiter()
+
+        for _ in range(4):
+            limiter.record(LoginResult.failed("a@example.com", "密码错误", FailureCategory.BAD_CREDENTIALS))
+            limiter.record(LoginResult.succeeded("a@example.com", "cache", from_cache=True))
+            limiter.record(LoginResult.failed("", "用户名不能为空", FailureCategory.INVALID_INPUT,
+                                              status=LoginStatus.ERROR))
+
+        stats = limiter.stats()["egress"]["default"]
+        self.assertEqual(stats["decreases"], 0)
+        self.assertEqual(stats["throttle_rate"], 0.0)
+
+    def test_cancelled_wait_refunds_token(self):
+        """测试等待期间被取消的请求归还令牌。"""
+        limiter = self.make_limiter(rate=1, burst=1)
+
+        async def login():
+            async with limiter.slot("b@example.com"):
+                pass
+
+        async def scenario():
+            async with limiter.slot("a@example.com"):
+                pass
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(login(), 0.05)
+            return limiter._egresses["default"].bucket.tokens
+
+        self.assertGreater(asyncio.run(scenario()), -0.5)
+
+    def test_shared_state_across_limiters(self):
+        """测试使用同一状态文件的限速器（如不同进程）共用出口的令牌和速率。"""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        path = os.path.join(temp_dir, "rate_limit.json")
+        first = self.make_limiter(rate=10, burst=2, state_path=path)
+        second = self.make_limiter(rate=10, burst=2, state_path=path)
+
+        async def login(limiter):
+            async with limiter.slot("a@example.com") as waited:
+                return waited
+
+        async def scenario():
+            return [await login(first), await login(first), await login(second)]
+
+        waits = asyncio.run(scenario())
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1, delta=0.02)
+
+        for _ in range(4):
+            first.record(timed_out())
+        # 降速写入共享状态，另一个限速器的下一次预留按新速率排队
+        asyncio.run(login(second))
+        self.assertEqual(second.stats()["egress"]["default"]["rate"], 5.0)
+
+    def test_disabled(self):
+        """测试关闭时不等待也不记录。"""
+        limiter = self.make_limiter(rate=0.001, burst=1, enabled=False)
+
+        async def scenario():
+            for _ in range(3):
+                async with limiter.slot("a@example.com") as waited:
+                    self.assertEqual(waited, 0.0)
+
+        asyncio.run(scenario())
+        self.assertEqual(limiter.stats()["egress"], {})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
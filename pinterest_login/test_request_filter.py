@@ -0,0 +1,82 @@
+"""请求拦截测试文件。"""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from metrics import LoginMetrics
+from request_filter import RequestFilter
+
+
+def make_route(url, resource_type):
+    route = MagicMock()
+    route.request.url = url
+    route.request.resource_type = resource_type
+    route.abort = AsyncMock()
+    route.continue_ = AsyncMock()
+    return route
+
+
+class TestRequestFilter(unittest.TestCase):
+    """RequestFilter测试类。"""
+
+    def setUp(self):
+        self.metrics = LoginMetrics(enabled=True)
+        self.request_filter = RequestFilter(
+            blocked_resource_types=["image", "font"],
+            blocked_domains=["doubleclick.net", "ct.pinterest.com"],
+            metrics=self.metrics
+        )
+
+    def test_match(self):
+        """测试按资源类型和域名（含子域名）匹配。"""
+        self.assertEqual(self.request_filter.match("https://i.pinimg.com/a.jpg", "image"), "image")
+        self.assertEqual(
+            self.request_filter.match("https://ad.doubleclick.net/x.js", "script"), "doubleclick.net"
+        )
+        self.assertEqual(
+            self.request_filter.match("https://ct.pinterest.com/v3/", "xhr"), "ct.pinterest.com"
+        )
+        self.assertIsNone(self.request_filter.match("https://www.pinterest.com/login/", "document"))
+        self.assertIsNone(self.request_filter.match("https://notdoubleclick.net/x.js", "script"))
+
+    def test_handle_counts_requests(self):
+        """测试拦截和放行的计数。"""
+        routes = [
+            make_route("https://www.pinterest.com/login/", "document"),
+            make_route("https://i.pinimg.com/a.jpg", "image"),
+            make_route("https://ad.doubleclick.net/x.js", "script"),
+        ]
+
+        async def handle_all():
+            for route in routes:
+                await self.request_filter._handle(route)
+
+        asyncio.run(handle_all())
+
+        routes[0].continue_.assert_awaited_once()
+        routes[1].abort.assert_awaited_once()
+        routes[2].abort.assert_awaited_once()
+        self.assertEqual(self.request_filter.stats(), {
+            "allowed": 1,
+            "blocked": 2,
+            "blocked_by_type": {"image": 1},
+            "blocked_by_domain": {"doubleclick.net": 1},
+        })
+        self.assertIn("pinterest_login_requests_blocked_total", self.metrics.to_prometheus())
+
+    def test_install(self):
+        """测试启用时注册路由，关闭时不注册。"""
+        context = MagicMock()
+        context.route = AsyncMock()
+
+        asyncio.run(self.request_filter.install(context))
+        context.route.assert_awaited_once_with("**/*", self.request_filter._handle)
+
+        context.route.reset_mock()
+        asyncio.run(RequestFilter.from_config({"enabled": False}).install(context))
+        context.route.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
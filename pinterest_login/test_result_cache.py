@@ -0,0 +1,141 @@
+"""登录结果缓存与并发调用合并测试文件。"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from login_result import FailureCategory, LoginResult, LoginStatus
+from metrics import LoginMetrics
+from negative_cache import NegativeCache
+from pinterest_login_tool import PinterestLoginTool
+from rate_limiter import AdaptiveRateLimiter
+from result_cache import LoginResultCache
+from session_cache import SessionCache
+
+
+class TestLoginResultCache(unittest.TestCase):
+    """LoginResultCache测试类。"""
+
+    def setUp(self):
+        self.cache = LoginResultCache(ttl=60, metrics=LoginMetrics())
+        self.calls = 0
+
+    async def login(self, result=None, delay=0.05):
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return result or LoginResult.succeeded("a@example.com", "scripted")
+
+    def test_concurrent_calls_share_login(self):
+        """测试同一组凭据的并发调用只登录一次，之后的调用命中缓存。"""
+        async def run():
+            results = await asyncio.gather(*(
+                self.cache.run("a@example.com", "password123", self.login) for _ in range(5)
+            ))
+            results.append(await self.cache.run("A@example.com ", "password123", self.login))
+            return results
+
+        results = asyncio.run(run())
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(self.cache.stats(), {"hits": 1, "joins": 4, "misses": 1, "size": 1, "inflight": 0})
+
+    def test_different_password_logs_in(self):
+        """测试密码不同的调用不共用结果，缓存中不保存明文密码。"""
+        async def run():
+            await self.cache.run("a@example.com", "password123", self.login)
+            await self.cache.run("a@example.com", "password456", self.login)
+
+        asyncio.run(run())
+
+        self.assertEqual(self.calls, 2)
+        self.assertNotIn("password123", repr(self.cache._entries))
+
+    def test_errors_not_cached(self):
+        """测试流程出错的结果和异常不缓存。"""
+        error = LoginResult.failed("a@example.com", "超时", FailureCategory.TIMEOUT, status=LoginStatus.ERROR)
+
+        async def failing():
+            self.calls += 1
+            raise RuntimeError("浏览器崩溃")
+
+        async def run():
+            await self.cache.run("a@example.com", "password123", lambda: self.login(error))
+            await self.cache.run("a@example.com", "password123", lambda: self.login(error))
+            for _ in range(2):
+                with self.assertRaises(RuntimeError):
+                    await self.cache.run("b@example.com", "password123", failing)
+
+        asyncio.run(run())
+
+        self.assertEqual(self.calls, 4)
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_cancelled_caller_does_not_cancel_login(self):
+        """测试先发起的调用被取消时，等待同一结果的调用仍然得到结果。"""
+        async def run():
+            first = asyncio.ensure_future(self.cache.run("a@example.com", "password123", self.login))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(self.cache.run("a@example.com", "password123", self.login))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()).status, LoginStatus.SUCCESS)
+        self.assertEqual(self.calls, 1)
+
+
+class TestToolDeduplication(unittest.TestCase):
+    """工具调用合并测试类。"""
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        metrics = LoginMetrics()
+        self.tool = PinterestLoginTool(
+            session_cache=SessionCache(os.path.join(self.temp_dir, "sessions")),
+            negative_cache=NegativeCache(os.path.join(self.temp_dir, "negative_cache.json")),
+            metrics=metrics,
+            rate_limiter=AdaptiveRateLimiter(enabled=False, metrics=metrics)
+        )
+
+        async def scripted(*args, **kwargs):
+            await asyncio.sleep(0.1)
+            return LoginResult.succeeded("test@example.com", "scripted")
+
+        self.scripted = AsyncMock(side_effect=scripted)
+        object.__setattr__(self.tool, "_scripted_login", self.scripted)
+
+    def tearDown(self):
+        self.tool.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_threads_share_login(self):
+        """测试多个线程同时同步调用工具时只登录一次。"""
+        results = []
+
+        def call():
+            results.append(self.tool._run(username="test@example.com", password="password123"))
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.scripted.await_count, 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertIn("成功", results[0])
+
+    def test_crewai_cache_disabled(self):
+        """测试CrewAI自带的以明文参数为键的缓存被停用。"""
+        arguments = {"username": "test@example.com", "password": "password123"}
+        self.assertFalse(self.tool.cache_function(arguments, "登录成功"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,189 @@
+"""失败分类与重试策略测试文件。"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from login_client import PinterestLoginClient
+from login_result import FailureCategory, LoginResult, LoginStatus
+from metrics import LoginMetrics
+from negative_cache import NegativeCache
+from rate_limiter import AdaptiveRateLimiter
+from retry_policy import RetryPolicy, classify_exception, classify_message
+from session_cache import SessionCache
+
+
+class RateLimitError(Exception):
+    """与openai同名的异常类。"""
+
+
+class ConnectError(Exception):
+    """与httpx同名的异常类。"""
+
+
+class AuthenticationError(Exception):
+    """与openai同名的异常类。"""
+
+
+class TestClassify(unittest.TestCase):
+    """失败分类测试类。"""
+
+    def test_classify_exception(self):
+        """测试按异常类名、错误信息和异常类型分类。"""
+        cases = [
+            (RateLimitError("slow down"), FailureCategory.LLM_PROVIDER),
+            (ConnectError("refused"), FailureCategory.NETWORK),
+            (Exception("page.goto: net::ERR_CONNECTION_RESET"), FailureCategory.NETWORK),
+            (ConnectionResetError(), FailureCategory.NETWORK),
+            (asyncio.TimeoutError(), FailureCategory.TIMEOUT),
+            (ImportError("browser_use"), FailureCategory.DEPENDENCY),
+            (ValueError("boom"), FailureCategory.UNKNOWN),
+        ]
+        for exc, category in cases:
+            with self.subTest(exc=type(exc).__name__):
+                self.assertEqual(classify_exception(exc), category)
+
+    def test_llm_config_errors_not_retried(self):
+        """测试密钥无效、无权限和额度用尽归为 llm_config，不重试。"""
+        cases = [
+            AuthenticationError("Error code: 401 - invalid_api_key"),
+            RateLimitError("Error code: 429 - {'code': 'insufficient_quota'}"),
+            Exception("PermissionDeniedError: Error code: 403"),
+        ]
+        policy = RetryPolicy(jitter=False, metrics=LoginMetrics())
+        for exc in cases:
+            with self.subTest(exc=str(exc)):
+                category = classify_exception(exc)
+                self.assertEqual(category, FailureCategory.LLM_CONFIG)
+                self.assertIsNone(policy.next_delay(category, 1))
+        self.assertEqual(classify_message("Error code: 429 - insufficient_quota"), FailureCategory.LLM_CONFIG)
+
+    def test_classify_message(self):
+        """测试按代理执行历史中的错误信息分类。"""
+        self.assertEqual(classify_message("Error code: 429 - Rate limit reached"), FailureCategory.LLM_PROVIDER)
+        self.assertEqual(classify_message("net::ERR_NAME_NOT_RESOLVED"), FailureCategory.NETWORK)
+        self.assertIsNone(classify_message("Element not found"))
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """RetryPolicy测试类。"""
+
+    def setUp(self):
+        self.policy = RetryPolicy(
+            {"network": {"max_retries": 3, "base_delay": 1, "max_delay": 3}},
+            jitter=False, metrics=LoginMetrics()
+        )
+
+    def test_exponential_backoff(self):
+        """测试短暂性错误按指数退避重试，超过次数后放弃。"""
+        delays = [self.policy.next_delay(FailureCategory.NETWORK, attempt) for attempt in range(1, 5)]
+
+        self.assertEqual(delays, [1, 2, 3, None])
+        self.assertEqual(self.policy.stats()["network"], {"failures": 4, "retries": 3, "gave_up": 1})
+
+    def test_no_retry(self):
+        """测试密码错误和成功结果不重试。"""
+        self.assertIsNone(self.policy.next_delay(FailureCategory.BAD_CREDENTIALS, 1))
+        self.assertIsNone(self.policy.next_delay(None, 1))
+        self.assertEqual(self.policy.stats(), {"bad_credentials": {"failures": 1, "retries": 0, "gave_up": 0}})
+
+    def test_no_retry_past_deadline(self):
+        """测试等待时间会超过剩余时间时不再重试，计为放弃。"""
+        self.assertEqual(self.policy.next_delay(FailureCategory.NETWORK, 2, remaining=2.5), 2)
+        self.assertIsNone(self.policy.next_delay(FailureCategory.NETWORK, 2, remaining=1.5))
+        self.assertEqual(self.policy.stats()["network"], {"failures": 2, "retries": 1, "gave_up": 1})
+
+    def test_jitter(self):
+        """测试随机抖动不超过退避上限。"""
+        policy = RetryPolicy({"llm_provider": {"max_retries": 5, "base_delay": 2, "max_delay": 60}},
+                             metrics=LoginMetrics())
+        for attempt in range(1, 6):
+            self.assertTrue(0 <= policy.next_delay(FailureCategory.LLM_PROVIDER, attempt) <= 2 * 2 ** (attempt - 1))
+
+
+class TestLoginRetry(unittest.TestCase):
+    """登录重试测试类。"""
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        metrics = LoginMetrics()
+        self.client = PinterestLoginClient(
+            session_cache=SessionCache(self.temp_dir),
+            negative_cache=NegativeCache(os.path.join(self.temp_dir, "negative_cache.json")),
+            metrics=metrics,
+            rate_limiter=AdaptiveRateLimiter(enabled=False, metrics=metrics),
+            retry_policy=RetryPolicy(
+                {"network": {"max_retries": 2, "base_delay": 0.01, "max_delay": 0.01}}, metrics=metrics
+            )
+        )
+
+    def tearDown(self):
+        self.client.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def login_with(self, *results):
+        scripted = AsyncMock(side_effect=list(results))
+        object.__setattr__(self.client, "_scripted_login", scripted)
+        result = asyncio.run(self.client.alogin("test@example.com", "password123"))
+        return result, scripted.await_count
+
+    def test_network_error_retried(self):
+        """测试网络错误后重试，并记录尝试次数。"""
+        network_error = LoginResult.failed(
+            "test@example.com", "net::ERR_CONNECTION_RESET", FailureCategory.NETWORK,
+            status=LoginStatus.ERROR, method="scripted"
+        )
+
+        result, calls = self.login_with(network_error, LoginResult.succeeded("test@example.com", "scripted"))
+
+        self.assertTrue(result.success)
+        self.assertEqual((calls, result.attempts), (2, 2))
+        self.assertEqual(self.client.retry_policy.stats()["network"]["retries"], 1)
+
+    def test_retries_share_deadline(self):
+        """测试所有尝试和重试前的等待共用一个时间上限，后续尝试只得到剩余时间。"""
+        object.__setattr__(self.client, "retry_policy", RetryPolicy(
+            {"network": {"max_retries": 5, "base_delay": 0.3, "max_delay": 0.3}},
+            jitter=False, metrics=LoginMetrics()
+        ))
+        timeouts = []
+
+        async def slow_network_error(username, password, headless, timeout):
+            timeouts.append(timeout)
+            await asyncio.sleep(0.1)
+            return LoginResult.failed(
+                username, "net::ERR_CONNECTION_RESET", FailureCategory.NETWORK,
+                status=LoginStatus.ERROR, method="scripted"
+            )
+
+        object.__setattr__(self.client, "_scripted_login", slow_network_error)
+        started = time.monotonic()
+        result = asyncio.run(self.client.alogin("test@example.com", "password123", timeout=1))
+
+        self.assertLess(time.monotonic() - started, 1.2)
+        self.assertEqual(result.failure_category, FailureCategory.NETWORK)
+        self.assertEqual(len(timeouts), result.attempts)
+        self.assertEqual(result.attempts, 3)
+        self.assertTrue(all(later < earlier for earlier, later in zip(timeouts, timeouts[1:])))
+        self.assertEqual(self.client.retry_policy.stats()["network"]["gave_up"], 1)
+
+    def test_bad_credentials_not_retried(self):
+        """测试密码错误和验证挑战不重试。"""
+        # 密码错误会记入失败缓存，放在最后
+        for category in (FailureCategory.CHALLENGE, FailureCategory.BAD_CREDENTIALS):
+            with self.subTest(category=category.value):
+                failed = LoginResult.failed("test@example.com", "失败", category, method="scripted")
+
+                result, calls = self.login_with(failed)
+
+                self.assertEqual((calls, result.attempts), (1, 1))
+                self.assertEqual(result.failure_category, category)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,224 @@
+"""脚本化登录测试文件。"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from config import PinterestConfig
+from login_result import LoginResult, LoginStatus
+from negative_cache import NegativeCache
+from scripted_login import LoginChallengeError, LoginLayoutError, LoginPageError, ScriptedLoginEngine
+from pinterest_login_tool import PinterestLoginTool
+
+
+class FakePage:
+    """只实现登录流程用到的Playwright页面方法。"""
+
+    def __init__(self, present=(), error_text="", url="about:blank"):
+        self.present = set(present)
+        self.error_text = error_text
+        self.url = url
+        self.filled = {}
+        self.clicked = []
+        self.goto = AsyncMock()
+
+    def _matches(self, selector):
+        return any(name in self.present for name in selector.split(", "))
+
+    async def wait_for_selector(self, selector, state="visible", timeout=0):
+        if not self._matches(selector):
+            raise TimeoutError(f"Timeout waiting for {selector}")
+
+    async def query_selector(self, selector):
+        if not self._matches(selector):
+            return None
+        element = MagicMock()
+        element.inner_text = AsyncMock(return_value=self.error_text)
+        element.is_visible = AsyncMock(return_value=True)
+        return element
+
+    async def fill(self, selector, value):
+        self.filled[selector] = value
+
+    async def click(self, selector):
+        self.clicked.append(selector)
+
+
+def form_selectors(*extra):
+    """登录表单页面上存在的选择器。"""
+    selectors = PinterestConfig.SELECTORS
+    names = [selectors["username_input"], selectors["password_input"], selectors["submit_button"]]
+    names.extend(selectors[name] for name in extra)
+    return [part for name in names for part in name.split(", ")]
+
+
+class TestScriptedLoginEngine(unittest.TestCase):
+    """脚本化登录引擎测试类。"""
+
+    def setUp(self):
+        """测试前准备。"""
+        self.engine = ScriptedLoginEngine(element_timeout=0.01)
+
+    def test_login_success(self):
+        """测试出现成功标识时判定为登录成功。"""
+        page = FakePage(present=form_selectors("success_indicator"))
+
+        success, error_text = asyncio.run(
+            self.engine.login(page, "test@example.com", "password123", 1)
+        )
+
+        self.assertTrue(success)
+        self.assertEqual(error_text, "")
+        self.assertIn("test@example.com", page.filled.values())
+        self.assertEqual(len(page.clicked), 1)
+
+    def test_login_failure(self):
+        """测试出现错误信息时判定为登录失败。"""
+        page = FakePage(present=form_selectors("error_message"), error_text="密码不正确")
+
+        success, error_text = asyncio.run(
+            self.engine.login(page, "test@example.com", "password123", 1)
+        )
+
+        self.assertFalse(success)
+        self.assertEqual(error_text, "密码不正确")
+
+    def test_field_error_is_credential_failure(self):
+        """测试字段上的错误提示判定为凭据错误。"""
+        page = FakePage(present=form_selectors("credential_error"), error_text="")
+
+        success, error_text = asyncio.run(
+            self.engine.login(page, "test@example.com", "password123", 1)
+        )
+
+        self.assertFalse(success)
+        self.assertEqual(error_text, "用户名或密码错误")
+
+    def test_generic_error_not_credential_failure(self):
+        """测试不能确认是凭据错误的页面错误抛出 LoginPageError。"""
+        for error_text in ("Something went wrong, please try again later", ""):
+            with self.subTest(error_text=error_text):
+                page = FakePage(present=form_selectors("error_message"), error_text=error_text)
+
+                with self.assertRaises(LoginPageError):
+                    asyncio.run(self.engine.login(page, "test@example.com", "password123", 1))
+
+    def test_missing_selector(self):
+        """测试缺少表单元素时抛出 LoginLayoutError。"""
+        page = FakePage(present=[])
+
+        with self.assertRaises(LoginLayoutError):
+            asyncio.run(self.engine.login(page, "test@example.com", "password123", 1))
+
+    def test_unknown_outcome(self):
+        """测试提交后无法判定结果时抛出 LoginLayoutError。"""
+        page = FakePage(present=form_selectors())
+
+        with self.assertRaises(LoginLayoutError):
+            asyncio.run(self.engine.login(page, "test@example.com", "password123", 1))
+
+    def test_challenge(self):
+        """测试提交后页面要求两步验证时抛出 LoginChallengeError。"""
+        page = FakePage(present=form_selectors("challenge_indicator"))
+
+        with self.assertRaises(LoginChallengeError):
+            asyncio.run(self.engine.login(page, "test@example.com", "password123", 1))
+
+
+class TestLoginWatcher(unittest.TestCase):
+    """代理运行期间的页面监视测试类。"""
+
+    def setUp(self):
+        self.engine = ScriptedLoginEngine()
+        self.login_url = PinterestConfig.PINTEREST_LOGIN_URL
+        self.success = PinterestConfig.SELECTORS["success_indicator"].split(", ")
+
+    def watch(self, page, timeout=1):
+        context = MagicMock()
+        context.pages = [page]
+        return asyncio.run(asyncio.wait_for(self.engine.watch(context, interval=0.01), timeout))
+
+    def test_error_message(self):
+        """测试页面出现错误信息时立即返回失败。"""
+        error = PinterestConfig.SELECTORS["error_message"].split(", ")
+        page = FakePage(present=error, error_text="密码不正确", url=self.login_url)
+
+        self.assertEqual(self.watch(page), (False, "密码不正确"))
+
+    def test_generic_error_ignored(self):
+        """测试不能确认是凭据错误的页面错误不作为监视结果。"""
+        error = PinterestConfig.SELECTORS["error_message"].split(", ")
+        page = FakePage(present=error, error_text="请稍后再试", url=self.login_url)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            self.watch(page, timeout=0.05)
+
+    def test_redirect_after_login_page(self):
+        """测试离开登录页并出现成功标识后返回成功。"""
+        page = FakePage(url=self.login_url)
+
+        async def redirect():
+            await asyncio.sleep(0.05)
+            page.url = "https://www.pinterest.com/"
+            page.present.update(self.success)
+
+        async def run():
+            context = MagicMock()
+            context.pages = [page]
+            _, outcome = await asyncio.gather(redirect(), self.engine.watch(context, interval=0.01))
+            return outcome
+
+        self.assertEqual(asyncio.run(asyncio.wait_for(run(), 1)), (True, ""))
+
+    def test_ignores_pages_before_login(self):
+        """测试尚未访问登录页时不因其他页面提前返回。"""
+        page = FakePage(url="https://www.pinterest.com/")
+
+        with self.assertRaises(asyncio.TimeoutError):
+            self.watch(page, timeout=0.05)
+
+
+class TestScriptedFallback(unittest.TestCase):
+    """脚本化登录与代理回退测试类。"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    def test_fallback_to_agent(self):
+        """测试脚本化登录无法完成时回退到代理。"""
+        tool = PinterestLoginTool(negative_cache=NegativeCache(os.path.join(self.temp_dir, "negative_cache.json")))
+        object.__setattr__(tool, "_scripted_login", AsyncMock(return_value=None))
+        object.__setattr__(tool, "_recipe_login", AsyncMock(return_value=None))
+        object.__setattr__(tool, "_agent_login", AsyncMock(
+            return_value=LoginResult.succeeded("test@example.com", "agent")
+        ))
+
+        result = asyncio.run(tool._async_login("test@example.com", "password123", True, 30))
+
+        self.assertEqual(result.method, "agent")
+        self.assertEqual(set(result.phase_timings), {"scripted", "recipe", "agent"})
+        tool._agent_login.assert_awaited_once()
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    def test_scripted_result_skips_agent(self):
+        """测试脚本化登录有结果时不调用代理。"""
+        tool = PinterestLoginTool(negative_cache=NegativeCache(os.path.join(self.temp_dir, "negative_cache.json")))
+        object.__setattr__(tool, "_scripted_login", AsyncMock(
+            return_value=LoginResult.succeeded("test@example.com", "scripted")
+        ))
+        object.__setattr__(tool, "_agent_login", AsyncMock())
+
+        result = asyncio.run(tool._async_login("test@example.com", "password123", True, 30))
+
+        self.assertEqual(result.status, LoginStatus.SUCCESS)
+        self.assertIn("成功", str(result))
+        tool._agent_login.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,119 @@
+"""会话缓存测试文件。"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from negative_cache import NegativeCache
+from session_cache import SessionCache
+from pinterest_login_tool import PinterestLoginTool
+
+
+def make_state(expires: float = -1) -> dict:
+    """构造一个最小的storage state。"""
+    return {
+        "cookies": [{"name": "_pinterest_sess", "value": "abc", "expires": expires}],
+        "origins": []
+    }
+
+
+class TestSessionCache(unittest.TestCase):
+    """会话缓存测试类。"""
+
+    def setUp(self):
+        """测试前准备。"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = SessionCache(self.cache_dir, ttl=60, max_entries=2)
+
+    def tearDown(self):
+        """测试后清理。"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_put_and_get(self):
+        """测试保存并读取会话。"""
+        self.cache.put("test@example.com", "password123", make_state())
+
+        state = self.cache.get("test@example.com", "password123")
+        self.assertEqual(state["cookies"][0]["value"], "abc")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_wrong_password_is_miss(self):
+        """测试密码不一致时不返回缓存。"""
+        self.cache.put("test@example.com", "password123", make_state())
+
+        self.assertIsNone(self.cache.get("test@example.com", "otherpassword"))
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_ttl_expiration(self):
+        """测试超过TTL的条目被自动移除。"""
+        self.cache.put("test@example.com", "password123", make_state())
+
+        with patch("session_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(self.cache.get("test@example.com", "password123"))
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["expirations"], 1)
+        self.assertEqual(stats["size"], 0)
+
+    def test_expired_session_cookie(self):
+        """测试登录cookie过期的条目被视为失效。"""
+        self.cache.put("test@example.com", "password123", make_state(expires=time.time() - 1))
+
+        self.assertIsNone(self.cache.get("test@example.com", "password123"))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目。"""
+        self.cache.put("a@example.com", "password123", make_state())
+        self.cache.put("b@example.com", "password123", make_state())
+        self.cache.get("a@example.com", "password123")
+        self.cache.put("c@example.com", "password123", make_state())
+
+        self.assertIsNone(self.cache.get("b@example.com", "password123"))
+        self.assertIsNotNone(self.cache.get("a@example.com", "password123"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_persistence(self):
+        """测试缓存在重新加载后仍然可用。"""
+        self.cache.put("test@example.com", "password123", make_state())
+
+        reloaded = SessionCache(self.cache_dir, ttl=60, max_entries=2)
+        self.assertIsNotNone(reloaded.get("test@example.com", "password123"))
+
+    def test_password_hash_on_disk(self):
+        """测试磁盘上只保存scrypt哈希，不保存密码或单次sha256哈希。"""
+        self.cache.put("test@example.com", "password123", make_state())
+        file_name = os.listdir(self.cache_dir)[0]
+        with open(os.path.join(self.cache_dir, file_name), encoding="utf-8") as f:
+            entry = json.load(f)
+
+        self.assertNotIn("password123", json.dumps(entry))
+        self.assertEqual(entry["kdf"]["name"], "scrypt")
+        legacy = hashlib.sha256(f"{entry['salt']}:password123".encode("utf-8")).hexdigest()
+        self.assertNotEqual(entry["password_hash"], legacy)
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    @patch.object(PinterestLoginTool, '_async_login', new_callable=AsyncMock)
+    def test_tool_cache_hit_skips_browser(self, mock_async_login):
+        """测试缓存命中时工具不再启动浏览器。"""
+        self.cache.put("test@example.com", "password123", make_state())
+        tool = PinterestLoginTool(
+            session_cache=self.cache,
+            negative_cache=NegativeCache(os.path.join(self.cache_dir, "negative_cache.json"))
+        )
+
+        result = tool._run(username="test@example.com", password="password123")
+        tool.shutdown()
+
+        mock_async_login.assert_not_awaited()
+        self.assertIn("成功", result)
+        self.assertIn("缓存", result)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
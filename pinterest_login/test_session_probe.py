@@ -0,0 +1,191 @@
+"""会话检查测试文件。"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+from login_client import PinterestLoginClient
+from login_result import LoginResult
+from metrics import LoginMetrics
+from negative_cache import NegativeCache
+from rate_limiter import AdaptiveRateLimiter
+from session_cache import SessionCache
+from session_probe import SessionProbe, SessionStatus, classify_response, cookie_header
+
+
+def storage_state(session, expires=-1):
+    return {"cookies": [
+        {"name": "_pinterest_sess", "value": session, "domain": ".pinterest.com", "path": "/", "expires": expires},
+        {"name": "csrftoken", "value": "token", "domain": ".pinterest.com", "path": "/", "expires": -1},
+        {"name": "other", "value": "x", "domain": ".example.com", "path": "/", "expires": -1},
+    ], "origins": []}
+
+
+def pinterest_api(request):
+    """按会话cookie返回不同响应的模拟接口。"""
+    cookie = request.headers.get("cookie", "")
+    if "_pinterest_sess=valid" in cookie:
+        body = {"resource_response": {"status": "success", "data": {"username": "a"}}}
+        return httpx.Response(200, json=body, headers={"set-cookie": "leak=1; Domain=.pinterest.com; Path=/"})
+    if "_pinterest_sess=challenged" in cookie:
+        return httpx.Response(302, headers={"location": "https://www.pinterest.com/unauth/verify/"})
+    if "_pinterest_sess=broken" in cookie:
+        raise httpx.ConnectError("connection reset")
+    return httpx.Response(401, json={"resource_response": {"status": "failure", "error": {"http_status": 401}}})
+
+
+class TestClassifyResponse(unittest.TestCase):
+    """响应判定测试类。"""
+
+    def test_classify(self):
+        """测试按状态码、重定向地址和接口错误判定会话状态。"""
+        markers = ("challenge", "captcha")
+        success = json.dumps({"resource_response": {"status": "success", "data": {"id": "1"}}})
+        captcha = json.dumps({"resource_response": {"error": {"message": "Captcha required"}}})
+        cases = [
+            ((200, "", success), SessionStatus.VALID),
+            ((200, "", captcha), SessionStatus.CHALLENGED),
+            ((200, "", json.dumps({"resource_response": {"data": None}})), SessionStatus.EXPIRED),
+            ((302, "/login/?next=/settings/", ""), SessionStatus.EXPIRED),
+            ((302, "/challenge/", ""), SessionStatus.CHALLENGED),
+            ((401, "", ""), SessionStatus.EXPIRED),
+            ((429, "", ""), SessionStatus.ERROR),
+            ((200, "", "<html>"), SessionStatus.ERROR),
+        ]
+        for (status_code, location, body), expected in cases:
+            with self.subTest(status_code=status_code, location=location):
+                self.assertEqual(classify_response(status_code, location, body, markers)[0], expected)
+
+    def test_cookie_header(self):
+        """测试只发送适用于该域名且未过期的cookie。"""
+        state = storage_state("abc")
+        self.assertEqual(cookie_header(state, "www.pinterest.com"), "_pinterest_sess=abc; csrftoken=token")
+
+        expired = storage_state("abc", expires=time.time() - 1)
+        self.assertEqual(cookie_header(expired, "www.pinterest.com"), "csrftoken=token")
+
+
+class TestSessionProbe(unittest.TestCase):
+    """SessionProbe测试类。"""
+
+    def setUp(self):
+        self.requests = []
+
+        def handler(request):
+            self.requests.append(request)
+            return pinterest_api(request)
+
+        self.probe = SessionProbe(
+            concurrency=2, metrics=LoginMetrics(), transport=httpx.MockTransport(handler)
+        )
+
+    def test_probe_many(self):
+        """测试并发检查并按会话分类，响应中的cookie不会带到其他会话的请求中。"""
+        sessions = [
+            ("a@example.com", storage_state("valid")),
+            ("b@example.com", storage_state("expired")),
+            ("c@example.com", storage_state("challenged")),
+            ("d@example.com", storage_state("broken")),
+            ("e@example.com", {"cookies": []}),
+        ]
+
+        async def run():
+            results = [result async for result in self.probe.probe_many(sessions)]
+            await self.probe.aclose()
+            return results
+
+        results = {result.username: result for result in asyncio.run(run())}
+
+        self.assertEqual(results["a@example.com"].status, SessionStatus.VALID)
+        self.assertEqual(results["b@example.com"].status, SessionStatus.EXPIRED)
+        self.assertEqual(results["c@example.com"].status, SessionStatus.CHALLENGED)
+        self.assertEqual(results["d@example.com"].status, SessionStatus.ERROR)
+        self.assertEqual(results["e@example.com"].status, SessionStatus.EXPIRED)
+        self.assertEqual(
+            [name for name, result in sorted(results.items()) if result.needs_login],
+            ["b@example.com", "c@example.com", "e@example.com"]
+        )
+        self.assertEqual(len(self.requests), 4)
+        for request in self.requests:
+            self.assertNotIn("leak=1", request.headers.get("cookie", ""))
+            self.assertEqual(request.headers["x-csrftoken"], "token")
+        self.assertEqual(self.probe.stats()["counts"]["expired"], 2)
+
+
+class TestProbeOnCacheHit(unittest.TestCase):
+    """会话缓存命中时的会话检查测试类。"""
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        metrics = LoginMetrics()
+        self.session_cache = SessionCache(os.path.join(self.temp_dir, "sessions"))
+        self.client = PinterestLoginClient(
+            session_cache=self.session_cache,
+            negative_cache=NegativeCache(os.path.join(self.temp_dir, "negative_cache.json")),
+            metrics=metrics,
+            rate_limiter=AdaptiveRateLimiter(enabled=False, metrics=metrics),
+            session_probe=SessionProbe(metrics=metrics, transport=httpx.MockTransport(pinterest_api))
+        )
+        self.scripted = AsyncMock(return_value=LoginResult.succeeded("test@example.com", "scripted"))
+        object.__setattr__(self.client, "_scripted_login", self.scripted)
+
+    def tearDown(self):
+        self.client.shutdown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def login(self):
+        async def run():
+            try:
+                return await self.client.alogin("test@example.com", "password123")
+            finally:
+                await self.client.close()
+        return asyncio.run(run())
+
+    def test_valid_session_skips_login(self):
+        """测试检查通过的缓存会话直接返回。"""
+        self.session_cache.put("test@example.com", "password123", storage_state("valid"))
+
+        result = self.login()
+
+        self.assertEqual(result.method, "cache")
+        self.assertIn("session_probe", result.phase_timings)
+        self.scripted.assert_not_awaited()
+
+    def test_expired_session_logs_in(self):
+        """测试检查未通过的缓存会话被移除并重新登录。"""
+        self.session_cache.put("test@example.com", "password123", storage_state("expired"))
+
+        result = self.login()
+
+        self.assertEqual(result.method, "scripted")
+        self.scripted.assert_awaited_once()
+        self.assertEqual(len(self.session_cache), 0)
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    @patch("login_client.PinterestConfig.SESSION_PROBE_ON_CACHE_HIT", True)
+    def test_probe_enabled_by_config(self):
+        """测试按配置启用会话检查时，检查器使用客户端的指标对象。"""
+        metrics = LoginMetrics()
+        client = PinterestLoginClient(
+            session_cache=self.session_cache,
+            negative_cache=NegativeCache(os.path.join(self.temp_dir, "negative_cache.json")),
+            metrics=metrics,
+            rate_limiter=AdaptiveRateLimiter(enabled=False, metrics=metrics)
+        )
+        try:
+            self.assertIsInstance(client.session_probe, SessionProbe)
+            self.assertIs(client.session_probe.metrics, metrics)
+        finally:
+            client.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
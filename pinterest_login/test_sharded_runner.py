@@ -0,0 +1,66 @@
+"""多进程分片登录测试文件。"""
+
+import os
+import unittest
+
+from batch_login import login_concurrently
+from sharded_runner import ShardedLoginRunner
+
+
+class FakeTool:
+    """不启动浏览器的工具替身，在工作进程中使用。"""
+
+    async def alogin(self, username, password, headless=True, timeout=30):
+        if username.startswith("crash"):
+            os._exit(1)
+        return f"Pinterest登录成功！用户：{username}（进程{os.getpid()}）"
+
+    def login_many(self, credentials, **options):
+        return login_concurrently(self.alogin, credentials, **options)
+
+    async def close(self):
+        pass
+
+
+def create_fake_tool(**kwargs):
+    return FakeTool()
+
+
+class TestShardedLoginRunner(unittest.TestCase):
+    """多进程分片登录测试类。"""
+
+    def test_results_in_input_order(self):
+        """测试多个进程的结果按输入顺序合并。"""
+        credentials = [(f"user{i}@example.com", "password123") for i in range(6)]
+        credentials.insert(3, ("bad@example.com", "123"))
+        runner = ShardedLoginRunner(workers=2, tool_factory=create_fake_tool)
+
+        results = list(runner.run(credentials))
+
+        self.assertEqual([r.index for r in results], list(range(7)))
+        self.assertTrue(results[3].rejected)
+        pids = {r.result.split("进程")[-1] for r in results if not r.rejected}
+        self.assertEqual(len(pids), 2)
+
+    def test_crashed_worker_is_reported(self):
+        """测试工作进程崩溃时其余账号仍有结果。"""
+        credentials = [("crash@example.com", "password123"), ("ok@example.com", "password123")]
+        runner = ShardedLoginRunner(workers=2, tool_factory=create_fake_tool, shutdown_grace=1)
+
+        results = list(runner.run(credentials))
+
+        self.assertEqual(len(results), 2)
+        self.assertIn("工作进程提前退出", str(results[0].result))
+        self.assertIn("成功", results[1].result)
+
+    def test_split_round_robin(self):
+        """测试凭据按轮询方式分片。"""
+        runner = ShardedLoginRunner(workers=3, tool_factory=create_fake_tool)
+        shards = runner._split([("u", "p")] * 7)
+
+        self.assertEqual([len(shard) for shard in shards], [3, 2, 2])
+        self.assertEqual([index for index, _ in shards[1]], [1, 4])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
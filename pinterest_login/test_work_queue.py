@@ -0,0 +1,195 @@
+"""任务队列与登录工作进程测试文件。"""
+
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from login_result import FailureCategory, LoginResult, LoginStatus
+from metrics import LoginMetrics
+from retry_policy import RetryPolicy
+from work_queue import LoginWorker, SQLiteJobQueue, WorkQueue
+
+
+class FakeClient:
+    """按用户名返回不同结果的登录入口替身。"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def alogin(self, username, password, headless=True, timeout=30):
+        self.calls.append(username)
+        await asyncio.sleep(0.01)
+        if username.startswith("bad"):
+            return LoginResult.failed(username, "密码错误", FailureCategory.BAD_CREDENTIALS, method="scripted")
+        if username.startswith("flaky"):
+            return LoginResult.failed(username, "net::ERR_CONNECTION_RESET", FailureCategory.NETWORK,
+                                      status=LoginStatus.ERROR)
+        return LoginResult.succeeded(username, "scripted")
+
+
+class TestSQLiteJobQueue(unittest.TestCase):
+    """SQLiteJobQueue测试类。"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "jobs.db")
+        self.queue = SQLiteJobQueue(self.path, max_attempts=2)
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_lease_is_exclusive(self):
+        """测试同一任务不会同时租给两个工作进程，租约过期后可以重新租用。"""
+        self.queue.enqueue([("a@example.com", "password123")])
+        other = SQLiteJobQueue(self.path)
+
+        job = self.queue.lease("w1", visibility_timeout=60)
+        self.assertIsNone(other.lease("w2", visibility_timeout=60))
+
+        with patch("work_queue.time.time", return_value=time.time() + 61):
+            retaken = other.lease("w2", visibility_timeout=60)
+        self.assertEqual((retaken.id, retaken.attempts), (job.id, 2))
+        # 原租约已失效，结果以新的租约为准
+        self.assertFalse(self.queue.ack(job, {"status": "success"}))
+        self.assertTrue(other.ack(retaken, {"status": "success"}))
+        other.close()
+
+    def test_nack_and_dead_letter(self):
+        """测试失败任务重新排队，达到次数上限后进入死信状态并清空密码。"""
+        self.queue.enqueue([("a@example.com", "password123")])
+
+        job = self.queue.lease("w1", 60)
+        self.assertEqual(self.queue.nack(job, "网络错误"), "queued")
+        job = self.queue.lease("w1", 60)
+        self.assertEqual(self.queue.nack(job, "网络错误", {"status": "error"}), "dead")
+
+        self.assertEqual(self.queue.stats()["dead"], 1)
+        dead = list(self.queue.results("dead"))
+        self.assertEqual((dead[0]["error"], dead[0]["attempts"]), ("网络错误", 2))
+        self.assertEqual(self._passwords(), [""])
+
+    def test_release_keeps_attempts(self):
+        """测试归还的任务不计入失败次数。"""
+        self.queue.enqueue([("a@example.com", "password123")])
+
+        self.assertTrue(self.queue.release(self.queue.lease("w1", 60)))
+
+        self.assertEqual(self.queue.lease("w1", 60).attempts, 1)
+
+    def test_incomplete_backend(self):
+        """测试未实现全部接口方法的队列不能实例化。"""
+        class PartialQueue(WorkQueue):
+            def enqueue(self, credentials, options=None):
+                return 0
+
+        with self.assertRaises(TypeError):
+            PartialQueue()
+
+    def _passwords(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            return [row[0] for row in conn.execute("SELECT password FROM jobs")]
+        finally:
+            conn.close()
+
+
+class TestLoginWorker(unittest.TestCase):
+    """LoginWorker测试类。"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.queue = SQLiteJobQueue(os.path.join(self.temp_dir, "jobs.db"), max_attempts=2)
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_drain(self):
+        """测试多个工作进程共同处理队列，流程未完成的任务重试后进入死信状态。"""
+        credentials = [(f"user{i}@example.com", "password123") for i in range(6)]
+        credentials += [("bad@example.com", "password123"), ("flaky@example.com", "password123")]
+        self.queue.enqueue(credentials, {"timeout": 10})
+        client = FakeClient()
+
+        async def run():
+            workers = [
+                LoginWorker(self.queue, client, worker_id=f"w{i}", concurrency=2, poll_interval=0.01,
+                            retry_delay=0, metrics=LoginMetrics())
+                for i in range(2)
+            ]
+            return await asyncio.gather(*(worker.run(drain=True) for worker in workers))
+
+        counts = asyncio.run(run())
+
+        self.assertEqual(sum(count["acked"] for count in counts), 7)
+        self.assertEqual(sum(count["dead"] for count in counts), 1)
+        self.assertEqual(client.calls.count("flaky@example.com"), 2)
+        self.assertEqual(self.queue.stats(), {"queued": 0, "leased": 0, "done": 7, "dead": 1})
+        results = {record["username"]: record["result"] for record in self.queue.results()}
+        self.assertEqual(results["bad@example.com"]["failure_category"], "bad_credentials")
+        self.assertNotIn("password123", str(results))
+
+    def test_requeue_only_retryable(self):
+        """测试只有可重试且内部重试次数未用完的失败重新排队。"""
+        results = {
+            "exhausted@example.com": LoginResult.failed(
+                "exhausted@example.com", "net::ERR_CONNECTION_RESET", FailureCategory.NETWORK,
+                status=LoginStatus.ERROR, attempts=4
+            ),
+            "timeout@example.com": LoginResult.failed(
+                "timeout@example.com", "超过30秒未完成", FailureCategory.TIMEOUT, status=LoginStatus.ERROR
+            ),
+            "deadline@example.com": LoginResult.failed(
+                "deadline@example.com", "net::ERR_CONNECTION_RESET", FailureCategory.NETWORK,
+                status=LoginStatus.ERROR, attempts=2
+            ),
+        }
+        self.queue.enqueue([(username, "password123") for username in results])
+
+        class Client:
+            retry_policy = RetryPolicy(
+                {"network": {"max_retries": 3, "base_delay": 1, "max_delay": 30}}, metrics=LoginMetrics()
+            )
+
+            async def alogin(self, username, password, headless=True, timeout=30):
+                return results[username]
+
+        async def run():
+            worker = LoginWorker(self.queue, Client(), poll_interval=0.01, retry_delay=0, metrics=LoginMetrics())
+            return await worker.run(drain=True)
+
+        counts = asyncio.run(run())
+
+        self.assertEqual((counts["acked"], counts["requeued"], counts["dead"]), (2, 1, 1))
+        dead = list(self.queue.results("dead"))
+        self.assertEqual([record["username"] for record in dead], ["deadline@example.com"])
+
+    def test_stop_releases_running_jobs(self):
+        """测试工作进程被取消时归还执行中的任务。"""
+        self.queue.enqueue([("slow@example.com", "password123")])
+
+        class SlowClient:
+            async def alogin(self, username, password, headless=True, timeout=30):
+                await asyncio.sleep(3600)
+
+        async def run():
+            worker = LoginWorker(self.queue, SlowClient(), poll_interval=0.01, metrics=LoginMetrics())
+            task = asyncio.ensure_future(worker.run())
+            await asyncio.sleep(0.1)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(run())
+
+        self.assertEqual(self.queue.stats()["queued"], 1)
+        self.assertEqual(self.queue.lease("w1", 60).attempts, 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
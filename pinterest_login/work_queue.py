@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+"""基于任务队列的登录工作进程。
+
+生产者把登录任务放入队列；任意数量的工作进程从队列租用任务，执行登录并把结果写回队列。
+租约有可见性超时：工作进程崩溃或失联后，任务在超时后重新可被租用，因此每个任务至少执行一次；
+失败次数达到上限的任务进入死信状态。
+增加处理能力只需启动更多工作进程，不需要重新划分账号列表。
+
+WorkQueue 定义队列接口，默认实现 SQLiteJobQueue 使用WAL模式的SQLite文件，不依赖外部服务，
+同一台机器上的任意多个工作进程可以共用。WAL依赖共享内存，不能放在网络文件系统上，
+多台机器共用队列时需要基于网络服务（如Redis、PostgreSQL）实现 WorkQueue。
+
+队列中的任务需要保存密码才能执行登录。任务完成或进入死信状态后密码立即被清空，
+数据库文件权限仅限当前用户，结果中不包含密码。
+
+用法：
+    python work_queue.py enqueue accounts.csv --db jobs.db
+    python work_queue.py worker --db jobs.db --concurrency 4
+    python work_queue.py stats --db jobs.db
+    python work_queue.py results --db jobs.db -o results.jsonl
+"""
+
+import abc
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from config import PinterestConfig
+from login_result import FailureCategory, LoginResult, LoginStatus
+from metrics import LoginMetrics, get_metrics
+from retry_policy import RetryPolicy
+
+
+@dataclass
+class Job:
+    """一个已租用的登录任务。
+
+    Attributes:
+        id: 任务ID
+        username: 用户名或邮箱
+        password: 密码
+        options: 登录参数，如 headless、timeout
+        attempts: 包括本次在内的租用次数
+        lease_token: 本次租约的标识，确认和释放任务时需要提供
+    """
+
+    id: int
+    username: str
+    password: str = field(repr=False)
+    options: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 1
+    lease_token: str = ""
+
+
+class WorkQueue(abc.ABC):
+    """登录任务队列接口，其他后端（如Redis、SQS）实现这些方法即可替换默认的SQLite队列。
+
+    任务状态：queued（等待租用）、leased（已被租用）、done（已完成）、dead（死信）。
+    租约过期的 leased 任务视同 queued。
+    """
+
+    @abc.abstractmethod
+    def enqueue(self, credentials: Iterable[Tuple[str, str]], options: Optional[Dict[str, Any]] = None) -> int:
+        """放入登录任务。
+
+        Args:
+            credentials: (username, password) 序列
+            options: 这些任务的登录参数
+
+        Returns:
+            int: 放入的任务数
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def lease(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        """租用一个可执行的任务。
+
+        Args:
+            worker_id: 工作进程标识
+            visibility_timeout: 租约时长（秒），期间其他工作进程看不到该任务
+
+        Returns:
+            Optional[Job]: 任务，没有可执行的任务时返回None
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def extend(self, job: Job, visibility_timeout: float) -> bool:
+        """延长租约。
+
+        Returns:
+            bool: 租约仍属于该工作进程
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def ack(self, job: Job, result: Dict[str, Any]) -> bool:
+        """确认任务完成并写入结果。
+
+        Returns:
+            bool: 租约仍属于该工作进程；租约已过期并被重新租用时返回False，结果以后完成的为准
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def nack(self, job: Job, error: str, result: Optional[Dict[str, Any]] = None, delay: float = 0) -> str:
+        """报告任务失败，未达到次数上限时重新排队，否则进入死信状态。
+
+        Args:
+            job: 任务
+            error: 失败原因
+            result: 最后一次的登录结果
+            delay: 重新排队后等待多久才可再次租用（秒）
+
+        Returns:
+            str: 任务的新状态，queued 或 dead；租约已不属于该工作进程时为空字符串
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def release(self, job: Job) -> bool:
+        """归还未执行完的任务，不计入失败次数，用于工作进程正常退出。"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """按状态统计的任务数。"""
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(WorkQueue):
+    """WAL模式的SQLite任务队列。
+
+    租用通过 BEGIN IMMEDIATE 事务完成，多个进程同时租用时同一任务只会交给一个工作进程。
+
+    Args:
+        path: 数据库文件路径
+        max_attempts: 每个任务最多租用的次数，超过后进入死信状态
+        busy_timeout: 等待其他进程释放数据库锁的时间（秒）
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, busy_timeout: float = 30):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600))
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                password TEXT NOT NULL,
+                options TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                lease_token TEXT,
+                leased_by TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+            CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (status, lease_expires);
+        """)
+
+    def enqueue(self, credentials: Iterable[Tuple[str, str]], options: Optional[Dict[str, Any]] = None) -> int:
+        options_json = json.dumps(options or {})
+        count = 0
+        batch: List[Tuple[Any, ...]] = []
+        for username, password in credentials:
+            now = time.time()
+            batch.append((username, password, options_json, now, now, now))
+            if len(batch) >= 1000:
+                count += self._insert(batch)
+                batch = []
+        if batch:
+            count += self._insert(batch)
+        return count
+
+    def lease(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        now = time.time()
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                    "OR (status = 'leased' AND lease_expires <= ?) ORDER BY id LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row["attempts"] >= self.max_attempts:
+                    # 最后一次租约过期仍未确认，工作进程可能在执行时崩溃
+                    self._bury(conn, row["id"], "租约过期次数达到上限", None, now)
+                    continue
+
+                token = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_token = ?, leased_by = ?, "
+                    "lease_expires = ?, updated_at = ? WHERE id = ?",
+                    (token, worker_id, now + visibility_timeout, now, row["id"])
+                )
+                return Job(
+                    row["id"], row["username"], row["password"], json.loads(row["options"]),
+                    attempts=row["attempts"] + 1, lease_token=token
+                )
+
+    def extend(self, job: Job, visibility_timeout: float) -> bool:
+        now = time.time()
+        return self._update_leased(
+            job, "lease_expires = ?, updated_at = ?", (now + visibility_timeout, now)
+        )
+
+    def ack(self, job: Job, result: Dict[str, Any]) -> bool:
+        return self._update_leased(
+            job,
+            "status = 'done', password = '', result = ?, error = NULL, lease_token = NULL, "
+            "lease_expires = NULL, updated_at = ?",
+            (json.dumps(result, ensure_ascii=False), time.time())
+        )
+
+    def nack(self, job: Job, error: str, result: Optional[Dict[str, Any]] = None, delay: float = 0) -> str:
+        now = time.time()
+        result_json = json.dumps(result, ensure_ascii=False) if result is not None else None
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts FROM jobs WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (job.id, job.lease_token)
+            ).fetchone()
+            if row is None:
+                return ""
+            if row["attempts"] >= self.max_attempts:
+                self._bury(conn, job.id, error, result_json, now)
+                return "dead"
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', available_at = ?, error = ?, result = ?, lease_token = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ?",
+                (now + delay, error, result_json, now, job.id)
+            )
+            return "queued"
+
+    def release(self, job: Job) -> bool:
+        return self._update_leased(
+            job,
+            "status = 'queued', attempts = attempts - 1, available_at = ?, lease_token = NULL, "
+            "lease_expires = NULL, updated_at = ?",
+            (time.time(), time.time())
+        )
+
+    def stats(self) -> Dict[str, int]:
+        counts = {"queued": 0, "leased": 0, "done": 0, "dead": 0}
+        with self._lock:
+            for row in self._conn.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status"):
+                counts[row["status"]] = row["count"]
+        return counts
+
+    def results(self, status: str = "done") -> Iterator[Dict[str, Any]]:
+        """按任务ID顺序读取已完成或死信任务的结果。
+
+        Args:
+            status: "done" 或 "dead"
+
+        Yields:
+            Dict[str, Any]: 任务ID、用户名、尝试次数、失败原因和登录结果
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, username, attempts, result, error FROM jobs WHERE status = ? AND id > ? "
+                    "ORDER BY id LIMIT 500",
+                    (status, last_id)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                last_id = row["id"]
+                yield {
+                    "job_id": row["id"],
+                    "username": row["username"],
+                    "attempts": row["attempts"],
+                    "error": row["error"],
+                    "result": json.loads(row["result"]) if row["result"] else None,
+                }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _insert(self, batch: List[Tuple[Any, ...]]) -> int:
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO jobs (username, password, options, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                batch
+            )
+        return len(batch)
+
+    def _update_leased(self, job: Job, assignments: str, params: Tuple[Any, ...]) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                params + (job.id, job.lease_token)
+            )
+            return cursor.rowcount == 1
+
+    @staticmethod
+    def _bury(conn: sqlite3.Connection, job_id: int, error: str, result_json: Optional[str], now: float) -> None:
+        conn.execute(
+            "UPDATE jobs SET status = 'dead', password = '', error = ?, result = COALESCE(?, result), "
+            "lease_token = NULL, lease_expires = NULL, updated_at = ? WHERE id = ?",
+            (error, result_json, now, job_id)
+        )
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._conn, self._lock)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE 事务，正常结束时提交，出错时回滚。"""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+
+
+def _create_default_client(**kwargs: Any) -> Any:
+    # 工作进程不需要CrewAI，使用与 PinterestLoginTool 相同登录流程的普通入口
+    from login_client import PinterestLoginClient
+    return PinterestLoginClient(**kwargs)
+
+
+class LoginWorker:
+    """从队列租用登录任务并执行。
+
+    执行期间定期延长租约；登录流程因可重试的错误（按 retry_policy 分类，如网络或LLM服务错误）未能完成，
+    且登录入口内部的重试次数尚未用完（如因时间上限提前停止）时任务重新排队，
+    稍后可能由其他工作进程执行，达到次数上限后进入死信状态。其他结果（包括密码错误、超时）直接确认。
+
+    Args:
+        queue: 任务队列
+        client: 登录入口，PinterestLoginTool 或 PinterestLoginClient，需要提供 alogin()
+        worker_id: 工作进程标识，默认为 主机名:进程号
+        concurrency: 同时执行的任务数
+        visibility_timeout: 租约时长（秒），应大于单次登录的时间上限
+        poll_interval: 队列为空时再次租用前的等待时间（秒）
+        retry_delay: 失败任务重新排队后的等待时间（秒）
+        metrics: 指标对象，默认使用 get_metrics()
+        retry_policy: 判断失败是否可重试的重试策略，默认使用登录入口的 retry_policy
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        client: Any,
+        worker_id: Optional[str] = None,
+        concurrency: int = 4,
+        visibility_timeout: float = 300,
+        poll_interval: float = 1.0,
+        retry_delay: float = 30,
+        metrics: Optional[LoginMetrics] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        self.queue = queue
+        self.client = client
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = concurrency
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.metrics = metrics or get_metrics()
+        self.retry_policy = retry_policy or getattr(client, "retry_policy", None) or RetryPolicy(metrics=self.metrics)
+        self.logger = logging.getLogger(__name__)
+        self.counts: Dict[str, int] = {"acked": 0, "requeued": 0, "dead": 0, "lost": 0}
+
+    async def run(self, stop: Optional[asyncio.Event] = None, drain: bool = False) -> Dict[str, int]:
+        """持续租用并执行任务。
+
+        Args:
+            stop: 设置后停止租用新任务，等待执行中的任务完成
+            drain: 队列中没有可执行的任务且没有执行中的任务时退出
+
+        Returns:
+            Dict[str, int]: 确认、重新排队、死信和租约丢失的任务数
+        """
+        stop = stop or asyncio.Event()
+        pending: Set[asyncio.Task] = set()
+        try:
+            while not stop.is_set():
+                job = None
+                if len(pending) < self.concurrency:
+                    job = await asyncio.to_thread(self.queue.lease, self.worker_id, self.visibility_timeout)
+                if job is not None:
+                    pending.add(asyncio.ensure_future(self._execute(job)))
+                    continue
+                if drain and not pending:
+                    break
+
+                waiters: Set[Any] = set(pending) | {asyncio.ensure_future(stop.wait())}
+                done, _ = await asyncio.wait(waiters, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in waiters - pending:
+                    waiter.cancel()
+                for task in done & pending:
+                    if not task.cancelled() and task.exception() is not None:
+                        self.logger.error(f"写回任务结果失败：{task.exception()}")
+                pending -= done
+
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        return dict(self.counts)
+
+    async def _execute(self, job: Job) -> None:
+        """执行一个任务并写回结果，期间定期延长租约；被取消时归还任务。"""
+        heartbeat = asyncio.ensure_future(self._heartbeat(job))
+        options = {"headless": True, "timeout": 30}
+        options.update(job.options)
+        try:
+            try:
+                result = await self.client.alogin(job.username, job.password, **options)
+            except Exception as e:
+                result = LoginResult.failed(job.username, str(e), FailureCategory.UNKNOWN, status=LoginStatus.ERROR)
+        except asyncio.CancelledError:
+            heartbeat.cancel()
+            await asyncio.to_thread(self.queue.release, job)
+            raise
+        finally:
+            heartbeat.cancel()
+
+        record = result.to_dict() if isinstance(result, LoginResult) else {"message": str(result)}
+        if _should_retry(result, self.retry_policy):
+            state = await asyncio.to_thread(
+                self.queue.nack, job, record.get("message") or "", record, self.retry_delay
+            )
+            outcome = {"queued": "requeued", "dead": "dead"}.get(state, "lost")
+        else:
+            outcome = "acked" if await asyncio.to_thread(self.queue.ack, job, record) else "lost"
+        if outcome == "lost":
+            self.logger.warning(f"任务 {job.id} 的租约已过期并被重新租用，本次结果未写入")
+        self.counts[outcome] += 1
+        self.metrics.inc("queue_jobs_total", outcome=outcome)
+
+    async def _heartbeat(self, job: Job) -> None:
+        interval = max(self.visibility_timeout / 3, 0.01)
+        while True:
+            await asyncio.sleep(interval)
+            if not await asyncio.to_thread(self.queue.extend, job, self.visibility_timeout):
+                return
+
+
+def _should_retry(result: Any, retry_policy: RetryPolicy) -> bool:
+    """登录流程因可重试的错误未能完成，且内部重试次数尚未用完时重新排队。"""
+    return getattr(result, "status", None) == LoginStatus.ERROR and retry_policy.can_retry(
+        getattr(result, "failure_category", None), getattr(result, "attempts", 1)
+    )
+
+
+def main() -> int:
+    """主函数。"""
+    parser = argparse.ArgumentParser(description="基于任务队列的Pinterest批量登录")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="从CSV或JSONL文件放入登录任务")
+    enqueue_parser.add_argument("input", help="凭据文件，CSV需要包含username和password列")
+    enqueue_parser.add_argument("--format", choices=("csv", "jsonl"), help="输入格式，默认按扩展名判断")
+    enqueue_parser.add_argument("--timeout", type=int, default=30, help="单次登录的时间上限（秒）")
+    enqueue_parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+
+    worker_parser = subparsers.add_parser("worker", help="租用并执行登录任务")
+    worker_parser.add_argument("--concurrency", type=int, default=4, help="同时执行的任务数")
+    worker_parser.add_argument("--visibility-timeout", type=float, default=300, help="租约时长（秒）")
+    worker_parser.add_argument("--drain", action="store_true", help="队列为空时退出")
+    worker_parser.add_argument("--agent-mode", choices=sorted(PinterestConfig.AGENT_MODES), help="代理模式")
+
+    subparsers.add_parser("stats", help="按状态统计任务数")
+    results_parser = subparsers.add_parser("results", help="导出结果为JSONL")
+    results_parser.add_argument("-o", "--output", help="输出文件，默认输出到标准输出")
+    results_parser.add_argument("--dead", action="store_true", help="导出死信任务")
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument("--db", default="pinterest_jobs.db", help="SQLite队列文件")
+        subparser.add_argument("--max-attempts", type=int, default=3, help="每个任务最多执行的次数")
+    args = parser.parse_args()
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    queue = SQLiteJobQueue(args.db, max_attempts=args.max_attempts)
+    try:
+        if args.command == "enqueue":
+            from batch_cli import iter_credentials
+            rows = ((row["username"], row["password"]) for row in iter_credentials(args.input, args.format))
+            count = queue.enqueue(rows, {"headless": not args.headed, "timeout": args.timeout})
+            print(f"已放入{count}个任务", file=sys.stderr)
+        elif args.command == "worker":
+            return _run_worker(queue, args)
+        elif args.command == "stats":
+            print(json.dumps(queue.stats(), ensure_ascii=False))
+        else:
+            output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+            try:
+                for record in queue.results("dead" if args.dead else "done"):
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            finally:
+                if output is not sys.stdout:
+                    output.close()
+    finally:
+        queue.close()
+    return 0
+
+
+def _run_worker(queue: SQLiteJobQueue, args: argparse.Namespace) -> int:
+    """运行工作进程，Ctrl-C后停止租用新任务并归还执行中的任务。"""
+    client = _create_default_client(agent_mode=args.agent_mode)
+    worker = LoginWorker(queue, client, concurrency=args.concurrency, visibility_timeout=args.visibility_timeout)
+
+    async def run() -> Dict[str, int]:
+        try:
+            return await worker.run(drain=args.drain)
+        finally:
+            await client.close()
+
+    try:
+        counts = asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n已中断，执行中的任务已归还队列", file=sys.stderr)
+        return 130
+    print(json.dumps(counts, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())